@@ -2,10 +2,24 @@
 # Parcheado: progreso compatible (0–100 / 0–1), descarga robusta, clamp de step,
 # CSS sidebar tolerante, fix fecha "Elegir otra"; selects estandarizados 0–4/0–3/A–E.
 
-import io, json
-from datetime import date, datetime
-from typing import Dict
+import json, uuid
+from datetime import date
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from triage import PRIORIDAD, evaluar, metricas, op_0_3, op_0_4, op_A_E, to_0_3, to_0_4, to_A_E
+from triage import avisos, sesiones
+from triage.almacen import Almacen
+from triage.incremental import Puntaje
+from triage.motor import leyenda, vigilar
+from triage.informe import informe
+from triage.registro import Cuestionario
+
+# Tablero de guardia en la misma app (?vista=tablero), sin páginas: se importa solo en esa vista
+if st.query_params.get("vista") == "tablero":
+    from vista_tablero import pagina
+    pagina()
+    st.stop()
 
 # ──────────────────────────────────────────────────────────────
 # Configuración general
@@ -17,6 +31,47 @@ st.set_page_config(
     initial_sidebar_state="collapsed"  # referencias ocultas de inicio
 )
 
+# ──────────────────────────────────────────────────────────────
+# Sesión externa: el borrador se guarda tras cada paso y se retoma en cualquier worker
+# (el id viaja en la URL, ?sesion=...); así se puede escalar a varios procesos y reiniciar
+# sin perder formularios a medio llenar
+# ──────────────────────────────────────────────────────────────
+@st.cache_resource
+def get_sesiones():
+    s = sesiones.abrir()  # TRIAGE_SESIONES; por defecto datos/sesiones.sqlite
+    s.purgar(sesiones.VIGENCIA)
+    return s
+
+DEFECTOS_JSON = Cuestionario().a_json()
+
+def restaurar(guardada: dict):
+    datos = {**DEFECTOS_JSON, **guardada["datos"]}
+    st.session_state.registro = Cuestionario.de_json(datos)
+    st.session_state.guardado = datos
+    st.session_state.step = guardada["paso"]
+    st.session_state.puntaje = Puntaje.hasta(guardada["paso"] - 1, st.session_state.registro)
+    if guardada["informe"]:
+        st.session_state.informe = guardada["informe"]
+        st.session_state.result = guardada["informe"]["resultado"]
+
+def persistir(inf: dict = None):
+    """Guarda solo los campos que cambiaron desde el último paso (más el paso y el informe)."""
+    actual = st.session_state.registro.a_json()
+    cambios = sesiones.diff(st.session_state.guardado, actual, DEFECTOS_JSON)
+    get_sesiones().guardar(st.session_state.sesion, st.session_state.step, cambios, inf)
+    st.session_state.guardado = actual
+
+if "sesion" not in st.session_state:
+    sid = st.query_params.get("sesion", "")
+    guardada = get_sesiones().cargar(sid) if sesiones.ID_VALIDO.fullmatch(sid) else None
+    if guardada is None:
+        sid = uuid.uuid4().hex
+        st.query_params["sesion"] = sid
+        st.session_state.guardado = DEFECTOS_JSON
+    else:
+        restaurar(guardada)
+    st.session_state.sesion = sid
+
 # Estado inicial
 if "step" not in st.session_state:
     st.session_state.step = 1
@@ -26,6 +81,10 @@ if "result" not in st.session_state:
     st.session_state.result = None
 if "fecha_modo" not in st.session_state:
     st.session_state.fecha_modo = "Hoy"
+if "registro" not in st.session_state:
+    st.session_state.registro = Cuestionario()  # todas las respuestas del wizard en un solo objeto
+if "puntaje" not in st.session_state:
+    st.session_state.puntaje = Puntaje()  # bloques de `evaluar` de los pasos ya completados
 
 # Clamp defensivo del paso (1..9)
 if not 1 <= st.session_state.step <= 9:
@@ -37,7 +96,21 @@ SIDEBAR_WIDTHS = {"Estrecho": 320, "Amplio": 460}
 # ──────────────────────────────────────────────────────────────
 # Sidebar: referencias completas (ocultable)
 # ──────────────────────────────────────────────────────────────
-with st.sidebar:
+# Escalas (texto fijo); la derivación se genera de las reglas vigentes (triage/reglas.json)
+ESCALAS_MD = """
+**Escalas**
+- **0–4**: 0 sin síntomas · 1 leve · 2 moderado · 3 severo · 4 potencialmente mortal  
+- **A–E**: A leve · B moderado · C severo · D muy severo · E compromiso vital
+"""
+
+@st.cache_resource
+def vigilar_reglas():
+    vigilar()  # recarga triage/reglas.json al cambiar, sin reiniciar (un hilo por proceso)
+
+vigilar_reglas()
+
+@st.fragment
+def referencias():
     st.header("📘 Referencias")
 
     # Control de ancho del panel de referencias
@@ -63,140 +136,24 @@ with st.sidebar:
     )
 
     with st.expander("Ver/ocultar leyendas y criterios", expanded=False):
-        st.markdown("""
-**Escalas**
-- **0–4**: 0 sin síntomas · 1 leve · 2 moderado · 3 severo · 4 potencialmente mortal  
-- **A–E**: A leve · B moderado · C severo · D muy severo · E compromiso vital
+        st.markdown(ESCALAS_MD + "\n" + leyenda())
 
-**Derivación (del flujograma)**
-- **Guardia URGENTE**: Sangrado **C–E**
-- **Guardia**: Náuseas **2–3** · Vómitos **B–E** · >7 comp. **loperamida** en 24 h · Dolor abd. **D** ·
-  Mucositis **D (3)** · Eritema/descamación **D–E** · Acné **3** · SMP **3** · Hipertensión **4**
-- **Interconsulta**: Neuropatía **≥2** · Ototoxicidad
-- **Aviso**: **ECOG 3–4** sin paliativos → considerar seguimiento por paliativos
-        """)
+with st.sidebar:
+    st.markdown("[🚨 Tablero de guardia](?vista=tablero)")
+    referencias()
 
 # ──────────────────────────────────────────────────────────────
-# Utilidades de selects estandarizados
+# Persistencia de resultados (un almacén por proceso)
 # ──────────────────────────────────────────────────────────────
-def op_0_4():
-    return ["0 — sin síntomas", "1 — leve", "2 — moderado", "3 — severo", "4 — potencialmente mortal"]
-def to_0_4(v: str) -> int:
-    return int(v.split("—")[0].strip())
-
-def op_0_3(lbl3="3 — severo"):
-    return ["0 — sin síntomas", "1 — leve (A)", "2 — moderado (B/C)", lbl3]
-def to_0_3(v: str) -> int:
-    return int(v.split("—")[0].strip())
-
-def op_A_E(include_zero=True):
-    base = ["A — leve", "B — moderado", "C — severo", "D — muy severo", "E — compromiso vital"]
-    return (["0 — sin síntomas"] + base) if include_zero else base
-def to_A_E(v: str) -> str:
-    return v.split("—")[0].strip()
+@st.cache_resource
+def get_almacen() -> Almacen:
+    return Almacen()
 
-# ──────────────────────────────────────────────────────────────
-# Motor de reglas (DOCX)
-# ──────────────────────────────────────────────────────────────
-PRIORIDAD = {"URGENTE": 3, "Guardia": 2, "Interconsulta": 1, "Continuar": 0}
-def decide_higher(current: str, candidate: str) -> str:
-    return candidate if PRIORIDAD[candidate] > PRIORIDAD[current] else current
-
-def evaluar(data: Dict) -> Dict:
-    rec = "Continuar"; msgs = []; det = {}
-
-    det["DNI"] = data["dni"] or "N/D"
-    det["Fecha"] = data["fecha"].isoformat()
-    det["Momento tto."] = data["momento"]
-
-    det["RT recibida"] = "Sí" if data["rt"] else "No"
-    if data["rt"]:
-        det["RT en curso"] = "Sí" if data["rt_en_curso"] else "No"
-        if data["rt_en_curso"]:
-            det["Semana RT (en curso)"] = data["rt_semana"]
-        else:
-            det["Tiempo desde fin RT"] = data["rt_fin"]
-
-    det["ECOG"] = data["ecog"]
-    det["Paliativos"] = data["paliativos"]
-    if data["ecog"] in (3,4) and data["paliativos"] == "No":
-        msgs.append("Aviso: ECOG 3–4 sin paliativos → considerar derivación/seguimiento por paliativos.")
-
-    # GI
-    if data["gi_on"]:
-        if data["diarrea"]:
-            det["GI - Diarrea"] = f"Grado {data['diarrea_g']}"
-            if not data["lop"]:
-                msgs.append("Loperamida: 2 comp. al inicio, luego 1 tras cada deposición (máx. 7/día).")
-            elif data["lop_mas7"]:
-                rec = decide_higher(rec, "Guardia")
-                msgs.append(">7 comprimidos de loperamida en 24 h → **Guardia**.")
-        if data["nauseas"]:
-            det["GI - Náuseas"] = f"Grado {data['nauseas_g']}"
-            if data["nauseas_g"] in (2,3):
-                rec = decide_higher(rec, "Guardia"); msgs.append("Náuseas grado 2–3 → **Guardia**.")
-            elif data["nauseas_g"] == 1:
-                if not data["nauseas_ant"]:
-                    msgs.append("Náuseas 1: indicar antiemético (p.ej., Relivera 30 gotas antes de comidas).")
-                else:
-                    msgs.append("Náuseas 1 con medicación: ajustar esquema con su médico.")
-        if data["vom_g"] != "0":
-            det["GI - Vómitos"] = f"Grado {data['vom_g']}"
-            if data["vom_g"] in ("B","C","D","E"):
-                rec = decide_higher(rec, "Guardia"); msgs.append(f"Vómitos {data['vom_g']} → **Guardia**.")
-            else:
-                msgs.append("Vómitos A: antiemético y control.")
-        if data["dolor_abd"] != "No":
-            det["GI - Dolor abdominal"] = f"Grado {data['dolor_abd']}"
-            if data["dolor_abd"] == "D":
-                rec = decide_higher(rec, "Guardia"); msgs.append("Dolor abdominal D → **Guardia**.")
-
-    # Derm
-    if data["derm_on"]:
-        if data["mucositis"]:
-            det["Derm - Mucositis"] = f"Grado {data['mucositis_g']}"
-            if data["mucositis_g"] == 3:
-                rec = decide_higher(rec, "Guardia"); msgs.append("Mucositis D (3) → **Guardia**.")
-        if data["eritema"]:
-            det["Derm - Eritema/descamación"] = f"Grado {data['eritema_g']}"
-            if data["eritema_g"] in ("D","E"):
-                rec = decide_higher(rec, "Guardia"); msgs.append("Eritema/descamación D–E → **Guardia**.")
-        if data["acne"]:
-            det["Derm - Acné"] = f"Grado {data['acne_g']}"
-            if data["acne_g"] == 3:
-                rec = decide_higher(rec, "Guardia"); msgs.append("Acné 3 → **Guardia**.")
-        if data["smp"]:
-            det["Derm - Síndrome mano-pie"] = f"Grado {data['smp_g']}"
-            if data["smp_g"] == 3:
-                rec = decide_higher(rec, "Guardia"); msgs.append("Síndrome mano-pie 3 → **Guardia**.")
-
-    # Neuro
-    if data["neuro_on"]:
-        if data["neuropatia"]:
-            det["Neuro - Neuropatía"] = f"Grado {data['neuropatia_g']}"
-            if data["neuropatia_g"] >= 2:
-                rec = decide_higher(rec, "Interconsulta"); msgs.append("Neuropatía ≥2 → **Interconsulta**.")
-        if data["ototox"]:
-            det["Neuro - Ototoxicidad"] = "Sospecha/Presente"
-            rec = decide_higher(rec, "Interconsulta"); msgs.append("Ototoxicidad → **Interconsulta**.")
-
-    # CV
-    if data["cv_on"]:
-        if data["sang_g"] != "No":
-            det["CV - Sangrado"] = f"Grado {data['sang_g']}"
-            if data["sang_g"] in ("C","D","E"):
-                rec = decide_higher(rec, "URGENTE"); msgs.append("Sangrado C–E → **GUARDIA URGENTE**.")
-            else:
-                rec = decide_higher(rec, "Guardia"); msgs.append("Sangrado A–B → **Guardia**.")
-        if data["hta"]:
-            det["CV - HTA"] = f"Grado {data['hta_g']}"
-            if data["hta_g"] >= 4:
-                rec = decide_higher(rec, "Guardia"); msgs.append("Hipertensión 4 → **Guardia**.")
-
-    if data["otros"]:
-        det["Otros"] = data["otros"]
-
-    return {"recomendacion": rec, "mensajes": msgs, "detalles": det}
+# Avisos URGENTE/Guardia a la guardia (TRIAGE_AVISOS; None = sin avisos): se encolan y un pool de
+# hilos los entrega con reintentos, así un receptor lento o caído no frena el rerun
+@st.cache_resource
+def get_avisos():
+    return avisos.abrir()
 
 # ──────────────────────────────────────────────────────────────
 # Helpers de navegación (con re-run seguro)
@@ -210,25 +167,61 @@ def safe_rerun():
         except Exception:
             pass
 
+def elegir_dni(dni: str):
+    st.session_state.registro.dni = dni
+
+def reiniciar():
+    get_sesiones().borrar(st.session_state.sesion)
+    st.session_state.clear()
+    del st.query_params["sesion"]  # el próximo run arranca un borrador nuevo
+    safe_rerun()
+
 def next_button(valid: bool):
     left, _ = st.columns([1, 3])
     if left.button("Siguiente", type="primary", use_container_width=True):
         if valid:
+            st.session_state.puntaje.completar(st.session_state.step, st.session_state.registro)
             st.session_state.step += 1
+            persistir()
             safe_rerun()
         else:
             st.warning("Completa los campos requeridos antes de continuar.")
 
-def finish_button(valid: bool, data: Dict):
+evaluar_medido = metricas.instrumentar(evaluar)  # identidad si TRIAGE_METRICAS no está activo
+
+def finalizar(data: Cuestionario):
+    st.session_state.result = evaluar_medido(data)
+    st.session_state.informe = informe(data, st.session_state.result)
+    get_almacen().guardar(st.session_state.informe)  # asíncrono: no espera al disco
+    if get_avisos() is not None:
+        st.session_state.aviso = get_avisos().enviar(st.session_state.informe)  # solo encola
+    st.session_state.step = 9
+    persistir(st.session_state.informe)
+    safe_rerun()
+
+def finish_button(valid: bool, data: Cuestionario):
     left, _ = st.columns([1, 3])
     if left.button("Finalizar y calcular", type="primary", use_container_width=True):
         if valid:
-            st.session_state.result = evaluar(data)
-            st.session_state.step += 1
-            safe_rerun()
+            finalizar(data)
         else:
             st.warning("Completa los campos requeridos antes de finalizar.")
 
+ICONOS = {"URGENTE": "🔴", "Guardia": "🟠", "Interconsulta": "🟡", "Continuar": "🟢"}
+
+def en_curso(data: Cuestionario):
+    """Recomendación parcial en vivo (pasos completos + el actual tal como está) y, si ya es una
+    derivación que ningún paso posterior puede cambiar, atajo directo al resultado."""
+    paso, pt = st.session_state.step, st.session_state.puntaje
+    rec = pt.recomendacion(paso, data)
+    st.caption(f"Recomendación en curso: {ICONOS[rec]} **{rec}**")
+    if paso < TOTAL_STEPS and PRIORIDAD[rec] >= PRIORIDAD["Guardia"] and pt.definitiva(paso, True, data):
+        (st.error if rec == "URGENTE" else st.warning)(
+            f"La recomendación ya es **{rec}** y los pasos restantes no pueden cambiarla.")
+        if st.button(f"⚡ Ir al resultado ({rec})", type="primary"):
+            st.session_state.atajo = paso
+            finalizar(data)  # evalúa el registro completo: los pasos omitidos quedan en sus valores por defecto
+
 # ──────────────────────────────────────────────────────────────
 # FORMULARIO (wizard vertical)
 # ──────────────────────────────────────────────────────────────
@@ -243,10 +236,13 @@ except Exception:
     st.progress(frac)
 
 # Paso 1 — Identificación y fecha (bug fix “Elegir otra”)
-if st.session_state.step == 1:
+@st.fragment
+@metricas.paso(1)
+def paso_1():
+    reg = st.session_state.registro
     st.subheader("1) Identificación y contexto")
     c1, c2 = st.columns(2)
-    st.session_state.dni = c1.text_input("DNI", value=st.session_state.get("dni", ""))
+    reg.dni = c1.text_input("DNI", value=reg.dni)
     # modo de fecha con estado persistente
     st.session_state.fecha_modo = c2.radio(
         "Fecha de evaluación",
@@ -257,65 +253,91 @@ if st.session_state.step == 1:
     )
     if st.session_state.fecha_modo == "Elegir otra":
         # aparece SIEMPRE el selector cuando se elige esta opción
-        st.session_state.fecha = st.date_input(
+        reg.fecha = st.date_input(
             "Selecciona fecha",
-            value=st.session_state.get("fecha", date.today()),
+            value=reg.fecha or date.today(),
             key="fecha_selector"
         )
     else:
-        st.session_state.fecha = date.today()
-        st.caption(f"Usando fecha de hoy: **{st.session_state.fecha.isoformat()}**")
+        reg.fecha = date.today()
+        st.caption(f"Usando fecha de hoy: **{reg.fecha.isoformat()}**")
+
+    # Historial del paciente (índice por DNI) + autocompletado por prefijo
+    dni_txt = reg.dni.strip()
+    if dni_txt:
+        previos = get_almacen().historial(dni_txt)
+        if previos:
+            with st.expander(f"🗂️ Triages previos de este DNI ({len(previos)})", expanded=True):
+                for h in previos:
+                    tox = f" · {h['toxicidad']}" if h["toxicidad"] else ""
+                    st.markdown(f"- **{h['fecha']}** · {h['recomendacion']} · ECOG {h['ecog']}{tox}")
+        else:
+            sugeridos = [s for s in get_almacen().sugerir_dni(dni_txt, 5) if s != dni_txt]
+            if sugeridos:
+                st.caption("DNIs registrados que coinciden:")
+                for col, s in zip(st.columns(len(sugeridos)), sugeridos):
+                    col.button(s, key=f"sug_{s}", on_click=elegir_dni, args=(s,))
 
-    valid = bool(st.session_state.dni.strip())
+    valid = bool(reg.dni.strip())
     next_button(valid)
 
 # Paso 2 — Momento y RT
-if st.session_state.step == 2:
+@st.fragment
+@metricas.paso(2)
+def paso_2():
+    reg = st.session_state.registro
     st.subheader("2) Momento y radioterapia")
-    st.session_state.momento = st.radio(
+    reg.momento = st.radio(
         "Momento del tratamiento",
         ["< 7 días", "> 7 días", "Semana de descanso"],
         horizontal=True
     )
-    st.session_state.rt = st.radio("¿Recibió radioterapia?", ["No", "Sí"], horizontal=True) == "Sí"
-    st.session_state.rt_en_curso = False
-    st.session_state.rt_semana = None
-    st.session_state.rt_fin = None
-    if st.session_state.rt:
-        st.session_state.rt_en_curso = st.radio(
+    reg.rt = st.radio("¿Recibió radioterapia?", ["No", "Sí"], horizontal=True) == "Sí"
+    reg.rt_en_curso = False
+    reg.rt_semana = None
+    reg.rt_fin = None
+    if reg.rt:
+        reg.rt_en_curso = st.radio(
             "¿Radioterapia en curso?", ["Sí", "No"], horizontal=True, index=1
         ) == "Sí"
-        if st.session_state.rt_en_curso:
-            st.session_state.rt_semana = st.selectbox(
+        if reg.rt_en_curso:
+            reg.rt_semana = st.selectbox(
                 "Semana de tratamiento (si está en curso)", ["< 7 días", "> 7 días", "> 14 días"]
             )
         else:
-            st.session_state.rt_fin = st.selectbox(
+            reg.rt_fin = st.selectbox(
                 "Tiempo desde fin de radioterapia", ["< 7 días", "> 7 días"]
             )
     valid = True
-    if st.session_state.rt and st.session_state.rt_en_curso and not st.session_state.rt_semana:
+    if reg.rt and reg.rt_en_curso and not reg.rt_semana:
         valid = False
-    if st.session_state.rt and (not st.session_state.rt_en_curso) and not st.session_state.rt_fin:
+    if reg.rt and (not reg.rt_en_curso) and not reg.rt_fin:
         valid = False
     next_button(valid)
 
 # Paso 3 — ECOG & Paliativos (selects)
-if st.session_state.step == 3:
+@st.fragment
+@metricas.paso(3)
+def paso_3():
+    reg = st.session_state.registro
     st.subheader("3) ECOG & Paliativos")
     c1, c2 = st.columns(2)
-    st.session_state.ecog = to_0_4(c1.selectbox("ECOG (0–4)", op_0_4(), index=0))
-    st.session_state.paliativos = c2.radio("¿En cuidados paliativos?", ["N/A", "Sí", "No"], horizontal=True)
+    reg.ecog = to_0_4(c1.selectbox("ECOG (0–4)", op_0_4(), index=0))
+    reg.paliativos = c2.radio("¿En cuidados paliativos?", ["N/A", "Sí", "No"], horizontal=True)
+    en_curso(reg)
     next_button(True)
 
 # Paso 4 — Gastrointestinales
-if st.session_state.step == 4:
+@st.fragment
+@metricas.paso(4)
+def paso_4():
+    reg = st.session_state.registro
     st.subheader("4) Síntomas por sistema — Gastrointestinales")
-    st.session_state.gi_on = st.checkbox("Registrar síntomas gastrointestinales", value=False)
+    reg.gi_on = st.checkbox("Registrar síntomas gastrointestinales", value=False)
     diarrea = False; diarrea_g = 0; lop = False; lop_mas7 = False
     nauseas = False; nauseas_g = 0; nauseas_ant = False
     vom_g = "0"; dolor_abd = "No"
-    if st.session_state.gi_on:
+    if reg.gi_on:
         g1, g2 = st.columns(2)
         diarrea = g1.radio("¿Diarrea?", ["No", "Sí"], horizontal=True) == "Sí"
         if diarrea:
@@ -337,26 +359,30 @@ if st.session_state.step == 4:
         vom_g = to_A_E(k1.selectbox("Vómitos (A–E; 0 = sin síntomas)", op_A_E(True), index=0))
         dolor_abd = k2.selectbox("Dolor abdominal", ["No", "A", "B", "C", "D"], index=0)
 
-    st.session_state.diarrea = diarrea
-    st.session_state.diarrea_g = diarrea_g
-    st.session_state.lop = lop
-    st.session_state.lop_mas7 = lop_mas7
-    st.session_state.nauseas = nauseas
-    st.session_state.nauseas_g = nauseas_g
-    st.session_state.nauseas_ant = nauseas_ant
-    st.session_state.vom_g = vom_g
-    st.session_state.dolor_abd = dolor_abd
+    reg.diarrea = diarrea
+    reg.diarrea_g = diarrea_g
+    reg.lop = lop
+    reg.lop_mas7 = lop_mas7
+    reg.nauseas = nauseas
+    reg.nauseas_g = nauseas_g
+    reg.nauseas_ant = nauseas_ant
+    reg.vom_g = vom_g
+    reg.dolor_abd = dolor_abd
+    en_curso(reg)
     next_button(True)
 
 # Paso 5 — Dermatológicos
-if st.session_state.step == 5:
+@st.fragment
+@metricas.paso(5)
+def paso_5():
+    reg = st.session_state.registro
     st.subheader("5) Síntomas por sistema — Dermatológicos")
-    st.session_state.derm_on = st.checkbox("Registrar síntomas dermatológicos", value=False)
+    reg.derm_on = st.checkbox("Registrar síntomas dermatológicos", value=False)
     mucositis = False; mucositis_g = 0
     eritema = False; eritema_g = "A"
     acne = False; acne_g = 0
     smp = False; smp_g = 0
-    if st.session_state.derm_on:
+    if reg.derm_on:
         d1, d2 = st.columns(2)
         mucositis = d1.radio("¿Mucositis?", ["No", "Sí"], horizontal=True) == "Sí"
         if mucositis:
@@ -376,81 +402,92 @@ if st.session_state.step == 5:
         smp = d7.radio("¿Síndrome mano-pie?", ["No", "Sí"], horizontal=True) == "Sí"
         if smp:
             smp_g = to_0_3(d8.selectbox("Grado SMP (0–3)", op_0_3("3 — severo"), index=0))
-    st.session_state.mucositis = mucositis
-    st.session_state.mucositis_g = mucositis_g
-    st.session_state.eritema = eritema
-    st.session_state.eritema_g = eritema_g
-    st.session_state.acne = acne
-    st.session_state.acne_g = acne_g
-    st.session_state.smp = smp
-    st.session_state.smp_g = smp_g
+    reg.mucositis = mucositis
+    reg.mucositis_g = mucositis_g
+    reg.eritema = eritema
+    reg.eritema_g = eritema_g
+    reg.acne = acne
+    reg.acne_g = acne_g
+    reg.smp = smp
+    reg.smp_g = smp_g
+    en_curso(reg)
     next_button(True)
 
 # Paso 6 — Neurológicos
-if st.session_state.step == 6:
+@st.fragment
+@metricas.paso(6)
+def paso_6():
+    reg = st.session_state.registro
     st.subheader("6) Síntomas por sistema — Neurológicos")
-    st.session_state.neuro_on = st.checkbox("Registrar síntomas neurológicos", value=False)
+    reg.neuro_on = st.checkbox("Registrar síntomas neurológicos", value=False)
     neuropatia = False; neuropatia_g = 0; ototox = False
-    if st.session_state.neuro_on:
+    if reg.neuro_on:
         n1, n2 = st.columns(2)
         neuropatia = n1.radio("¿Neuropatía?", ["No", "Sí"], horizontal=True) == "Sí"
         if neuropatia:
             neuropatia_g = to_0_3(n2.selectbox("Grado neuropatía (0–3)", op_0_3("3 — severo"), index=0))
         ototox = st.radio("¿Ototoxicidad (hipoacusia/tinnitus)?", ["No", "Sí"], horizontal=True) == "Sí"
-    st.session_state.neuropatia = neuropatia
-    st.session_state.neuropatia_g = neuropatia_g
-    st.session_state.ototox = ototox
+    reg.neuropatia = neuropatia
+    reg.neuropatia_g = neuropatia_g
+    reg.ototox = ototox
+    en_curso(reg)
     next_button(True)
 
 # Paso 7 — Cardiovasculares
-if st.session_state.step == 7:
+@st.fragment
+@metricas.paso(7)
+def paso_7():
+    reg = st.session_state.registro
     st.subheader("7) Síntomas por sistema — Cardiovasculares")
-    st.session_state.cv_on = st.checkbox("Registrar síntomas cardiovasculares", value=False)
+    reg.cv_on = st.checkbox("Registrar síntomas cardiovasculares", value=False)
     sang_g = "No"; hta = False; hta_g = 0
-    if st.session_state.cv_on:
+    if reg.cv_on:
         c1, c2 = st.columns(2)
         sang_g = to_A_E(c1.selectbox("Sangrado (A–E; 0 = sin síntomas)", op_A_E(True), index=0))
         hta = c2.radio("¿Hipertensión?", ["No", "Sí"], horizontal=True) == "Sí"
         if hta:
             hta_g = to_0_4(st.selectbox("Grado HTA (0–4)", op_0_4(), index=0))
-    st.session_state.sang_g = sang_g
-    st.session_state.hta = hta
-    st.session_state.hta_g = hta_g
+    reg.sang_g = sang_g
+    reg.hta = hta
+    reg.hta_g = hta_g
+    en_curso(reg)
     next_button(True)
 
 # Paso 8 — Otros + Finalizar
-if st.session_state.step == 8:
+@st.fragment
+@metricas.paso(8)
+def paso_8():
+    reg = st.session_state.registro
     st.subheader("8) Otros / cierre")
-    st.session_state.otros = st.text_area("Otros (campo libre)", height=80).strip()
-
-    data = dict(
-        dni=st.session_state.dni, fecha=st.session_state.fecha, momento=st.session_state.momento,
-        rt=st.session_state.rt, rt_en_curso=st.session_state.rt_en_curso,
-        rt_semana=st.session_state.rt_semana, rt_fin=st.session_state.rt_fin,
-        ecog=st.session_state.ecog, paliativos=st.session_state.paliativos,
-        gi_on=st.session_state.gi_on, diarrea=st.session_state.diarrea,
-        diarrea_g=st.session_state.diarrea_g, lop=st.session_state.lop,
-        lop_mas7=st.session_state.lop_mas7, nauseas=st.session_state.nauseas,
-        nauseas_g=st.session_state.nauseas_g, nauseas_ant=st.session_state.nauseas_ant,
-        vom_g=st.session_state.vom_g, dolor_abd=st.session_state.dolor_abd,
-        derm_on=st.session_state.derm_on, mucositis=st.session_state.mucositis,
-        mucositis_g=st.session_state.mucositis_g, eritema=st.session_state.eritema,
-        eritema_g=st.session_state.eritema_g, acne=st.session_state.acne,
-        acne_g=st.session_state.acne_g, smp=st.session_state.smp, smp_g=st.session_state.smp_g,
-        neuro_on=st.session_state.neuro_on, neuropatia=st.session_state.neuropatia,
-        neuropatia_g=st.session_state.neuropatia_g, ototox=st.session_state.ototox,
-        cv_on=st.session_state.cv_on, sang_g=st.session_state.sang_g,
-        hta=st.session_state.hta, hta_g=st.session_state.hta_g,
-        otros=st.session_state.otros,
-    )
-    finish_button(True, data)
+    reg.otros = st.text_area("Otros (campo libre)", height=80).strip()
+    en_curso(reg)
+    finish_button(True, reg)  # el registro va directo a evaluar, sin copiar a un dict
 
 # Paso 9 — Resultado
-if st.session_state.step == 9 and st.session_state.result:
+ESTADO_AVISO = {
+    "pendiente": "🔔 Aviso a la guardia en envío…",
+    "entregado": "🔔 Aviso a la guardia entregado.",
+    "fallido": "⚠️ No se pudo avisar a la guardia: comunicarlo por teléfono.",
+}
+
+@st.fragment(run_every=2)
+def estado_aviso():
+    """Aviso en envío: se consulta cada 2 s (leerlo no toca la red). Al llegar a un estado final
+    se re-ejecuta la app y el paso 9 lo muestra fijo: el sondeo no sigue en sesiones abiertas."""
+    if get_avisos().estado(st.session_state.aviso) != "pendiente":
+        st.rerun(scope="app")
+    st.caption(ESTADO_AVISO["pendiente"])
+
+@st.fragment
+@metricas.paso(9)
+def paso_9():
+    reg = st.session_state.registro
     res = st.session_state.result
     rec = res["recomendacion"]
 
     st.success(f"Recomendación final: **{rec}**")
+    if st.session_state.get("atajo"):
+        st.caption(f"Resultado anticipado en el paso {st.session_state.atajo}: los pasos siguientes no podían cambiarlo.")
     if rec == "URGENTE":
         st.error("Derivar a **GUARDIA URGENTE**. Activar protocolo de emergencia y documentar SV.")
     elif rec == "Guardia":
@@ -459,6 +496,12 @@ if st.session_state.step == 9 and st.session_state.result:
         st.info("Coordinar **interconsulta** (servicio correspondiente) a corto plazo.")
     else:
         st.success("**Continuar** seguimiento + educación de signos de alarma.")
+    if st.session_state.get("aviso") and get_avisos() is not None:
+        estado = get_avisos().estado(st.session_state.aviso)
+        if estado == "pendiente":
+            estado_aviso()
+        elif estado in ESTADO_AVISO:
+            st.caption(ESTADO_AVISO[estado])
 
     if res["mensajes"]:
         st.markdown("**Observaciones/acciones**")
@@ -469,19 +512,24 @@ if st.session_state.step == 9 and st.session_state.result:
     for k, v in res["detalles"].items():
         st.markdown(f"- **{k}:** {v}")
 
-    # Descarga JSON (usa bytes, no file-like)
-    payload = {
-        "datos": {"dni": st.session_state.dni, "fecha": st.session_state.fecha.isoformat(),
-                  "momento": st.session_state.momento},
-        "resultado": res,
-        "timestamp": datetime.now().isoformat(timespec="seconds"),
-    }
-    json_bytes = io.BytesIO(json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8"))
-    st.download_button(
-        "⬇️ Descargar informe (JSON)",
-        data=json_bytes.getvalue(),  # <- robusto entre versiones
-        file_name=f"triage_{st.session_state.dni or 'ND'}.json",
+    # Descarga JSON diferida: el informe (el mismo que quedó guardado) se serializa
+    # recién cuando se pide la descarga, no en cada rerun
+    payload = st.session_state.informe
+    def informe_json() -> bytes:
+        return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+    descarga = dict(
+        label="⬇️ Descargar informe (JSON)",
+        file_name=f"triage_{reg.dni or 'ND'}.json",
         mime="application/json"
     )
+    try:
+        st.download_button(data=informe_json, **descarga)
+    except StreamlitAPIException:  # Streamlit sin descarga diferida: "Invalid binary data format", se genera ahora
+        st.download_button(data=informe_json(), **descarga)
+
+    st.button("🔄 Reiniciar", on_click=reiniciar)
 
-    st.button("🔄 Reiniciar", on_click=lambda: (st.session_state.clear(), safe_rerun()))
+# Solo se ejecuta el paso actual; los widgets de un paso re-ejecutan únicamente su fragmento
+PASOS = {1: paso_1, 2: paso_2, 3: paso_3, 4: paso_4, 5: paso_5, 6: paso_6, 7: paso_7, 8: paso_8, 9: paso_9}
+if st.session_state.step < 9 or st.session_state.result:
+    PASOS[st.session_state.step]()
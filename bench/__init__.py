@@ -0,0 +1 @@
+# Benchmarks y verificaciones de rendimiento (ejecutar con `python -m bench.<nombre>`).
@@ -0,0 +1,63 @@
+# Throughput de escritura del almacén con concurrencia realista de enfermería.
+#   python -m bench.almacen [sesiones] [informes_por_sesion]
+# Mide la latencia de `guardar` (lo que ve el rerun de Streamlit) y el throughput
+# durable (hasta fsync + índice); al final simula una caída con una línea a medias.
+
+import os, statistics, sys, tempfile, threading, time
+
+from triage import evaluar
+from triage.almacen import LOG, Almacen
+from triage.informe import informe
+from bench.datos import cuestionarios
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+def main(sesiones: int = 32, por_sesion: int = 200) -> None:
+    regs = cuestionarios(sesiones * por_sesion, seed=4)
+    infs = [informe(d, evaluar(d)) for d in regs]
+    with tempfile.TemporaryDirectory() as tmp:
+        alm = Almacen(tmp)
+        lat, lock = [], threading.Lock()
+
+        def enfermera(i):
+            propias = []
+            for inf in infs[i::sesiones]:
+                t0 = time.perf_counter()
+                alm.guardar(inf)
+                propias.append(time.perf_counter() - t0)
+                time.sleep(0.001)  # tiempo de UI entre envíos
+            with lock:
+                lat.extend(propias)
+
+        t0 = time.perf_counter()
+        hilos = [threading.Thread(target=enfermera, args=(i,)) for i in range(sesiones)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        alm.esperar()
+        dt = time.perf_counter() - t0
+        n = len(list(alm.buscar()))
+        alm.cerrar()
+        assert n == len(infs), (n, len(infs))
+
+        print(f"{sesiones} sesiones × {por_sesion} informes = {n} registros")
+        print(f"guardar():  p50 {_pct(lat, 50) * 1e6:7.1f} µs   p99 {_pct(lat, 99) * 1e6:7.1f} µs"
+              f"   media {statistics.mean(lat) * 1e6:7.1f} µs")
+        print(f"durable:    {n / dt:,.0f} registros/s ({dt:.2f} s, incluye fsync por lote)")
+
+        # Caída a mitad de escritura: el registro incompleto se descarta y el resto sobrevive
+        with open(os.path.join(tmp, LOG), "ab") as f:
+            f.write(b'{"datos": {"dni": "999", "fec')
+        alm = Almacen(tmp)
+        assert len(list(alm.buscar())) == n
+        alm.guardar(infs[0]); alm.esperar()
+        assert len(list(alm.buscar(dni=infs[0]["datos"]["dni"]))) >= 2
+        alm.cerrar()
+        print("recuperación tras caída: OK")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,75 @@
+# Analítica sobre miles de triage_<DNI>.json: carga en frío, con caché y con pocos archivos nuevos.
+#   python -m bench.analitica [archivos]
+# Verifica además que los agregados vectorizados coincidan con un conteo directo en Python.
+
+import collections, json, os, sys, tempfile, time
+
+from triage import evaluar
+from triage.analitica import RECOMENDACIONES, cargar_almacen, cargar_archivos, resumen, semana
+from triage.almacen import Almacen
+from triage.informe import informe
+from triage.motor import reglas_disparadas
+from bench.datos import cuestionarios
+
+import numpy as np
+
+def _escribir(directorio: str, infs) -> None:
+    for i, inf in infs:
+        with open(os.path.join(directorio, f"triage_{inf['datos']['dni']}_{i}.json"), "w", encoding="utf-8") as f:
+            json.dump(inf, f, ensure_ascii=False)
+
+def _esperado(infs) -> dict:
+    """Los mismos agregados, informe por informe y sin NumPy."""
+    sem, reglas, ecog = collections.Counter(), collections.Counter(), collections.Counter()
+    for inf in infs:
+        d, res = inf["datos"], inf["resultado"]
+        lunes = str(semana(np.array([d["fecha"]], dtype="datetime64[D]"))[0])
+        sem[lunes, res["recomendacion"]] += 1
+        reglas.update(reglas_disparadas(res))
+        ecog[d["momento"], str(res["detalles"]["ECOG"])] += 1
+    return {"por_semana": {(f["semana"], r): f[r] for f in _res["por_semana"] for r in RECOMENDACIONES if f[r]} == dict(sem),
+            "reglas": {r: c for r, c in _res["reglas"].items() if c} == dict(reglas),
+            "ecog": {(m, e): c for m, fila in _res["ecog_por_momento"].items() for e, c in fila.items() if c} == dict(ecog)}
+
+def _medir(fn):
+    t0 = time.perf_counter()
+    cols, n = fn()
+    return time.perf_counter() - t0, cols, n
+
+def main(archivos: int = 20_000) -> None:
+    global _res
+    regs = cuestionarios(archivos + archivos // 100, seed=17)
+    infs = [informe(d, evaluar(d)) for d in regs]
+    base, extra = infs[:archivos], infs[archivos:]
+    with tempfile.TemporaryDirectory() as tmp:
+        _escribir(tmp, enumerate(base))
+        for nombre, fn in (("en frío (parsea todo)", lambda: cargar_archivos(tmp)),
+                           ("con caché, sin cambios", lambda: cargar_archivos(tmp))):
+            t, cols, n = _medir(fn)
+            print(f"{nombre:<28} {t * 1e3:8.1f} ms · {n:,} parseados")
+        _escribir(tmp, enumerate(extra, start=archivos))
+        t, cols, n = _medir(lambda: cargar_archivos(tmp))
+        print(f"{'con caché, +1% nuevos':<28} {t * 1e3:8.1f} ms · {n:,} parseados")
+        t0 = time.perf_counter()
+        _res = resumen(cols)
+        print(f"{'agregados vectorizados':<28} {(time.perf_counter() - t0) * 1e3:8.1f} ms")
+        print("coinciden con el conteo directo:", _esperado(infs))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        alm = Almacen(tmp, fsync=False)
+        for inf in base:
+            alm.guardar(inf)
+        alm.esperar()
+        t, cols, n = _medir(lambda: cargar_almacen(tmp))
+        print(f"{'almacén en frío':<28} {t * 1e3:8.1f} ms · {n:,} parseados")
+        for inf in extra:
+            alm.guardar(inf)
+        alm.esperar()
+        t, cols, n = _medir(lambda: cargar_almacen(tmp))
+        print(f"{'almacén, +1% nuevos':<28} {t * 1e3:8.1f} ms · {n:,} parseados")
+        _res = resumen(cols)
+        print("coinciden con el conteo directo:", _esperado(infs))
+        alm.cerrar()
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
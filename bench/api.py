@@ -0,0 +1,97 @@
+# Prueba de carga local de la API HTTP (`triage.api`).
+#   python -m bench.api [--conexiones 64] [--peticiones 200] [--lote 0] [--workers 2] [--tabla]
+# Levanta el servidor en un subproceso, abre N conexiones keep-alive y reporta p50/p99 y req/s.
+
+import argparse, asyncio, json, os, socket, statistics, subprocess, sys, time
+from pathlib import Path
+
+from bench.datos import cuestionarios
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+async def _post(reader, writer, ruta: str, cuerpo: bytes):
+    writer.write(f"POST {ruta} HTTP/1.1\r\nHost: local\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(cuerpo)}\r\n\r\n".encode() + cuerpo)
+    await writer.drain()
+    estado = int((await reader.readline()).split()[1])
+    largo = 0
+    while (h := await reader.readline()) != b"\r\n":
+        k, _, v = h.decode().partition(":")
+        if k.lower() == "content-length":
+            largo = int(v)
+    return estado, json.loads(await reader.readexactly(largo))
+
+async def _cliente(port, cuerpos, ruta, lat):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for c in cuerpos:
+        t0 = time.perf_counter()
+        estado, _ = await _post(reader, writer, ruta, c)
+        lat.append(time.perf_counter() - t0)
+        assert estado == 200, estado
+    writer.close()
+
+async def _esperar_servidor(port, proc, timeout=20.0):
+    fin = time.monotonic() + timeout
+    while time.monotonic() < fin:
+        if proc.poll() is not None:
+            raise RuntimeError("el servidor terminó al iniciar")
+        try:
+            _, w = await asyncio.open_connection("127.0.0.1", port)
+            w.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError("el servidor no respondió")
+
+async def correr(args) -> None:
+    port = _puerto_libre()
+    proc = subprocess.Popen([sys.executable, "-m", "triage.api", "--port", str(port),
+                             "--workers", str(args.workers), "--ventana-ms", str(args.ventana_ms)]
+                            + (["--tabla"] if args.tabla else []),
+                            cwd=RAIZ, stderr=subprocess.DEVNULL)
+    try:
+        await _esperar_servidor(port, proc)
+        regs = cuestionarios(args.conexiones * args.peticiones * max(1, args.lote), seed=5)
+        for d in regs:
+            d["fecha"] = d["fecha"].isoformat()
+        if args.lote:
+            ruta = "/evaluar/lote"
+            cuerpos = [json.dumps(regs[i:i + args.lote]).encode() for i in range(0, len(regs), args.lote)]
+        else:
+            ruta = "/evaluar"
+            cuerpos = [json.dumps(d).encode() for d in regs]
+        lat = []
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_cliente(port, cuerpos[i::args.conexiones], ruta, lat)
+                               for i in range(args.conexiones)))
+        dt = time.perf_counter() - t0
+        print(f"{ruta}: {len(lat)} peticiones, {args.conexiones} conexiones, {args.workers} workers")
+        print(f"  p50 {_pct(lat, 50) * 1e3:7.2f} ms   p99 {_pct(lat, 99) * 1e3:7.2f} ms"
+              f"   media {statistics.mean(lat) * 1e3:7.2f} ms")
+        print(f"  {len(lat) / dt:,.0f} req/s" + (f"   ({len(lat) * args.lote / dt:,.0f} cuestionarios/s)"
+                                                  if args.lote else ""))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--conexiones", type=int, default=64)
+    ap.add_argument("--peticiones", type=int, default=200, help="peticiones por conexión")
+    ap.add_argument("--lote", type=int, default=0, help="cuestionarios por petición a /evaluar/lote (0 = /evaluar)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--ventana-ms", type=float, default=2.0)
+    ap.add_argument("--tabla", action="store_true", help="el servidor evalúa con la tabla de decisión")
+    asyncio.run(correr(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
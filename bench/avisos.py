@@ -0,0 +1,89 @@
+# Despacho de avisos contra el receptor local de prueba: costo de `enviar` (lo único que paga el
+# rerun), entrega con un receptor lento e inestable, idempotencia y receptor caído.
+#   python -m bench.avisos [N]          (con TRIAGE_METRICAS=1 muestra además las métricas)
+
+import json, logging, os, socket, statistics, sys, tempfile, threading, time
+
+from triage import evaluar, metricas
+from triage.avisos import Buzon, Despachador, Webhook, receptor
+from triage.informe import informe
+from bench.datos import cuestionarios
+
+def _informes(n: int):
+    infs = [informe(d, evaluar(d)) for d in cuestionarios(n * 20, seed=19, todo_on=True)]
+    infs = [i for i in infs if i["resultado"]["recomendacion"] in ("URGENTE", "Guardia")][:n]
+    assert len(infs) == n
+    return infs
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _enviar(desp: Despachador, infs) -> tuple:
+    """(µs por `enviar` (media, máx.), {clave: instante de encolado})."""
+    costos, encolados = [], {}
+    for inf in infs:
+        t0 = time.monotonic()
+        k = desp.enviar(inf)
+        costos.append(time.monotonic() - t0)
+        encolados[k] = t0
+    return statistics.mean(costos) * 1e6, max(costos) * 1e6, encolados
+
+def main(n: int = 200) -> None:
+    logging.basicConfig(level=logging.ERROR)
+    infs = _informes(n)
+
+    # Receptores lentos (0.2 s por POST); el segundo además rechaza un 30 % con 503
+    lento, srv = receptor(port=0, demora=0.2), receptor(port=0, demora=0.2, fallar=0.3)
+    for s in (lento, srv):
+        threading.Thread(target=s.serve_forever, daemon=True).start()
+    t0 = time.perf_counter()
+    Webhook(f"http://127.0.0.1:{lento.server_address[1]}/avisos").entregar({"clave": "x", **infs[0]["datos"]})
+    print(f"entrega sincrónica (lo que esperaría el rerun): {(time.perf_counter() - t0) * 1e3:.0f} ms")
+    lento.shutdown()
+    destino = Webhook(f"http://127.0.0.1:{srv.server_address[1]}/avisos")
+
+    desp = Despachador(destino, hilos=8, intentos=15, espera=0.05)  # 0.3^15: perder uno es improbable
+    media, maximo, encolados = _enviar(desp, infs)
+    print(f"enviar: {media:.1f} µs de media, {maximo:.0f} µs máx. ({n} avisos)")
+    desp.enviar(infs[0])  # repetido en el mismo proceso: no se vuelve a encolar
+    assert desp.esperar(120), "quedaron avisos sin entregar"
+    assert set(srv.recibidos) == set(encolados), "faltan avisos en el receptor"
+    lat = sorted(srv.recibidos[k][0] - t for k, t in encolados.items())
+    print(f"entregados {len(srv.recibidos)}/{n} con 30 % de 503 · latencia p50 {lat[len(lat) // 2]:.2f} s, "
+          f"p95 {lat[int(len(lat) * 0.95)]:.2f} s, máx. {lat[-1]:.2f} s")
+
+    # Otro proceso (o un reinicio) reenvía los mismos informes: misma clave, el receptor no duplica
+    otro = Despachador(destino, hilos=8, intentos=15, espera=0.05)
+    _enviar(otro, infs[:20])
+    otro.esperar(60)
+    print(f"reenvío de 20 desde otro despachador: {len(srv.recibidos)} avisos distintos en el receptor "
+          f"({srv.intentos} POST aceptados)")
+    assert len(srv.recibidos) == n
+    srv.shutdown()
+
+    # Receptor caído: `enviar` sigue siendo inmediato y el aviso termina como fallido
+    logging.getLogger("triage.avisos").setLevel(logging.CRITICAL)  # los errores esperados
+    caido = Despachador(Webhook(f"http://127.0.0.1:{_puerto_libre()}/avisos", timeout=0.5), intentos=4, espera=0.05)
+    media, _, encolados = _enviar(caido, infs[:10])
+    caido.esperar(30)
+    print(f"receptor caído: enviar {media:.1f} µs · estados {sorted({caido.estado(k) for k in encolados})}")
+
+    # Buzón: un archivo por clave
+    with tempfile.TemporaryDirectory() as tmp:
+        buzon = Despachador(Buzon(tmp), hilos=2)
+        _, _, encolados = _enviar(buzon, infs)
+        buzon.esperar(30)
+        assert sorted(os.listdir(tmp)) == sorted(f"{k}.json" for k in encolados)
+        with open(os.path.join(tmp, next(iter(encolados)) + ".json"), encoding="utf-8") as f:
+            print(f"buzón: {len(os.listdir(tmp))} archivos · ejemplo {json.load(f)['recomendacion']}")
+
+    if metricas.ACTIVO:
+        print("\n" + "\n".join(l for l in metricas.REGISTRO.exportar().splitlines()
+                               if l.startswith(("triage_avisos_total", "triage_avisos_pendientes",
+                                                "triage_avisos_entrega_segundos_count",
+                                                "triage_avisos_entrega_segundos_sum"))))
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,41 @@
+# Paridad y throughput de `evaluar_batch` frente a `evaluar` fila a fila.
+#   python -m bench.batch [N]
+
+import sys, time
+
+from triage import REGLAS, evaluar
+from triage.motor import reglas_disparadas
+from triage.lotes import a_columnas, evaluar_batch
+from bench.datos import cuestionarios
+
+def verificar_paridad(regs) -> None:
+    res = evaluar_batch(a_columnas(regs))
+    for idx, d in enumerate(regs):
+        r = evaluar(d)
+        assert res["recomendacion"][idx] == r["recomendacion"], (idx, d)
+        disparadas = reglas_disparadas(r)
+        for regla in REGLAS:
+            assert bool(res["reglas"][regla][idx]) == (regla in disparadas), (idx, regla, d)
+        aviso = any(m.startswith("Aviso: ECOG") for m in r["mensajes"])
+        assert bool(res["aviso_paliativos"][idx]) == aviso, (idx, d)
+
+def main(n: int = 50_000) -> None:
+    regs = cuestionarios(n, seed=1) + cuestionarios(n // 10, seed=2, todo_on=True)
+    verificar_paridad(regs)
+    print(f"paridad OK en {len(regs)} filas")
+
+    t0 = time.perf_counter()
+    for d in regs:
+        evaluar(d)
+    t_loop = time.perf_counter() - t0
+
+    cols = a_columnas(regs)
+    t0 = time.perf_counter()
+    evaluar_batch(cols)
+    t_batch = time.perf_counter() - t0
+
+    print(f"evaluar (bucle):  {len(regs) / t_loop:>12,.0f} filas/s")
+    print(f"evaluar_batch:    {len(regs) / t_batch:>12,.0f} filas/s  (x{t_loop / t_batch:.1f})")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
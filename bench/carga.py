@@ -0,0 +1,311 @@
+# Prueba de carga: N enfermeras simultáneas recorren el wizard contra un `streamlit run` real.
+#   python -m bench.carga                                   # niveles 1 2 4 8 16 32
+#   python -m bench.carga --niveles 4 16 64 --pausa 1 --seed 3 --json carga.json
+#
+# Cada sesión es un cliente websocket (asyncio puro) que habla el protocolo de Streamlit (BackMsg /
+# ForwardMsg): responde cada paso con valores al azar, como un navegador, y mide cuánto tarda
+# el servidor en terminar cada rerun. `AppTest` no sirve acá: levanta un runtime global por
+# ejecución y no admite sesiones concurrentes en el mismo proceso.
+#
+# Por nivel se levanta un servidor nuevo y se reporta: latencia p50/p95/p99 de las transiciones
+# de paso (`next_button` → `safe_rerun`) y de las interacciones dentro de un paso, CPU y memoria
+# del servidor por sesión, y el punto de saturación (primer nivel que rompe el SLO de p95 o que ya
+# no sube el throughput). El cliente corre en la misma máquina y se lleva algo de CPU.
+
+import argparse, asyncio, base64, json, os, random, struct, subprocess, sys, tempfile, time
+import urllib.request
+from pathlib import Path
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.Radio_pb2 import Radio
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+RAIZ = Path(__file__).resolve().parent.parent
+TERMINADO = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY}
+PASOS = 8  # pasos del formulario; el 9 es el resultado
+# Radio/selectbox viajan como texto de la opción desde 1.4x; antes, como índice
+_OPCION_TEXTO = "raw_value" in Radio.DESCRIPTOR.fields_by_name
+_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# ──────────────────────────────────────────────────────────────
+# Websocket mínimo (RFC 6455, solo lo que usa Streamlit)
+# ──────────────────────────────────────────────────────────────
+class Websocket:
+    async def conectar(self, host: str, port: int, ruta: str, subprotocolo: str) -> None:
+        self.r, self.w = await asyncio.open_connection(host, port)
+        clave = base64.b64encode(os.urandom(16)).decode()
+        self.w.write((f"GET {ruta} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {clave}\r\nSec-WebSocket-Version: 13\r\n"
+                      f"Sec-WebSocket-Protocol: {subprotocolo}\r\n\r\n").encode())
+        cab = await self.r.readuntil(b"\r\n\r\n")
+        if not cab.startswith(b"HTTP/1.1 101"):
+            raise ConnectionError(cab.split(b"\r\n", 1)[0].decode(errors="replace"))
+
+    def _trama(self, opcode: int, datos: bytes) -> None:
+        n = len(datos)
+        cab = bytes([0x80 | opcode])
+        if n < 126:
+            cab += bytes([0x80 | n])
+        elif n < 1 << 16:
+            cab += bytes([0x80 | 126]) + struct.pack(">H", n)
+        else:
+            cab += bytes([0x80 | 127]) + struct.pack(">Q", n)
+        mascara = os.urandom(4)
+        rep = (mascara * (n // 4 + 1))[:n]
+        self.w.write(cab + mascara + (int.from_bytes(datos, "big") ^ int.from_bytes(rep, "big")).to_bytes(n, "big"))
+
+    async def enviar(self, datos: bytes) -> None:
+        self._trama(0x2, datos)
+        await self.w.drain()
+
+    async def recibir(self) -> bytes:
+        partes = []
+        while True:
+            b0, b1 = await self.r.readexactly(2)
+            n = b1 & 0x7F
+            if n == 126:
+                n, = struct.unpack(">H", await self.r.readexactly(2))
+            elif n == 127:
+                n, = struct.unpack(">Q", await self.r.readexactly(8))
+            datos = await self.r.readexactly(n)
+            opcode = b0 & 0x0F
+            if opcode == 0x9:  # ping
+                self._trama(0xA, datos)
+                continue
+            if opcode == 0x8:
+                raise ConnectionError("el servidor cerró el websocket")
+            if opcode in (0x0, 0x1, 0x2):
+                partes.append(datos)
+                if b0 & 0x80:
+                    return b"".join(partes)
+
+    async def cerrar(self) -> None:
+        try:
+            self._trama(0x8, struct.pack(">H", 1000))
+            await self.w.drain()
+        except ConnectionError:
+            pass
+        self.w.close()
+
+# ──────────────────────────────────────────────────────────────
+# Sesión de Streamlit vista desde el navegador
+# ──────────────────────────────────────────────────────────────
+class Sesion:
+    TIPOS = ("button", "radio", "selectbox", "checkbox", "text_input", "download_button")
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.ws = Websocket()
+        self.widgets = {}   # id → (tipo, proto, fragmento, en_sidebar)
+        self.valores = {}   # id → WidgetState elegido por el usuario
+        self.pagina = ""
+
+    async def abrir(self) -> float:
+        await self.ws.conectar(self.host, self.port, "/_stcore/stream", "streamlit")
+        return await self.rerun()
+
+    async def rerun(self, fragmento: str = "", disparar: str = None) -> float:
+        """Envía un rerun (como tras tocar un widget) y espera a que el servidor lo termine."""
+        msg = BackMsg()
+        cs = msg.rerun_script
+        cs.page_script_hash = self.pagina
+        cs.fragment_id = fragmento
+        for id, ws in self.valores.items():
+            if id in self.widgets:
+                cs.widget_states.widgets.append(ws)
+        if disparar:
+            t = cs.widget_states.widgets.add()
+            t.id, t.trigger_value = disparar, True
+        t0 = time.perf_counter()
+        await self.ws.enviar(msg.SerializeToString())
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(await self.ws.recibir())
+            tipo = fm.WhichOneof("type")
+            if tipo == "new_session":
+                self.pagina = fm.new_session.page_script_hash
+                frag = set(fm.new_session.fragment_ids_this_run)
+                if frag:
+                    self.widgets = {k: v for k, v in self.widgets.items() if v[2] not in frag}
+                else:
+                    self.widgets = {}
+            elif tipo == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                el = fm.delta.new_element
+                t = el.WhichOneof("type")
+                if t in self.TIPOS:
+                    p = getattr(el, t)
+                    self.widgets[p.id] = (t, p, fm.delta.fragment_id, fm.metadata.delta_path[0] == 1)
+            elif tipo == "script_finished" and fm.script_finished in TERMINADO:
+                return time.perf_counter() - t0
+
+    def visibles(self, tipo: str = None):
+        return [(id, w) for id, w in self.widgets.items() if not w[3] and (tipo is None or w[0] == tipo)]
+
+    def boton(self, etiqueta: str):
+        return next((id for id, w in self.visibles("button") if w[1].label == etiqueta), None)
+
+    async def elegir(self, id: str, rng: random.Random) -> float:
+        tipo, p, frag, _ = self.widgets[id]
+        ws = self.valores[id] = WidgetState()
+        ws.id = id
+        if tipo == "checkbox":
+            ws.bool_value = rng.random() < 0.5
+        elif tipo == "text_input":
+            ws.string_value = str(rng.randint(10_000_000, 45_000_000))
+        elif _OPCION_TEXTO:
+            ws.string_value = rng.choice(list(p.options))
+        else:
+            ws.int_value = rng.randrange(len(p.options))
+        return await self.rerun(frag)
+
+    async def cerrar(self) -> None:
+        await self.ws.cerrar()
+
+# ──────────────────────────────────────────────────────────────
+# Una enfermera: 8 pasos con respuestas al azar y "pausas para pensar"
+# ──────────────────────────────────────────────────────────────
+async def enfermera(host, port, rng, pausa: float, lat: dict, listo: asyncio.Event, fin: list) -> None:
+    pensar = lambda: asyncio.sleep(rng.expovariate(1 / pausa) if pausa else 0)
+    await asyncio.sleep(rng.random() * pausa)  # llegadas escalonadas
+    s = Sesion(host, port)
+    lat["carga"].append(await s.abrir())
+    for paso in range(1, PASOS + 1):
+        tocados = set()
+        while True:
+            pendientes = [id for id, w in s.visibles() if id not in tocados
+                          and w[0] in ("radio", "selectbox", "checkbox", "text_input")]
+            if not pendientes:
+                break
+            id = pendientes[0]
+            tocados.add(id)
+            if s.widgets[id][0] == "text_input" or rng.random() < 0.5:
+                await pensar()
+                lat["interaccion"].append(await s.elegir(id, rng))
+        await pensar()
+        boton = s.boton("Siguiente") or s.boton("Finalizar y calcular")
+        if boton is None:
+            raise RuntimeError(f"paso {paso}: no aparece el botón para avanzar")
+        lat[paso].append(await s.rerun(s.widgets[boton][2], disparar=boton))
+    if s.boton("🔄 Reiniciar") is None:
+        raise RuntimeError("no se llegó al resultado (Paso 9)")
+    fin.append(s)  # la sesión queda abierta hasta medir la memoria del nivel
+    if len(fin) == listo.total:
+        listo.set()
+    await listo.wait()
+    await s.cerrar()
+
+# ──────────────────────────────────────────────────────────────
+# Servidor y métricas del proceso (Linux /proc)
+# ──────────────────────────────────────────────────────────────
+def _cpu(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        campos = f.read().rsplit(")", 1)[1].split()
+    return (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+
+def _rss(pid: int) -> int:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * _PAGINA
+
+def levantar(port: int, datos: str) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "streamlit", "run", str(RAIZ / "app.py"), "--server.headless", "true",
+           "--server.port", str(port), "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"]
+    srv = subprocess.Popen(cmd, cwd=RAIZ, env=dict(os.environ, TRIAGE_DATOS=datos),
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            if urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).status == 200:
+                return srv
+        except OSError:
+            time.sleep(0.1)
+    srv.kill()
+    raise RuntimeError("streamlit no respondió en 30 s")
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))] if xs else float("nan")
+
+def _latencias() -> dict:
+    return {k: [] for k in ["carga", "interaccion", *range(1, PASOS + 1)]}
+
+class _Listo(asyncio.Event):
+    def __init__(self, total: int):
+        super().__init__()
+        self.total = total
+
+async def _nivel(port: int, n: int, pausa: float, seed: int, pid: int) -> dict:
+    # Calentamiento: la primera sesión paga imports y compilación del script
+    await enfermera("127.0.0.1", port, random.Random(-1), 0, _latencias(), _Listo(1), [])
+    lat, listo, fin = _latencias(), _Listo(n), []
+    rss0, cpu0, t0 = _rss(pid), _cpu(pid), time.perf_counter()
+    tareas = [enfermera("127.0.0.1", port, random.Random(seed * 10_000 + i), pausa, lat, listo, fin)
+              for i in range(n)]
+    espera = asyncio.ensure_future(listo.wait())
+    resultados = asyncio.gather(*tareas, return_exceptions=True)
+    await asyncio.wait([espera, resultados], return_when=asyncio.FIRST_COMPLETED)
+    rss1 = _rss(pid)  # todas las sesiones abiertas en el Paso 9 (o alguna falló)
+    errores = [repr(e) for e in await resultados if isinstance(e, Exception)]
+    dt, cpu = time.perf_counter() - t0, _cpu(pid) - cpu0
+    trans = [x for k in range(1, PASOS + 1) for x in lat[k]]
+    return {
+        "sesiones": n, "errores": errores, "segundos": dt,
+        "transiciones_s": len(trans) / dt,
+        "transicion_ms": {p: _pct(trans, p) * 1e3 for p in (50, 95, 99)},
+        "interaccion_ms": {p: _pct(lat["interaccion"], p) * 1e3 for p in (50, 95, 99)},
+        "por_paso_ms": {k: {p: _pct(lat[k], p) * 1e3 for p in (50, 95, 99)} for k in range(1, PASOS + 1)},
+        "cpu_ms_sesion": cpu / n * 1e3,
+        "mb_sesion": max(0, rss1 - rss0) / n / 2**20,
+    }
+
+def saturacion(niveles: list, slo_ms: float):
+    """Primer nivel que rompe el SLO de p95 o que sube el throughput menos de un 10 %."""
+    for ant, act in zip([None] + niveles, niveles):
+        if act["errores"]:
+            return act["sesiones"], f"{len(act['errores'])} sesiones con error"
+        if act["transicion_ms"][95] > slo_ms:
+            return act["sesiones"], f"p95 de transición {act['transicion_ms'][95]:.0f} ms > SLO {slo_ms:.0f} ms"
+        if ant and act["transiciones_s"] < ant["transiciones_s"] * 1.10:
+            return act["sesiones"], (f"throughput plano ({ant['transiciones_s']:.1f} → "
+                                     f"{act['transiciones_s']:.1f} transiciones/s)")
+    return None, "sin saturar en los niveles probados"
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.carga", description="Prueba de carga del wizard.")
+    ap.add_argument("--niveles", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="sesiones simultáneas")
+    ap.add_argument("--pausa", type=float, default=0.5, help="tiempo medio para pensar entre clicks (s)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--slo-ms", type=float, default=500, help="p95 aceptable de una transición de paso")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--json", help="guardar los resultados completos")
+    args = ap.parse_args(argv)
+
+    print(f"{os.cpu_count()} CPU · pausa media {args.pausa} s · seed {args.seed} · SLO p95 {args.slo_ms:.0f} ms")
+    print(f"{'sesiones':>8} {'trans/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'interac p95':>12}"
+          f" {'CPU/sesión':>11} {'RAM/sesión':>11}")
+    niveles = []
+    for n in args.niveles:
+        with tempfile.TemporaryDirectory() as datos:
+            srv = levantar(args.port, datos)
+            try:
+                r = asyncio.run(_nivel(args.port, n, args.pausa, args.seed, srv.pid))
+            finally:
+                srv.terminate()
+                srv.wait(10)
+        niveles.append(r)
+        t = r["transicion_ms"]
+        print(f"{n:>8} {r['transiciones_s']:>8.1f} {t[50]:>6.0f}ms {t[95]:>6.0f}ms {t[99]:>6.0f}ms"
+              f" {r['interaccion_ms'][95]:>10.0f}ms {r['cpu_ms_sesion']:>9.0f}ms {r['mb_sesion']:>9.2f}MB"
+              + (f"  ⚠ {len(r['errores'])} errores" if r["errores"] else ""))
+
+    ultimo = niveles[-1]
+    print(f"\nPor paso con {ultimo['sesiones']} sesiones (ms):  " + "  ".join(
+        f"{k}: {v[50]:.0f}/{v[95]:.0f}" for k, v in ultimo["por_paso_ms"].items()) + "   (p50/p95)")
+    n_sat, motivo = saturacion(niveles, args.slo_ms)
+    print(f"Saturación: {'~%d sesiones' % n_sat if n_sat else '—'} ({motivo})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "niveles": niveles, "saturacion": n_sat}, f, indent=2)
+    return 1 if any(r["errores"] for r in niveles) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# Generador de cuestionarios sintéticos con la misma forma que arma el wizard (Paso 8).
+
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+GRADOS_AE = ["A", "B", "C", "D", "E"]
+
+def _grado(rng: random.Random, maximo: int) -> int:
+    # Distribución sesgada a grados bajos, como en la consulta diaria
+    return min(maximo, int(rng.expovariate(1.2)))
+
+def cuestionario(rng: random.Random, todo_on: bool = False) -> Dict:
+    """Un cuestionario aleatorio; `todo_on` fuerza todos los bloques por sistema (peor caso)."""
+    rt = rng.random() < 0.3
+    rt_en_curso = rt and rng.random() < 0.5
+    d = dict(
+        dni=str(rng.randint(10_000_000, 45_000_000)),
+        fecha=date(2024, 1, 1) + timedelta(days=rng.randrange(365)),
+        momento=rng.choice(["< 7 días", "> 7 días", "Semana de descanso"]),
+        rt=rt, rt_en_curso=rt_en_curso,
+        rt_semana=rng.choice(["< 7 días", "> 7 días", "> 14 días"]) if rt_en_curso else None,
+        rt_fin=rng.choice(["< 7 días", "> 7 días"]) if rt and not rt_en_curso else None,
+        ecog=_grado(rng, 4), paliativos=rng.choice(["N/A", "Sí", "No"]),
+        gi_on=todo_on or rng.random() < 0.4,
+        diarrea=False, diarrea_g=0, lop=False, lop_mas7=False,
+        nauseas=False, nauseas_g=0, nauseas_ant=False, vom_g="0", dolor_abd="No",
+        derm_on=todo_on or rng.random() < 0.3,
+        mucositis=False, mucositis_g=0, eritema=False, eritema_g="A",
+        acne=False, acne_g=0, smp=False, smp_g=0,
+        neuro_on=todo_on or rng.random() < 0.25,
+        neuropatia=False, neuropatia_g=0, ototox=False,
+        cv_on=todo_on or rng.random() < 0.2,
+        sang_g="No", hta=False, hta_g=0,
+        otros=rng.choice(["", "", "", "Refiere cansancio.", "Control en 48 h."]),
+    )
+    si = lambda p: todo_on or rng.random() < p
+    if d["gi_on"]:
+        d["diarrea"] = si(0.4)
+        if d["diarrea"]:
+            d["diarrea_g"] = _grado(rng, 4)
+            d["lop"] = rng.random() < 0.5
+            d["lop_mas7"] = d["lop"] and rng.random() < 0.1
+        d["nauseas"] = si(0.4)
+        if d["nauseas"]:
+            d["nauseas_g"] = _grado(rng, 3)
+            d["nauseas_ant"] = rng.random() < 0.5
+        d["vom_g"] = rng.choice(["0"] * 4 + GRADOS_AE)
+        d["dolor_abd"] = rng.choice(["No"] * 4 + GRADOS_AE[:4])
+    if d["derm_on"]:
+        d["mucositis"] = si(0.3)
+        if d["mucositis"]:
+            d["mucositis_g"] = _grado(rng, 3)
+        d["eritema"] = si(0.3)
+        if d["eritema"]:
+            d["eritema_g"] = rng.choice(GRADOS_AE)
+        d["acne"] = si(0.2)
+        if d["acne"]:
+            d["acne_g"] = _grado(rng, 3)
+        d["smp"] = si(0.2)
+        if d["smp"]:
+            d["smp_g"] = _grado(rng, 3)
+    if d["neuro_on"]:
+        d["neuropatia"] = si(0.5)
+        if d["neuropatia"]:
+            d["neuropatia_g"] = _grado(rng, 3)
+        d["ototox"] = si(0.1)
+    if d["cv_on"]:
+        d["sang_g"] = rng.choice(["0"] * 4 + GRADOS_AE)
+        d["hta"] = si(0.4)
+        if d["hta"]:
+            d["hta_g"] = _grado(rng, 4)
+    return d
+
+def cuestionarios(n: int, seed: int = 0, todo_on: bool = False) -> List[Dict]:
+    rng = random.Random(seed)
+    return [cuestionario(rng, todo_on) for _ in range(n)]
@@ -0,0 +1,50 @@
+# Latencia del historial por DNI y del autocompletado con millones de evaluaciones indexadas.
+#   python -m bench.historial [filas]
+# Carga el índice directamente (sin log) con filas sintéticas y mide consultas en frío/caliente.
+
+import os, random, sqlite3, sys, tempfile, time
+
+from triage.almacen import INDICE, Almacen, _INSERTAR
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+def poblar(directorio: str, n: int, pacientes: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    dnis = [str(rng.randint(10_000_000, 45_000_000)) for _ in range(pacientes)]
+    recs = ["Continuar"] * 6 + ["Interconsulta"] * 2 + ["Guardia", "URGENTE"]
+    con = sqlite3.connect(os.path.join(directorio, INDICE))
+    with con:
+        con.executemany(_INSERTAR, (
+            (rng.choice(dnis), f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", rng.choice(recs),
+             "2024-01-01T00:00:00", rng.randint(0, 4), "Diarrea 1 · Náuseas 2", 0, 1)
+            for _ in range(n)))
+    con.close()
+    return dnis
+
+def main(n: int = 2_000_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        Almacen(tmp).cerrar()  # crea el esquema
+        t0 = time.perf_counter()
+        dnis = poblar(tmp, n, pacientes=n // 8)
+        print(f"índice con {n:,} evaluaciones en {time.perf_counter() - t0:.1f} s")
+
+        alm = Almacen(tmp)
+        rng = random.Random(1)
+        for nombre, fn, args in (
+            ("historial(dni)", alm.historial, lambda: (rng.choice(dnis),)),
+            ("sugerir_dni(4 díg.)", alm.sugerir_dni, lambda: (rng.choice(dnis)[:4],)),
+            ("sugerir_dni(6 díg.)", alm.sugerir_dni, lambda: (rng.choice(dnis)[:6],)),
+        ):
+            lat = []
+            for _ in range(2000):
+                a = args()
+                t0 = time.perf_counter()
+                fn(*a)
+                lat.append(time.perf_counter() - t0)
+            print(f"{nombre:<22} p50 {_pct(lat, 50) * 1e3:6.3f} ms   p99 {_pct(lat, 99) * 1e3:6.3f} ms")
+        alm.cerrar()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
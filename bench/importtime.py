@@ -0,0 +1,31 @@
+# Tiempo de importación del motor `triage` (proceso limpio, `python -X importtime`).
+#   python -m bench.importtime [módulo ...]
+
+import subprocess, sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+def medir(modulo: str):
+    """Devuelve (ms acumulados del import, módulos de nivel superior cargados por él)."""
+    code = f"import sys; import {modulo}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    # Formato: "import time: self [us] | cumulative | imported package"
+    us = 0
+    for linea in proc.stderr.splitlines():
+        partes = [p.strip() for p in linea.removeprefix("import time:").split("|")]
+        if len(partes) == 3 and partes[2] == modulo:
+            us = int(partes[1])
+    return us / 1000, set(proc.stdout.split())
+
+def main(modulos) -> None:
+    for modulo in modulos:
+        ms, cargados = medir(modulo)
+        print(f"{modulo:<16} {ms:8.2f} ms")
+        assert "streamlit" not in cargados, f"{modulo} importa streamlit"
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or ["triage", "triage.lotes"])
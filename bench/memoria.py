@@ -0,0 +1,45 @@
+# Memoria por sesión: ~40 claves sueltas en session_state (antes) vs. un Cuestionario.
+#   python -m bench.memoria [sesiones]
+# Usa el SessionState real de Streamlit y tracemalloc; los valores vienen de cuestionarios
+# sintéticos con la misma forma que arma el wizard.
+
+import gc, sys, tracemalloc
+
+from streamlit.runtime.state.session_state import SessionState
+
+from triage import Cuestionario
+from bench.datos import cuestionarios
+
+def _sesion_antes(d):
+    ss = SessionState()
+    for k, v in d.items():
+        ss[k] = v
+    return ss  # el dict del Paso 8 era una variable local del script: no vivía en la sesión
+
+def _sesion_despues(d):
+    ss = SessionState()
+    ss["registro"] = Cuestionario.de_dict(d)
+    return ss
+
+def medir(fabrica, regs) -> float:
+    gc.collect()
+    tracemalloc.start()
+    t0 = tracemalloc.take_snapshot()
+    sesiones = [fabrica(d) for d in regs]
+    t1 = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(s.size_diff for s in t1.compare_to(t0, "filename"))
+    del sesiones
+    return total / len(regs)
+
+def main(n: int = 2000) -> None:
+    # Strings de texto libre copiadas como en una sesión real (no compartidas entre sesiones)
+    regs = [dict(d, dni="".join(d["dni"]), otros="".join(d["otros"])) for d in cuestionarios(n, seed=11)]
+    antes = medir(_sesion_antes, regs)
+    despues = medir(_sesion_despues, regs)
+    print(f"{n} sesiones")
+    print(f"antes   (40 claves sueltas):  {antes:8.0f} B/sesión")
+    print(f"después (un Cuestionario):    {despues:8.0f} B/sesión   ({despues / antes - 1:+.0%})")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,38 @@
+# Sobrecarga de la instrumentación (`triage.metricas`) desactivada y activada.
+#   python -m bench.metricas
+# Cada modo corre en un intérprete limpio porque TRIAGE_METRICAS se lee al importar.
+
+import os, subprocess, sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+_MEDIR = """
+import time
+from triage import evaluar, metricas
+from bench.datos import cuestionarios
+regs = cuestionarios(20000, seed=10)
+medido = metricas.instrumentar(evaluar)
+paso = metricas.paso(4)(lambda: None)
+def t(f, xs):
+    mejor = float("inf")
+    for _ in range(7):
+        t0 = time.perf_counter()
+        for d in xs:
+            f(d)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor / len(xs) * 1e9
+base, inst = t(evaluar, regs), t(medido, regs)
+print(f"{metricas.ACTIVO!s:<6} evaluar {base:7.0f} ns   instrumentado {inst:7.0f} ns   "
+      f"(+{inst - base:5.0f} ns, misma función: {medido is evaluar})")
+"""
+
+def main() -> None:
+    print("activo  (ns por llamada, mejor de 7)")
+    for valor in ("0", "1"):
+        env = dict(os.environ, TRIAGE_METRICAS=valor)
+        env.pop("TRIAGE_METRICAS_ARCHIVO", None)
+        subprocess.run([sys.executable, "-c", _MEDIR], cwd=RAIZ, env=env, check=True)
+
+if __name__ == "__main__":
+    main()
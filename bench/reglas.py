@@ -0,0 +1,186 @@
+# Reglas compiladas desde triage/reglas.json frente al `evaluar` escrito a mano (versión previa al
+# archivo de reglas), a la compilación sin código fuente de `motor` (resúmenes como llamadas) y a
+# un intérprete directo de las condiciones; incluye una recarga en caliente.
+#   python -m bench.reglas [N]
+
+import json, os, shutil, sys, tempfile, time
+
+from triage import evaluar, motor
+from triage import reglas as _reglas
+from triage.motor import DETALLES, decide_higher, reglas_vigentes
+from bench.datos import cuestionarios
+from bench.suite import peor_caso
+
+def evaluar_a_mano(data) -> dict:
+    """`evaluar` tal como estaba antes de triage/reglas.json (referencia de paridad y velocidad)."""
+    rec = "Continuar"; msgs = []; det = {}
+
+    det["DNI"] = data["dni"] or "N/D"
+    det["Fecha"] = data["fecha"].isoformat()
+    det["Momento tto."] = data["momento"]
+
+    det["RT recibida"] = "Sí" if data["rt"] else "No"
+    if data["rt"]:
+        det["RT en curso"] = "Sí" if data["rt_en_curso"] else "No"
+        if data["rt_en_curso"]:
+            det["Semana RT (en curso)"] = data["rt_semana"]
+        else:
+            det["Tiempo desde fin RT"] = data["rt_fin"]
+
+    det["ECOG"] = data["ecog"]
+    det["Paliativos"] = data["paliativos"]
+    if data["ecog"] in (3,4) and data["paliativos"] == "No":
+        msgs.append("Aviso: ECOG 3–4 sin paliativos → considerar derivación/seguimiento por paliativos.")
+
+    if data["gi_on"]:
+        if data["diarrea"]:
+            det["GI - Diarrea"] = f"Grado {data['diarrea_g']}"
+            if not data["lop"]:
+                msgs.append("Loperamida: 2 comp. al inicio, luego 1 tras cada deposición (máx. 7/día).")
+            elif data["lop_mas7"]:
+                rec = decide_higher(rec, "Guardia")
+                msgs.append(">7 comprimidos de loperamida en 24 h → **Guardia**.")
+        if data["nauseas"]:
+            det["GI - Náuseas"] = f"Grado {data['nauseas_g']}"
+            if data["nauseas_g"] in (2,3):
+                rec = decide_higher(rec, "Guardia"); msgs.append("Náuseas grado 2–3 → **Guardia**.")
+            elif data["nauseas_g"] == 1:
+                if not data["nauseas_ant"]:
+                    msgs.append("Náuseas 1: indicar antiemético (p.ej., Relivera 30 gotas antes de comidas).")
+                else:
+                    msgs.append("Náuseas 1 con medicación: ajustar esquema con su médico.")
+        if data["vom_g"] != "0":
+            det["GI - Vómitos"] = f"Grado {data['vom_g']}"
+            if data["vom_g"] in ("B","C","D","E"):
+                rec = decide_higher(rec, "Guardia"); msgs.append(f"Vómitos {data['vom_g']} → **Guardia**.")
+            else:
+                msgs.append("Vómitos A: antiemético y control.")
+        if data["dolor_abd"] != "No":
+            det["GI - Dolor abdominal"] = f"Grado {data['dolor_abd']}"
+            if data["dolor_abd"] == "D":
+                rec = decide_higher(rec, "Guardia"); msgs.append("Dolor abdominal D → **Guardia**.")
+
+    if data["derm_on"]:
+        if data["mucositis"]:
+            det["Derm - Mucositis"] = f"Grado {data['mucositis_g']}"
+            if data["mucositis_g"] == 3:
+                rec = decide_higher(rec, "Guardia"); msgs.append("Mucositis D (3) → **Guardia**.")
+        if data["eritema"]:
+            det["Derm - Eritema/descamación"] = f"Grado {data['eritema_g']}"
+            if data["eritema_g"] in ("D","E"):
+                rec = decide_higher(rec, "Guardia"); msgs.append("Eritema/descamación D–E → **Guardia**.")
+        if data["acne"]:
+            det["Derm - Acné"] = f"Grado {data['acne_g']}"
+            if data["acne_g"] == 3:
+                rec = decide_higher(rec, "Guardia"); msgs.append("Acné 3 → **Guardia**.")
+        if data["smp"]:
+            det["Derm - Síndrome mano-pie"] = f"Grado {data['smp_g']}"
+            if data["smp_g"] == 3:
+                rec = decide_higher(rec, "Guardia"); msgs.append("Síndrome mano-pie 3 → **Guardia**.")
+
+    if data["neuro_on"]:
+        if data["neuropatia"]:
+            det["Neuro - Neuropatía"] = f"Grado {data['neuropatia_g']}"
+            if data["neuropatia_g"] >= 2:
+                rec = decide_higher(rec, "Interconsulta"); msgs.append("Neuropatía ≥2 → **Interconsulta**.")
+        if data["ototox"]:
+            det["Neuro - Ototoxicidad"] = "Sospecha/Presente"
+            rec = decide_higher(rec, "Interconsulta"); msgs.append("Ototoxicidad → **Interconsulta**.")
+
+    if data["cv_on"]:
+        if data["sang_g"] != "No":
+            det["CV - Sangrado"] = f"Grado {data['sang_g']}"
+            if data["sang_g"] in ("C","D","E"):
+                rec = decide_higher(rec, "URGENTE"); msgs.append("Sangrado C–E → **GUARDIA URGENTE**.")
+            else:
+                rec = decide_higher(rec, "Guardia"); msgs.append("Sangrado A–B → **Guardia**.")
+        if data["hta"]:
+            det["CV - HTA"] = f"Grado {data['hta_g']}"
+            if data["hta_g"] >= 4:
+                rec = decide_higher(rec, "Guardia"); msgs.append("Hipertensión 4 → **Guardia**.")
+
+    if data["otros"]:
+        det["Otros"] = data["otros"]
+
+    return {"recomendacion": rec, "mensajes": msgs, "detalles": det}
+
+def interprete():
+    """Alternativa sin generar código: `eval` de cada condición sobre el registro, regla por regla."""
+    por_paso = {p: [(compile(r.si, r.id, "eval"), r) for r in reglas_vigentes() if r.paso == p] for p in DETALLES}
+    def evaluar_interpretado(data) -> dict:
+        rec, msgs, det = "Continuar", [], {}
+        for paso, detalle in DETALLES.items():
+            detalle(data, det)
+            for cond, r in por_paso[paso]:
+                if eval(cond, None, data):
+                    rec = decide_higher(rec, r.recomendacion)
+                    msgs.append(r.mensaje.format(**data))
+        return {"recomendacion": rec, "mensajes": msgs, "detalles": det}
+    return evaluar_interpretado
+
+def sin_fuente():
+    """Las reglas vigentes compiladas como si faltara el código fuente de `motor`."""
+    v = motor.vigentes()
+    return _reglas.compilar(v.version, v.reglas, DETALLES, motor.PRIORIDAD, vars(motor), en_linea=False)[0]
+
+def _sin_version(res: dict) -> dict:
+    return {k: v for k, v in res.items() if k != "version_reglas"}
+
+def _medir(fn, regs, rondas: int = 5) -> float:
+    """µs por llamada (mejor ronda)."""
+    mejor = float("inf")
+    for _ in range(rondas):
+        t0 = time.perf_counter()
+        for d in regs:
+            fn(d)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor / len(regs) * 1e6
+
+def recarga_en_caliente() -> None:
+    original = motor.RUTA_REGLAS
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = shutil.copy(original, os.path.join(tmp, "reglas.json"))
+        t0 = time.perf_counter()
+        motor.cargar_reglas(ruta)
+        print(f"lectura + compilación + instalación: {(time.perf_counter() - t0) * 1e3:.1f} ms")
+        d = peor_caso()
+        antes = evaluar(d)["recomendacion"]
+        with open(ruta, encoding="utf-8") as f:
+            doc = json.load(f)
+        doc["version"] += "-prueba"
+        for r in doc["reglas"]:
+            if r["id"] == "sangrado_C_E":
+                r["si"] = "cv_on and sang_g in ('D', 'E')"
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False)
+        d["sang_g"] = "C"
+        t0 = time.perf_counter()
+        recargo = motor.revisar()
+        res = evaluar(d)  # el mismo objeto importado al inicio
+        print(f"recarga al cambiar el archivo: {recargo} en {(time.perf_counter() - t0) * 1e3:.1f} ms · "
+              f"{antes} → {res['recomendacion']} (sangrado C, reglas {res['version_reglas']})")
+        assert recargo and res["recomendacion"] == "Guardia" and res["version_reglas"] == doc["version"]
+        motor.cargar_reglas(original)
+
+def main(n: int = 20_000) -> None:
+    interpretado, llamadas = interprete(), sin_fuente()
+    realistas = cuestionarios(n, seed=1)
+    todo = cuestionarios(n // 4, seed=2, todo_on=True) + [peor_caso()] * (n // 4)
+    for d in realistas + todo:
+        esperado = evaluar_a_mano(d)
+        assert _sin_version(evaluar(d)) == esperado, d
+        assert _sin_version(llamadas(d)) == esperado, d
+        assert interpretado(d) == esperado, d
+    print(f"paridad OK en {len(realistas) + len(todo)} cuestionarios (reglas {motor.version_reglas()})")
+
+    print(f"{'µs/llamada':<14}{'a mano':>10}{'compiladas':>12}{'sin fuente':>12}{'interpretadas':>15}")
+    for nombre, regs in (("realista", realistas), ("todo activo", todo)):
+        tiempos = [float("inf")] * 4
+        for _ in range(5):  # intercaladas: el ruido de la máquina afecta a todas por igual
+            for i, fn in enumerate((evaluar_a_mano, evaluar, llamadas, interpretado)):
+                tiempos[i] = min(tiempos[i], _medir(fn, regs, rondas=2))
+        print(f"{nombre:<14}{tiempos[0]:>10.2f}{tiempos[1]:>12.2f}{tiempos[2]:>12.2f}{tiempos[3]:>15.2f}")
+    recarga_en_caliente()
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,91 @@
+# Costo por interacción en el wizard: rerun completo (antes) vs. fragmento del paso (después).
+#   python -m bench.rerun [repeticiones] [--base <commit>]
+# Conduce la app con `AppTest` hasta el Paso 4 y repite clicks en sus widgets. AppTest siempre
+# re-ejecuta el script entero, así que el costo "solo fragmento" se mide cronometrando el
+# cuerpo de cada `@st.fragment` (lo único que Streamlit re-ejecuta al tocar un widget del paso).
+
+import argparse, os, statistics, subprocess, tempfile, time
+from pathlib import Path
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+RAIZ = Path(__file__).resolve().parent.parent
+_fragmentos = []  # (nombre, wall, cpu) de cada ejecución de un fragmento
+_fragment_real = st.fragment
+
+def _fragment_cronometrado(fn=None, **kw):
+    def envolver(f):
+        def cuerpo(*a, **k):
+            t0, c0 = time.perf_counter(), time.process_time()
+            try:
+                return f(*a, **k)
+            finally:
+                _fragmentos.append((f.__name__, time.perf_counter() - t0, time.process_time() - c0))
+        cuerpo.__name__ = cuerpo.__qualname__ = f.__qualname__
+        return _fragment_real(cuerpo, **kw)
+    return envolver(fn) if fn is not None else envolver
+
+def _boton(at, label):
+    return next(b for b in at.button if b.label == label)
+
+def _interacciones(at):
+    """Paso 4 con todos los widgets: cada elemento es una interacción (un rerun)."""
+    rad = lambda label: next(r for r in at.radio if r.label == label)
+    sel = lambda label: next(s for s in at.selectbox if s.label == label)
+    yield lambda: next(c for c in at.checkbox if c.label.startswith("Registrar")).check()
+    yield lambda: rad("¿Diarrea?").set_value("Sí")
+    yield lambda: sel("Grado de diarrea (0–4)").set_value("2 — moderado")
+    yield lambda: rad("¿Usó loperamida?").set_value("Sí")
+    yield lambda: rad("¿Náuseas?").set_value("Sí")
+    yield lambda: sel("Grado de náuseas (0–3)").set_value("1 — leve (A)")
+    yield lambda: sel("Vómitos (A–E; 0 = sin síntomas)").set_value("B — moderado")
+    yield lambda: sel("Dolor abdominal").set_value("C")
+    yield lambda: rad("¿Diarrea?").set_value("No")
+
+def medir(script: str, repeticiones: int):
+    wall, cpu, frag = [], [], []
+    for _ in range(repeticiones):
+        at = AppTest.from_file(script, default_timeout=60).run()
+        at.text_input[0].input("30111222").run()
+        for _ in range(3):
+            _boton(at, "Siguiente").click().run()
+        for accion in _interacciones(at):
+            accion()
+            _fragmentos.clear()
+            t0, c0 = time.perf_counter(), time.process_time()
+            at.run()
+            wall.append(time.perf_counter() - t0)
+            cpu.append(time.process_time() - c0)
+            assert not at.exception, at.exception
+            pasos = [(w, c) for nombre, w, c in _fragmentos if nombre.startswith("paso_")]
+            frag.append(pasos[0] if pasos else None)
+    return wall, cpu, frag
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("repeticiones", nargs="?", type=int, default=5)
+    ap.add_argument("--base", default="", help="commit con la app anterior (rerun completo) para comparar")
+    args = ap.parse_args()
+    os.environ.setdefault("TRIAGE_DATOS", tempfile.mkdtemp())
+    st.fragment = _fragment_cronometrado
+
+    ms = lambda xs: statistics.median(xs) * 1e3
+    if args.base:
+        fuente = subprocess.run(["git", "show", f"{args.base}:app.py"], cwd=RAIZ,
+                                capture_output=True, check=True).stdout
+        with tempfile.NamedTemporaryFile("wb", suffix=".py", dir=RAIZ, delete=False) as f:
+            f.write(fuente)
+        try:
+            w, c, _ = medir(f.name, args.repeticiones)
+        finally:
+            os.unlink(f.name)
+        print(f"antes   ({args.base[:8]}, rerun completo):  {ms(w):6.2f} ms wall   {ms(c):6.2f} ms CPU")
+
+    w, c, frag = medir(str(RAIZ / "app.py"), args.repeticiones)
+    print(f"actual  (rerun completo):            {ms(w):6.2f} ms wall   {ms(c):6.2f} ms CPU")
+    fw = [f[0] for f in frag if f]; fc = [f[1] for f in frag if f]
+    print(f"después (solo fragmento del paso):   {ms(fw):6.2f} ms wall   {ms(fc):6.2f} ms CPU")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Escalado del estado de sesión externo con 1, 2 y 4 workers (procesos) sobre el mismo backend.
+#   python -m bench.sesiones [--sesiones 2000] [--workers 1 2 4] [--backend sqlite archivos]
+# Cada sesión recorre el wizard como app.py: un `guardar` con el diff de cada paso, a mitad de
+# camino se retoma desde el store (`cargar` + restaurar, como un worker distinto tras un
+# reinicio) y al final se evalúa y se guarda el informe.
+
+import argparse, json, multiprocessing as mp, os, tempfile, time, uuid
+
+from triage import evaluar, sesiones
+from triage.informe import informe
+from triage.registro import Cuestionario
+from bench.datos import cuestionarios
+
+# Campos que fija cada paso del wizard (1–8)
+PASOS = (
+    ("dni", "fecha"),
+    ("momento", "rt", "rt_en_curso", "rt_semana", "rt_fin"),
+    ("ecog", "paliativos"),
+    ("gi_on", "diarrea", "diarrea_g", "lop", "lop_mas7", "nauseas", "nauseas_g", "nauseas_ant", "vom_g", "dolor_abd"),
+    ("derm_on", "mucositis", "mucositis_g", "eritema", "eritema_g", "acne", "acne_g", "smp", "smp_g"),
+    ("neuro_on", "neuropatia", "neuropatia_g", "ototox"),
+    ("cv_on", "sang_g", "hta", "hta_g"),
+    ("otros",),
+)
+DEFECTOS_JSON = Cuestionario().a_json()
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+def recorrer(store, d: dict, lat: list, bytes_: list) -> None:
+    sid, reg, guardado = uuid.uuid4().hex, Cuestionario(), DEFECTOS_JSON
+    for paso, campos in enumerate(PASOS, start=1):
+        for c in campos:
+            setattr(reg, c, d[c])
+        if paso == 4:  # retomado por otro worker
+            guardada = store.cargar(sid)
+            guardado = {**DEFECTOS_JSON, **guardada["datos"]}
+            reg = Cuestionario.de_json(guardado)
+            for c in campos:
+                setattr(reg, c, d[c])
+        actual = reg.a_json()
+        cambios = sesiones.diff(guardado, actual, DEFECTOS_JSON)
+        inf = None
+        if paso == len(PASOS):
+            inf = informe(reg, evaluar(reg))
+        t0 = time.perf_counter()
+        store.guardar(sid, paso + 1, cambios, inf)
+        lat.append(time.perf_counter() - t0)
+        bytes_.append((len(json.dumps(cambios)), len(json.dumps(actual))))
+        guardado = actual
+
+def _worker(url, datos, barrera, cola):
+    store = sesiones.abrir(url)
+    lat, bytes_ = [], []
+    barrera.wait()
+    for d in datos:
+        recorrer(store, d, lat, bytes_)
+    cola.put((lat, bytes_))
+
+def medir(url: str, datos: list, workers: int):
+    barrera, cola = mp.Barrier(workers + 1), mp.Queue()
+    procs = [mp.Process(target=_worker, args=(url, datos[i::workers], barrera, cola)) for i in range(workers)]
+    for p in procs:
+        p.start()
+    barrera.wait()
+    t0 = time.perf_counter()
+    res = [cola.get() for _ in procs]
+    dt = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+    lat = [x for l, _ in res for x in l]
+    bytes_ = [x for _, b in res for x in b]
+    return len(datos) / dt, lat, bytes_
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m bench.sesiones")
+    ap.add_argument("--sesiones", type=int, default=2000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--backend", nargs="+", default=["sqlite", "archivos"], choices=list(sesiones.BACKENDS))
+    args = ap.parse_args(argv)
+    datos = cuestionarios(args.sesiones, seed=13)
+    print(f"{args.sesiones} sesiones × {len(PASOS)} pasos · {os.cpu_count()} CPU")
+    for backend in args.backend:
+        base = None
+        for w in args.workers:
+            with tempfile.TemporaryDirectory() as tmp:
+                url = f"{backend}:" + os.path.join(tmp, "sesiones.sqlite" if backend == "sqlite" else "sesiones")
+                tput, lat, bytes_ = medir(url, datos, w)
+            base = base or tput
+            diff_b = sum(b for b, _ in bytes_) / len(bytes_)
+            full_b = sum(b for _, b in bytes_) / len(bytes_)
+            print(f"{backend:8} {w} workers: {tput:8,.0f} sesiones/s ({tput * len(PASOS):9,.0f} pasos/s, ×{tput / base:.2f})"
+                  f"   guardar p50 {_pct(lat, 50) * 1e6:6.0f} µs  p99 {_pct(lat, 99) * 1e6:6.0f} µs"
+                  f"   diff {diff_b:4.0f} B/paso vs {full_b:4.0f} B completo")
+
+if __name__ == "__main__":
+    main()
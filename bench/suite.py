@@ -0,0 +1,132 @@
+# Suite de benchmarks con línea base y umbral de regresión.
+#   python -m bench.suite                      # mide, guarda bench/resultados.json y compara con la base
+#   python -m bench.suite --guardar-base       # mide y reemplaza bench/base.json
+#   python -m bench.suite --umbral 0.25 --solo evaluar_realista,informe_json
+# Sale con código 1 si algún caso es más lento que la base por encima del umbral.
+
+import argparse, json, os, platform, statistics, subprocess, sys, tempfile, time
+from datetime import date, datetime
+from pathlib import Path
+
+from triage import evaluar
+from triage.informe import informe
+from bench.datos import cuestionarios
+
+RAIZ = Path(__file__).resolve().parent.parent
+BASE = RAIZ / "bench" / "base.json"
+RESULTADOS = RAIZ / "bench" / "resultados.json"
+
+def peor_caso() -> dict:
+    """Todos los bloques activos y todas las reglas disparadas (máximo de mensajes y detalles)."""
+    return dict(
+        dni="30111222", fecha=date(2024, 6, 1), momento="< 7 días",
+        rt=True, rt_en_curso=True, rt_semana="> 14 días", rt_fin=None,
+        ecog=4, paliativos="No",
+        gi_on=True, diarrea=True, diarrea_g=4, lop=True, lop_mas7=True,
+        nauseas=True, nauseas_g=3, nauseas_ant=True, vom_g="E", dolor_abd="D",
+        derm_on=True, mucositis=True, mucositis_g=3, eritema=True, eritema_g="E",
+        acne=True, acne_g=3, smp=True, smp_g=3,
+        neuro_on=True, neuropatia=True, neuropatia_g=3, ototox=True,
+        cv_on=True, sang_g="E", hta=True, hta_g=4,
+        otros="Refiere cansancio marcado y mareos.",
+    )
+
+# ──────────────────────────────────────────────────────────────
+# Casos: cada uno devuelve (función sin argumentos, operaciones por llamada)
+# ──────────────────────────────────────────────────────────────
+def caso_evaluar_realista():
+    regs = cuestionarios(5000, seed=8)
+    def f():
+        for d in regs:
+            evaluar(d)
+    return f, len(regs)
+
+def caso_evaluar_peor_caso():
+    regs = [peor_caso()] * 5000
+    def f():
+        for d in regs:
+            evaluar(d)
+    return f, len(regs)
+
+def caso_informe_json():
+    infs = [informe(d, evaluar(d), "2024-06-01T10:00:00") for d in cuestionarios(500, seed=9, todo_on=True)]
+    def f():
+        for inf in infs:
+            json.dumps(inf, ensure_ascii=False, indent=2).encode("utf-8")
+    return f, len(infs)
+
+def caso_wizard_apptest():
+    from streamlit.testing.v1 import AppTest
+    os.environ.setdefault("TRIAGE_DATOS", tempfile.mkdtemp())
+    def f():
+        at = AppTest.from_file(str(RAIZ / "app.py"), default_timeout=60).run()
+        at.text_input[0].input("30111222").run()
+        for _ in range(7):
+            next(b for b in at.button if b.label == "Siguiente").click().run()
+        next(b for b in at.button if b.label == "Finalizar y calcular").click().run()
+        assert at.session_state.step == 9 and not at.exception, at.exception
+    return f, 1
+
+CASOS = {
+    "evaluar_realista": (caso_evaluar_realista, 15),
+    "evaluar_peor_caso": (caso_evaluar_peor_caso, 15),
+    "informe_json": (caso_informe_json, 15),
+    "wizard_apptest": (caso_wizard_apptest, 5),
+}
+
+def medir(nombre: str) -> dict:
+    preparar, repeticiones = CASOS[nombre]
+    f, ops = preparar()
+    f()  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        f()
+        tiempos.append((time.perf_counter() - t0) / ops)
+    return {"mediana_us": statistics.median(tiempos) * 1e6, "min_us": min(tiempos) * 1e6,
+            "repeticiones": repeticiones, "ops": ops}
+
+def _commit() -> str:
+    r = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True)
+    return r.stdout.strip()
+
+def comparar(actual: dict, base: dict, umbral: float) -> bool:
+    ok = True
+    print(f"{'caso':<20} {'base µs':>12} {'actual µs':>12} {'cambio':>9}")
+    for nombre, r in actual["casos"].items():
+        b = base.get("casos", {}).get(nombre)
+        if b is None:
+            print(f"{nombre:<20} {'—':>12} {r['mediana_us']:>12.2f}   (sin base)")
+            continue
+        cambio = r["mediana_us"] / b["mediana_us"] - 1
+        marca = "  REGRESIÓN" if cambio > umbral else ""
+        ok &= cambio <= umbral
+        print(f"{nombre:<20} {b['mediana_us']:>12.2f} {r['mediana_us']:>12.2f} {cambio:>+8.1%}{marca}")
+    return ok
+
+def main() -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.suite")
+    ap.add_argument("--guardar-base", action="store_true", help="guarda los resultados como nueva base")
+    ap.add_argument("--umbral", type=float, default=0.20, help="regresión tolerada (0.20 = +20%%)")
+    ap.add_argument("--solo", default="", help="casos separados por coma")
+    ap.add_argument("--salida", default=str(RESULTADOS))
+    args = ap.parse_args()
+
+    nombres = [n for n in args.solo.split(",") if n] or list(CASOS)
+    actual = {
+        "fecha": datetime.now().isoformat(timespec="seconds"), "commit": _commit(),
+        "python": platform.python_version(), "plataforma": platform.platform(),
+        "casos": {n: medir(n) for n in nombres},
+    }
+    destino = BASE if args.guardar_base else Path(args.salida)
+    destino.write_text(json.dumps(actual, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    if args.guardar_base or not BASE.exists():
+        for n, r in actual["casos"].items():
+            print(f"{n:<20} {r['mediana_us']:>12.2f} µs/op")
+        print(f"resultados en {destino}")
+        return 0
+    ok = comparar(actual, json.loads(BASE.read_text(encoding="utf-8")), args.umbral)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
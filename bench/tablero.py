@@ -0,0 +1,53 @@
+# Tablero de guardia con miles de casos abiertos: costo de cada refresco y de cada alta/baja.
+#   python -m bench.tablero [casos]
+# Compara el refresco (sincronizar sin novedades + primeros 100) contra reordenar todo.
+
+import random, sys, tempfile, time
+
+from triage import evaluar
+from triage.almacen import Almacen
+from triage.informe import informe
+from triage.tablero import ColaIndexada, Tablero, clave_caso
+from bench.datos import cuestionarios
+
+def _us(fn, n=200):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+def main(casos: int = 20_000) -> None:
+    regs = cuestionarios(casos, seed=14)
+    with tempfile.TemporaryDirectory() as tmp:
+        alm = Almacen(tmp, fsync=False)
+        for d in regs:
+            alm.guardar(informe(d, evaluar(d)))
+        alm.esperar()
+        t0 = time.perf_counter()
+        tab = Tablero(alm)
+        print(f"{len(tab.cola):,} casos pendientes · carga inicial {time.perf_counter() - t0:.2f} s")
+
+        refresco = _us(lambda: (tab.sincronizar(), tab.foto(100)))
+        ordenar = _us(lambda: sorted(tab.casos.values(), key=clave_caso)[:100], 20)
+        print(f"refresco (sincronizar + foto 100):  {refresco:8.0f} µs")
+        print(f"reordenar todo + primeros 100:      {ordenar:8.0f} µs  (×{ordenar / refresco:.0f})")
+
+        # Altas y bajas directas sobre la cola (sin el almacén)
+        cola, rng = ColaIndexada(), random.Random(0)
+        for id, caso in tab.casos.items():
+            cola.poner(id, clave_caso(caso))
+        ids = list(tab.casos)
+        alta = _us(lambda: cola.poner(rng.randrange(10**9), (-rng.randrange(4), "2099", 0)), 10_000)
+        baja = _us(lambda: cola.quitar(ids.pop()), min(10_000, len(ids)))
+        print(f"ColaIndexada: alta {alta:.1f} µs · baja {baja:.1f} µs")
+
+        # Alta real: guardar → sincronizar (lo que tarda un caso nuevo en aparecer)
+        t0 = time.perf_counter()
+        alm.guardar(informe(regs[0], evaluar(regs[0])))
+        alm.esperar()
+        tab.sincronizar()
+        print(f"guardar + indexar + sincronizar un caso nuevo: {(time.perf_counter() - t0) * 1e3:.2f} ms")
+        alm.cerrar()
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
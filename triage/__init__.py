@@ -0,0 +1,19 @@
+# Motor de triage sin UI: reglas del flujograma y escalas de los selects.
+# `evaluar_batch` (NumPy) vive en `triage.lotes` y no se importa aquí para que el
+# paquete cargue en milisegundos y nunca arrastre `streamlit`; por lo mismo, las reglas
+# se compilan en el primer `evaluar` (o al pedir `REGLAS`), no al importar.
+
+from triage.escalas import op_0_3, op_0_4, op_A_E, to_0_3, to_0_4, to_A_E
+from triage.motor import PRIORIDAD, decide_higher, evaluar
+from triage.registro import Cuestionario
+
+__all__ = [
+    "Cuestionario", "PRIORIDAD", "REGLAS", "decide_higher", "evaluar",
+    "op_0_3", "op_0_4", "op_A_E", "to_0_3", "to_0_4", "to_A_E",
+]
+
+def __getattr__(nombre: str):
+    if nombre == "REGLAS":  # las de las reglas vigentes al momento de pedirlas
+        from triage import motor
+        return motor.REGLAS
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
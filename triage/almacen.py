@@ -0,0 +1,280 @@
+# Almacén local de resultados: log JSONL append-only + índice SQLite (DNI, fecha, recomendación).
+# El índice incluye ECOG y un resumen de toxicidades para servir el historial por DNI
+# desde un índice cubriente, sin tocar el log.
+# Las escrituras se encolan y un hilo de fondo las agrupa en lotes (un fsync por lote), así
+# "Finalizar y calcular" nunca espera al disco. El log es la fuente de verdad: al abrir se
+# descarta una última línea incompleta (caída a mitad de escritura) y se reindexa lo que falte.
+
+import atexit, contextlib, json, logging, os, queue, sqlite3, threading
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+log = logging.getLogger("triage.almacen")
+
+LOG = "resultados.jsonl"
+INDICE = "indice.sqlite"
+_VERSION = 2  # cambiar el esquema ⇒ subir la versión; el índice se reconstruye desde el log
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    id INTEGER PRIMARY KEY,
+    dni TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    recomendacion TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    ecog INTEGER,
+    toxicidad TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    largo INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_resultados_historial
+    ON resultados (dni, fecha, id, recomendacion, ecog, toxicidad);
+CREATE INDEX IF NOT EXISTS ix_resultados_fecha ON resultados (fecha);
+CREATE INDEX IF NOT EXISTS ix_resultados_rec ON resultados (recomendacion, fecha);
+"""
+_INSERTAR = ("INSERT INTO resultados (dni, fecha, recomendacion, timestamp, ecog, toxicidad, offset, largo) "
+             "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+_SISTEMAS = ("GI - ", "Derm - ", "Neuro - ", "CV - ")
+
+def directorio_datos() -> str:
+    return os.environ.get("TRIAGE_DATOS", "datos")
+
+def resumen_toxicidad(detalles: Dict) -> str:
+    """"GI - Diarrea: Grado 2" + "CV - Sangrado: Grado C" → "Diarrea 2 · Sangrado C"."""
+    partes = []
+    for k, v in detalles.items():
+        if k.startswith(_SISTEMAS):
+            partes.append(f"{k.split(' - ', 1)[1]} {str(v).removeprefix('Grado ')}")
+    return " · ".join(partes)
+
+def _fila_indice(inf: Dict, offset: int, largo: int) -> tuple:
+    d, res = inf["datos"], inf["resultado"]
+    return (d["dni"], d["fecha"], res["recomendacion"], inf["timestamp"],
+            res["detalles"].get("ECOG"), resumen_toxicidad(res["detalles"]), offset, largo)
+
+class _Bloqueo:
+    """flock exclusivo sobre el log mientras se escribe/reindexa (varios procesos, mismo directorio)."""
+    def __init__(self, f):
+        self.f = f
+    def __enter__(self):
+        if fcntl:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+
+class Almacen:
+    def __init__(self, directorio: str = None, max_lote: int = 512, fsync: bool = True):
+        self.dir = directorio or directorio_datos()
+        os.makedirs(self.dir, exist_ok=True)
+        self.max_lote = max_lote
+        self.fsync = fsync
+        self._log = open(os.path.join(self.dir, LOG), "ab+")
+        self._db = sqlite3.connect(os.path.join(self.dir, INDICE), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")  # lectores concurrentes sin bloquear al escritor
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != _VERSION:
+            self._db.executescript(f"DROP TABLE IF EXISTS resultados; PRAGMA user_version = {_VERSION};")
+        self._db.executescript(_ESQUEMA)
+        self._db_lock = threading.Lock()
+        self._lectores: List[sqlite3.Connection] = []  # conexiones de solo lectura libres
+        self._lectores_lock = threading.Lock()
+        self._oyentes = []
+        with _Bloqueo(self._log):
+            self._recuperar()
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._escritor, name="triage-almacen", daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    # ── Recuperación ───────────────────────────────────────────
+    def _recuperar(self) -> None:
+        """Trunca una línea final incompleta e indexa los registros del log que falten en SQLite.
+        Una línea completa que no es un informe se omite (queda en el log, sin indexar)."""
+        fin_indexado = self._db.execute("SELECT COALESCE(MAX(offset + largo), 0) FROM resultados").fetchone()[0]
+        self._log.seek(0, os.SEEK_END)
+        tam = self._log.tell()
+        if tam == fin_indexado:
+            return
+        self._log.seek(fin_indexado)
+        offset, filas = fin_indexado, []
+        for linea in self._log:
+            if not linea.endswith(b"\n"):
+                break  # solo la última línea puede no tener \n: escritura cortada a la mitad
+            try:
+                filas.append(_fila_indice(json.loads(linea), offset, len(linea)))
+            except (ValueError, KeyError, TypeError) as e:
+                log.warning("registro ilegible en el byte %d del log, omitido (%s)", offset, e)
+            offset += len(linea)
+        if offset < tam:
+            log.warning("log truncado en %d bytes (registro incompleto descartado)", offset)
+            self._log.truncate(offset)
+        with self._db_lock, self._db:
+            self._db.executemany(_INSERTAR, filas)
+        self._log.seek(0, os.SEEK_END)
+
+    # ── Escritura en segundo plano ─────────────────────────────
+    def guardar(self, inf: Dict) -> None:
+        """Encola un informe (ver `triage.informe`); retorna de inmediato."""
+        self._cola.put(inf)
+
+    def esperar(self) -> None:
+        """Bloquea hasta que todo lo encolado esté en disco e indexado."""
+        self._cola.join()
+
+    def al_guardar(self, fn) -> None:
+        """Registra `fn(ids, informes)`, llamada tras indexar cada lote."""
+        self._oyentes.append(fn)
+
+    def _escritor(self) -> None:
+        while True:
+            lote = [self._cola.get()]
+            while len(lote) < self.max_lote:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            cerrar = None in lote
+            infs = [x for x in lote if x is not None]
+            try:
+                if infs:
+                    self._escribir_lote(infs)
+            except Exception:
+                log.exception("no se pudo guardar un lote de %d resultados", len(infs))
+            finally:
+                for _ in lote:
+                    self._cola.task_done()
+            if cerrar:
+                return
+
+    def _escribir_lote(self, infs: List[Dict]) -> None:
+        lineas = [json.dumps(inf, ensure_ascii=False).encode("utf-8") + b"\n" for inf in infs]
+        with _Bloqueo(self._log):
+            self._recuperar()  # otro proceso pudo haber escrito desde el último lote
+            offset = self._log.seek(0, os.SEEK_END)
+            self._log.write(b"".join(lineas))
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            filas = []
+            for inf, linea in zip(infs, lineas):
+                filas.append(_fila_indice(inf, offset, len(linea)))
+                offset += len(linea)
+            with self._db_lock, self._db:
+                ids = [self._db.execute(_INSERTAR, f).lastrowid for f in filas]
+        for fn in self._oyentes:
+            try:
+                fn(ids, infs)
+            except Exception:
+                log.exception("oyente del almacén falló")
+
+    def cerrar(self) -> None:
+        if self._hilo.is_alive():
+            self._cola.put(None)
+            self._hilo.join()
+        atexit.unregister(self.cerrar)
+
+    # ── Lectura ────────────────────────────────────────────────
+    @contextlib.contextmanager
+    def _lector(self) -> Iterator[sqlite3.Connection]:
+        """Conexión de solo lectura prestada del pool del proceso. Streamlit corre cada rerun en un
+        hilo nuevo: una conexión por hilo se abriría en casi cada rerun. El pool crece hasta la
+        cantidad de lecturas simultáneas (un `buscar` a medio recorrer retiene la suya)."""
+        with self._lectores_lock:
+            con = self._lectores.pop() if self._lectores else None
+        if con is None:
+            uri = "file:" + os.path.abspath(os.path.join(self.dir, INDICE)) + "?mode=ro"
+            con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            yield con
+        finally:
+            with self._lectores_lock:
+                self._lectores.append(con)
+
+    def leer(self, id: int) -> Optional[Dict]:
+        with self._lector() as con:
+            fila = con.execute("SELECT offset, largo FROM resultados WHERE id = ?", (id,)).fetchone()
+        if fila is None:
+            return None
+        with open(os.path.join(self.dir, LOG), "rb") as f:
+            f.seek(fila[0])
+            return json.loads(f.read(fila[1]))
+
+    def buscar(self, dni: str = None, desde: str = None, hasta: str = None,
+               recomendacion: str = None, limite: int = None, por_fecha: bool = False,
+               tam_lote: int = 1000) -> Iterator[Dict]:
+        """Informes que cumplen los filtros (fechas ISO inclusivas), en orden de guardado o por fecha.
+
+        Recorre el cursor de a `tam_lote` filas: la memoria no crece con el tamaño del resultado.
+        """
+        conds, params = [], []
+        for col, op, v in (("dni", "=", dni), ("fecha", ">=", desde), ("fecha", "<=", hasta),
+                           ("recomendacion", "=", recomendacion)):
+            if v is not None:
+                conds.append(f"{col} {op} ?"); params.append(v)
+        sql = "SELECT offset, largo FROM resultados"
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += " ORDER BY fecha, id" if por_fecha else " ORDER BY id"
+        if limite is not None:
+            sql += f" LIMIT {int(limite)}"
+        with self._lector() as con:
+            cur = con.execute(sql, params)
+            try:
+                with open(os.path.join(self.dir, LOG), "rb") as f:
+                    while filas := cur.fetchmany(tam_lote):
+                        for offset, largo in filas:
+                            f.seek(offset)
+                            yield json.loads(f.read(largo))
+            finally:
+                cur.close()
+
+    def posteriores(self, desde_id: int = 0, tam_lote: int = 1000) -> Iterator[Dict]:
+        """Filas del índice con id > `desde_id` en orden de guardado (rango sobre la PK, sin tocar el
+        log). Sirve para seguir lo que guardan otros procesos sobre el mismo directorio."""
+        with self._lector() as con:
+            cur = con.execute(
+                "SELECT id, dni, fecha, recomendacion, timestamp, ecog, toxicidad FROM resultados "
+                "WHERE id > ? ORDER BY id", (desde_id,))
+            try:
+                while filas := cur.fetchmany(tam_lote):
+                    for id, dni, fecha, rec, ts, ecog, tox in filas:
+                        yield {"id": id, "dni": dni, "fecha": fecha, "recomendacion": rec,
+                               "timestamp": ts, "ecog": ecog, "toxicidad": tox}
+            finally:
+                cur.close()
+
+    def ultimo_id_antes(self, timestamp: str) -> int:
+        """Mayor id guardado antes de `timestamp` (búsqueda binaria sobre la PK: los ids crecen con
+        el tiempo de guardado). 0 si no hay ninguno."""
+        with self._lector() as con:
+            lo, hi = 0, con.execute("SELECT COALESCE(MAX(id), 0) FROM resultados").fetchone()[0]
+            while lo < hi:
+                medio = (lo + hi + 1) // 2
+                fila = con.execute("SELECT timestamp FROM resultados WHERE id >= ? ORDER BY id LIMIT 1",
+                                   (medio,)).fetchone()
+                if fila[0] < timestamp:
+                    lo = medio
+                else:
+                    hi = medio - 1
+        return lo
+
+    def historial(self, dni: str, limite: int = 20) -> List[Dict]:
+        """Triages previos de un DNI, del más reciente al más antiguo (solo índice cubriente)."""
+        with self._lector() as con:
+            filas = con.execute(
+                "SELECT fecha, recomendacion, ecog, toxicidad FROM resultados "
+                "WHERE dni = ? ORDER BY fecha DESC, id DESC LIMIT ?", (dni, limite)).fetchall()
+        return [{"fecha": f, "recomendacion": r, "ecog": e, "toxicidad": tox} for f, r, e, tox in filas]
+
+    def sugerir_dni(self, prefijo: str, limite: int = 8) -> List[str]:
+        """DNIs guardados que empiezan con `prefijo` (recorrido por rango del índice)."""
+        if not prefijo:
+            return []
+        with self._lector() as con:
+            filas = con.execute(
+                "SELECT DISTINCT dni FROM resultados WHERE dni >= ? AND dni < ? ORDER BY dni LIMIT ?",
+                (prefijo, prefijo + "\uffff", limite)).fetchall()
+        return [f[0] for f in filas]
@@ -0,0 +1,291 @@
+# Estadísticas sobre informes históricos: mezcla de recomendaciones por semana, frecuencia de
+# cada regla y distribución de ECOG por momento del tratamiento.
+#   python -m triage.analitica                         # resultados guardados (almacén)
+#   python -m triage.analitica descargas/ otra/carpeta  # archivos triage_<DNI>.json del Paso 9
+#   python -m triage.analitica --desde 2024-01-01 --json
+#
+# Los informes se pasan una sola vez a columnas NumPy (fecha, recomendación, momento, ECOG y una
+# máscara de bits con las reglas disparadas) que quedan cacheadas en un .npz junto a la fuente;
+# los agregados son operaciones vectorizadas sobre esas columnas. En cada corrida solo se parsea
+# lo nuevo: los archivos que no estaban o cambiaron (mtime/tamaño) y, en el almacén, el tramo del
+# log posterior al último byte ya leído (el log es append-only). Los bits de la máscara siguen el
+# orden de las reglas vigentes: si el archivo de reglas cambia de reglas, la caché se reconstruye.
+
+import argparse, json, logging, os, sys, time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from triage.almacen import LOG, directorio_datos
+from triage.motor import PRIORIDAD, Vigentes, reglas_disparadas, vigentes
+
+log = logging.getLogger("triage.analitica")
+
+CACHE_ALMACEN = "analitica.npz"       # dentro del directorio del almacén
+CACHE_ARCHIVOS = ".analitica.npz"     # dentro de cada carpeta de informes
+PATRON = ("triage_", ".json")
+_VERSION = 2  # cambiar las columnas ⇒ subir la versión; la caché se reconstruye
+
+RECOMENDACIONES = sorted(PRIORIDAD, key=PRIORIDAD.get, reverse=True)  # URGENTE primero
+ECOG_ND = -1
+
+# ──────────────────────────────────────────────────────────────
+# Columnas
+# ──────────────────────────────────────────────────────────────
+COLUMNAS = {"fecha": "datetime64[D]", "recomendacion": np.int8, "momento": str, "ecog": np.int8,
+            "reglas": np.uint32}  # bit i = i-ésima regla que escala en las reglas vigentes (hasta 32)
+
+def _vacias() -> Dict[str, np.ndarray]:
+    return {c: np.array([], dtype=t) for c, t in COLUMNAS.items()}
+
+def a_columnas(informes: List[Dict], v: Vigentes = None) -> Dict[str, np.ndarray]:
+    """Informes (formato de `triage.informe`) → una columna NumPy por campo analizado."""
+    if not informes:
+        return _vacias()
+    v = v or vigentes()
+    fechas, recs, momentos, ecogs, reglas = [], [], [], [], []
+    bit = {r: 1 << i for i, r in enumerate(v.escalan)}
+    for inf in informes:
+        d, res = inf["datos"], inf["resultado"]
+        fechas.append(d["fecha"])
+        recs.append(PRIORIDAD[res["recomendacion"]])
+        momentos.append(d.get("momento") or "N/D")
+        ecog = res["detalles"].get("ECOG")
+        ecogs.append(ecog if isinstance(ecog, int) else ECOG_ND)
+        bits = 0
+        for r in reglas_disparadas(res, v):
+            bits |= bit[r]
+        reglas.append(bits)
+    return {"fecha": np.array(fechas, dtype="datetime64[D]"), "recomendacion": np.array(recs, dtype=np.int8),
+            "momento": np.array(momentos, dtype=str), "ecog": np.array(ecogs, dtype=np.int8),
+            "reglas": np.array(reglas, dtype=np.uint32)}
+
+def _unir(*partes: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {c: np.concatenate([p[c] for p in partes]) for c in COLUMNAS}
+
+def _filtrar(cols: Dict[str, np.ndarray], mascara: np.ndarray) -> Dict[str, np.ndarray]:
+    return {c: v[mascara] for c, v in cols.items()}
+
+# ──────────────────────────────────────────────────────────────
+# Caché columnar (.npz; escritura atómica)
+# ──────────────────────────────────────────────────────────────
+def _leer_cache(ruta: str, v: Vigentes) -> Optional[Dict[str, np.ndarray]]:
+    try:
+        with np.load(ruta, allow_pickle=False) as z:
+            if int(z["_version"]) != _VERSION or z["_reglas"].tolist() != list(v.escalan):
+                return None
+            return {k: z[k] for k in z.files}
+    except (OSError, KeyError, ValueError):
+        return None
+
+def _escribir_cache(ruta: str, arrays: Dict[str, np.ndarray], v: Vigentes) -> None:
+    tmp = ruta + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, _version=np.array(_VERSION), _reglas=np.array(list(v.escalan), dtype=str), **arrays)
+    os.replace(tmp, ruta)
+
+def validar_informe(inf) -> Dict:
+    """Comprueba los valores que usa `a_columnas` (no solo que existan las claves) y normaliza la
+    fecha; lanza ValueError con el motivo. Un informe malo se omite en lugar de abortar la corrida."""
+    if not isinstance(inf, dict) or not isinstance(inf.get("datos"), dict) or not isinstance(inf.get("resultado"), dict):
+        raise ValueError("se espera {\"datos\": {...}, \"resultado\": {...}}")
+    d, res = inf["datos"], inf["resultado"]
+    try:
+        d["fecha"] = date.fromisoformat(d.get("fecha")).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"fecha {d.get('fecha')!r} no es ISO (AAAA-MM-DD)") from None
+    if res.get("recomendacion") not in PRIORIDAD:
+        raise ValueError(f"recomendación {res.get('recomendacion')!r} fuera de {list(PRIORIDAD)}")
+    if not isinstance(d.get("momento", ""), (str, type(None))):
+        raise ValueError(f"momento {d['momento']!r} no es texto")
+    if not isinstance(res.get("detalles", {}), dict):
+        raise ValueError("detalles no es un objeto")
+    ecog = res.setdefault("detalles", {}).get("ECOG")
+    if ecog is not None and (type(ecog) is not int or not 0 <= ecog <= 4):
+        raise ValueError(f"ECOG {ecog!r} no es un entero de 0 a 4")
+    if not isinstance(res.setdefault("mensajes", []), list) or not all(isinstance(m, str) for m in res["mensajes"]):
+        raise ValueError("mensajes no es una lista de textos")
+    return inf
+
+def _leer_informe(ruta: str) -> Optional[Dict]:
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return validar_informe(json.load(f))
+    except (OSError, ValueError) as e:
+        log.warning("%s: no es un informe de triage (%s)", ruta, e)
+        return None
+
+def cargar_archivos(directorio: str) -> Tuple[Dict[str, np.ndarray], int]:
+    """Columnas de los `triage_*.json` de `directorio` y cuántos archivos se parsearon ahora.
+
+    La caché guarda, alineados con las filas, el nombre, mtime y tamaño de cada archivo: los que
+    siguen iguales se conservan, los modificados o nuevos se parsean y los borrados se descartan.
+    Los archivos inválidos se recuerdan (sin fila) para no reintentarlos mientras no cambien.
+    """
+    actuales = {}
+    with os.scandir(directorio) as it:
+        for e in it:
+            if e.name.startswith(PATRON[0]) and e.name.endswith(PATRON[1]) and e.is_file():
+                st = e.stat()
+                actuales[e.name] = (st.st_mtime_ns, st.st_size)
+
+    ruta_cache, v = os.path.join(directorio, CACHE_ARCHIVOS), vigentes()
+    cache = _leer_cache(ruta_cache, v)
+    if cache is None:
+        cols, nombres, firmas, invalidos = _vacias(), np.array([], dtype=str), np.zeros((0, 2), np.int64), {}
+    else:
+        cols = {c: cache[c] for c in COLUMNAS}
+        nombres, firmas = cache["nombre"], cache["firma"]
+        invalidos = {n: tuple(f) for n, f in zip(cache["invalido"], cache["firma_invalido"])}
+
+    sigue = np.array([actuales.get(n) == (m, t) for n, (m, t) in zip(nombres, firmas.tolist())], dtype=bool)
+    vistos = set(nombres[sigue].tolist())
+    nuevos = sorted(n for n, f in actuales.items() if n not in vistos and invalidos.get(n) != f)
+    if not nuevos and sigue.all() and len(invalidos) == len(set(invalidos) & set(actuales)):
+        return cols, 0
+
+    informes, ok, invalidos = [], [], {n: f for n, f in invalidos.items() if actuales.get(n) == f}
+    for n in nuevos:
+        inf = _leer_informe(os.path.join(directorio, n))
+        if inf is None:
+            invalidos[n] = actuales[n]
+        else:
+            informes.append(inf)
+            ok.append(n)
+    cols = _unir(_filtrar(cols, sigue), a_columnas(informes, v))
+    nombres = np.concatenate([nombres[sigue], np.array(ok, dtype=str)])
+    firmas = np.concatenate([firmas[sigue], np.array([actuales[n] for n in ok], dtype=np.int64).reshape(-1, 2)])
+    _escribir_cache(ruta_cache, {**cols, "nombre": nombres, "firma": firmas,
+                                 "invalido": np.array(list(invalidos), dtype=str),
+                                 "firma_invalido": np.array(list(invalidos.values()), dtype=np.int64).reshape(-1, 2)}, v)
+    return cols, len(nuevos)
+
+def cargar_almacen(directorio: str = None) -> Tuple[Dict[str, np.ndarray], int]:
+    """Columnas de todos los resultados guardados y cuántos se parsearon ahora.
+
+    El log del almacén solo crece: la caché recuerda hasta qué byte leyó (y los primeros bytes
+    del log, para notar si lo reemplazaron) y en cada corrida lee únicamente el tramo nuevo.
+    """
+    directorio = directorio or directorio_datos()
+    ruta_log, ruta_cache = os.path.join(directorio, LOG), os.path.join(directorio, CACHE_ALMACEN)
+    if not os.path.exists(ruta_log):  # instalación nueva: todavía no se guardó nada
+        return _vacias(), 0
+    v = vigentes()
+    cache = _leer_cache(ruta_cache, v)
+    with open(ruta_log, "rb") as f:
+        cabeza = f.read(256)
+        if cache is None or int(cache["offset"]) > os.fstat(f.fileno()).st_size or bytes(cache["cabeza"]) != cabeza[:len(cache["cabeza"])]:
+            cols, offset = _vacias(), 0
+        else:
+            cols, offset = {c: cache[c] for c in COLUMNAS}, int(cache["offset"])
+        f.seek(offset)
+        cola = f.read()
+    fin = cola.rfind(b"\n") + 1  # una última línea sin \n es una escritura en curso
+    if not fin:
+        return cols, 0
+    informes = []
+    for l in cola[:fin].splitlines():
+        try:
+            informes.append(validar_informe(json.loads(l)))
+        except ValueError as e:
+            if l.strip():
+                log.warning("%s: registro ilegible omitido (%s)", ruta_log, e)
+    cols = _unir(cols, a_columnas(informes, v))
+    _escribir_cache(ruta_cache, {**cols, "offset": np.array(offset + fin),
+                                 "cabeza": np.frombuffer(cabeza, dtype=np.uint8)}, v)
+    return cols, len(informes)
+
+# ──────────────────────────────────────────────────────────────
+# Agregados (vectorizados)
+# ──────────────────────────────────────────────────────────────
+def semana(fechas: np.ndarray) -> np.ndarray:
+    """Lunes de la semana de cada fecha (el 1970-01-01 fue jueves)."""
+    dias = fechas.astype(np.int64)
+    return (dias - (dias + 3) % 7).astype("datetime64[D]")
+
+def por_semana(cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """(lunes de cada semana, conteos [semana × recomendación en el orden de RECOMENDACIONES])."""
+    semanas, idx = np.unique(semana(cols["fecha"]), return_inverse=True)
+    rec = PRIORIDAD["URGENTE"] - cols["recomendacion"].astype(np.int64)  # columna 0 = URGENTE
+    conteos = np.bincount(idx * len(RECOMENDACIONES) + rec, minlength=len(semanas) * len(RECOMENDACIONES))
+    return semanas, conteos.reshape(len(semanas), len(RECOMENDACIONES))
+
+def por_regla(cols: Dict[str, np.ndarray]) -> np.ndarray:
+    """Veces que se disparó cada regla (orden de `vigentes().escalan`)."""
+    bits = np.uint32(1) << np.arange(len(vigentes().escalan), dtype=np.uint32)
+    return ((cols["reglas"][:, None] & bits) != 0).sum(axis=0)
+
+def ecog_por_momento(cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """(momentos, conteos [momento × ECOG 0–4, y N/D en la última columna])."""
+    momentos, idx = np.unique(cols["momento"], return_inverse=True)
+    ecog = np.where(cols["ecog"] == ECOG_ND, 5, cols["ecog"]).astype(np.int64)
+    conteos = np.bincount(idx * 6 + ecog, minlength=len(momentos) * 6)
+    return momentos, conteos.reshape(len(momentos), 6)
+
+def resumen(cols: Dict[str, np.ndarray]) -> Dict:
+    semanas, mezcla = por_semana(cols)
+    momentos, ecog = ecog_por_momento(cols)
+    n = len(cols["fecha"])
+    return {
+        "informes": n,
+        "por_semana": [{"semana": str(s), **dict(zip(RECOMENDACIONES, map(int, fila)))}
+                       for s, fila in zip(semanas, mezcla)],
+        "reglas": {r: int(c) for r, c in zip(vigentes().escalan, por_regla(cols))},
+        "ecog_por_momento": {str(m): dict(zip(["0", "1", "2", "3", "4", "N/D"], map(int, fila)))
+                             for m, fila in zip(momentos, ecog)},
+    }
+
+# ──────────────────────────────────────────────────────────────
+# CLI
+# ──────────────────────────────────────────────────────────────
+def _imprimir(res: Dict) -> None:
+    n = res["informes"]
+    print(f"{n:,} informes\n")
+    print("Recomendaciones por semana (lunes)")
+    print(f"{'semana':<12}" + "".join(f"{r:>15}" for r in RECOMENDACIONES) + f"{'total':>8}")
+    for fila in res["por_semana"]:
+        print(f"{fila['semana']:<12}" + "".join(f"{fila[r]:>15}" for r in RECOMENDACIONES)
+              + f"{sum(fila[r] for r in RECOMENDACIONES):>8}")
+    print("\nReglas disparadas")
+    for r, c in sorted(res["reglas"].items(), key=lambda x: -x[1]):
+        print(f"  {vigentes().descripcion[r]:<40}{c:>8}{c / max(n, 1):>8.1%}")
+    print("\nECOG por momento")
+    print(f"{'momento':<22}" + "".join(f"{e:>7}" for e in ["0", "1", "2", "3", "4", "N/D"]))
+    for m, fila in res["ecog_por_momento"].items():
+        print(f"{m:<22}" + "".join(f"{c:>7}" for c in fila.values()))
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m triage.analitica",
+                                 description="Estadísticas de informes de triage (caché columnar incremental).")
+    ap.add_argument("carpetas", nargs="*", help="carpetas con triage_<DNI>.json (por defecto, el almacén)")
+    ap.add_argument("--datos", default=None, help="directorio del almacén (por defecto TRIAGE_DATOS o ./datos)")
+    ap.add_argument("--desde", help="fecha ISO inclusive")
+    ap.add_argument("--hasta", help="fecha ISO inclusive")
+    ap.add_argument("--json", action="store_true", help="salida JSON")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s", stream=sys.stderr)
+
+    t0 = time.perf_counter()
+    partes, parseados = [], 0
+    for fuente in args.carpetas or [None]:
+        cols, n = cargar_archivos(fuente) if fuente else cargar_almacen(args.datos)
+        partes.append(cols)
+        parseados += n
+    cols = _unir(*partes)
+    mascara = np.ones(len(cols["fecha"]), dtype=bool)
+    if args.desde:
+        mascara &= cols["fecha"] >= np.datetime64(args.desde, "D")
+    if args.hasta:
+        mascara &= cols["fecha"] <= np.datetime64(args.hasta, "D")
+    res = resumen(_filtrar(cols, mascara))
+    log.info("%d informes nuevos o modificados parseados · %.2f s", parseados, time.perf_counter() - t0)
+    if args.json:
+        json.dump(res, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        _imprimir(res)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
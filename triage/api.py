@@ -0,0 +1,346 @@
+# API HTTP local de triage (asyncio puro, sin dependencias externas).
+#   python -m triage.api [--host 127.0.0.1] [--port 8502] [--workers 2] [--tabla]
+#
+#   POST /evaluar        {cuestionario}            → {"recomendacion", "mensajes", "detalles", "version_reglas"}
+#   POST /evaluar/lote   [{cuestionario}, ...]     → [{"ok": true, "resultado"} | {"ok": false, "error"}]
+#   GET  /salud                                    → {"ok": true}
+#   GET  /metricas                                 → texto Prometheus (con TRIAGE_METRICAS=1)
+#   GET  /tablero?limite=100                       → {"version", "total", "conteos", "casos"}
+#   GET  /tablero/eventos                          → text/event-stream: `foto` y luego `alta`/`baja`
+#   POST /tablero/atender {"id": n}                → {"ok": bool}
+#
+# Los campos se validan con `triage.validacion` (mismos dominios que el wizard). `evaluar` corre
+# en un pool de procesos, fuera del event loop; las peticiones individuales que llegan juntas se
+# agrupan en un solo envío al pool (espera máx. `ventana_ms` o `max_lote` cuestionarios). Cada
+# proceso del pool, y el del servidor (que atribuye las reglas disparadas en /metricas), vigila el
+# archivo de reglas y las recarga si cambia (`motor.vigilar`). Con `--tabla` los workers evalúan
+# con la tabla de decisión memoizada (`triage.tabla`).
+# El tablero de guardia (`triage.tablero`) sigue el almacén de `--datos` y empuja cada cambio a
+# los clientes SSE conectados; un cliente que reconecta con Last-Event-ID recibe solo lo que le faltó.
+
+import argparse, asyncio, json, logging, os, signal, sys
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from triage import metricas, tabla
+from triage.almacen import Almacen
+from triage.motor import evaluar, vigilar
+from triage.tablero import Tablero
+from triage.validacion import normalizar
+
+log = logging.getLogger("triage.api")
+
+MAX_CUERPO = 8 * 1024 * 1024
+
+# ──────────────────────────────────────────────────────────────
+# Trabajo CPU (procesos del pool)
+# ──────────────────────────────────────────────────────────────
+def evaluar_lote(raws: List[Dict], con_tabla: bool = False) -> List[Dict]:
+    salida, evaluar_ = [], tabla.evaluar if con_tabla else evaluar
+    for raw in raws:
+        try:
+            if not isinstance(raw, dict):
+                raise ValueError("se espera un objeto JSON")
+            salida.append({"ok": True, "resultado": evaluar_(normalizar(raw))})
+        except (ValueError, TypeError) as e:
+            salida.append({"ok": False, "error": str(e)})
+    return salida
+
+# ──────────────────────────────────────────────────────────────
+# Agrupador de peticiones concurrentes
+# ──────────────────────────────────────────────────────────────
+class Agrupador:
+    """Junta cuestionarios sueltos durante `ventana_ms` y los evalúa en un solo envío al pool."""
+    def __init__(self, pool, ventana_ms: float = 2.0, max_lote: int = 256, con_tabla: bool = False):
+        self.pool = pool
+        self.con_tabla = con_tabla
+        self.ventana = ventana_ms / 1000
+        self.max_lote = max_lote
+        self._pendientes: List[Tuple[Dict, asyncio.Future]] = []
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+
+    def evaluar(self, raw: Dict) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pendientes.append((raw, fut))
+        if len(self._pendientes) >= self.max_lote:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = loop.call_later(self.ventana, self._despachar)
+        return fut
+
+    def _despachar(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._pendientes = self._pendientes, []
+        if lote:
+            asyncio.ensure_future(self._resolver(lote))
+
+    async def _resolver(self, lote) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            res = await loop.run_in_executor(self.pool, evaluar_lote, [raw for raw, _ in lote], self.con_tabla)
+        except Exception as e:
+            for _, fut in lote:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), r in zip(lote, res):
+            if not fut.done():
+                fut.set_result(r)
+
+# ──────────────────────────────────────────────────────────────
+# HTTP/1.1 mínimo (keep-alive, Content-Length)
+# ──────────────────────────────────────────────────────────────
+class ErrorHTTP(Exception):
+    def __init__(self, estado: HTTPStatus, detalle: str = ""):
+        super().__init__(detalle or estado.phrase)
+        self.estado = estado
+
+async def _leer_peticion(reader) -> Optional[Tuple[str, str, Dict, bytes]]:
+    linea = await reader.readline()
+    if not linea:
+        return None
+    try:
+        metodo, ruta, _ = linea.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "línea de petición inválida") from None
+    cabeceras = {}
+    while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        k, _, v = h.decode("latin-1").partition(":")
+        cabeceras[k.strip().lower()] = v.strip()
+    try:
+        largo = int(cabeceras.get("content-length") or 0)
+    except ValueError:
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "Content-Length inválido") from None
+    if largo > MAX_CUERPO:
+        raise ErrorHTTP(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    cuerpo = await reader.readexactly(largo) if largo else b""
+    return metodo.upper(), ruta, cabeceras, cuerpo
+
+def _respuesta(estado: HTTPStatus, obj, cerrar: bool = False) -> bytes:
+    if isinstance(obj, str):
+        cuerpo, tipo = obj.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        cuerpo, tipo = json.dumps(obj, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+    cab = (f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+           f"Content-Type: {tipo}\r\n"
+           f"Content-Length: {len(cuerpo)}\r\n"
+           f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n")
+    return cab.encode("latin-1") + cuerpo
+
+def _entero(consulta: str, nombre: str, defecto: int = None) -> Optional[int]:
+    valor = parse_qs(consulta).get(nombre, [None])[0]
+    if valor is None:
+        return defecto
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, f"{nombre} debe ser entero") from None
+
+def _evento(tipo: str, dato, id: int = None) -> bytes:
+    cab = f"id: {id}\n" if id is not None else ""
+    return f"{cab}event: {tipo}\ndata: {json.dumps(dato, ensure_ascii=False)}\n\n".encode("utf-8")
+
+class Servidor:
+    def __init__(self, workers: int = 0, ventana_ms: float = 2.0, max_lote: int = 256,
+                 datos: str = None, cada: float = 0.5, con_tabla: bool = False):
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=vigilar)
+        vigilar()  # este proceso registra las métricas de los resultados: mismas reglas que los workers
+        self.agrupador = Agrupador(self.pool, ventana_ms, max_lote, con_tabla)
+        self.datos = datos
+        self.cada = cada
+        self._tablero: Optional[Tablero] = None
+        self._novedades: Optional[asyncio.Condition] = None
+        self._flujos = set()  # tareas de streams SSE abiertos (terminan al detener el servidor)
+        self._cerrando = False
+
+    # ── Tablero de guardia ─────────────────────────────────────
+    async def tablero(self) -> Tablero:
+        """Se abre en el primer uso; una tarea sincroniza con el almacén cada `cada` segundos."""
+        if self._tablero is None:
+            self._novedades = asyncio.Condition()
+            self._tablero = await asyncio.to_thread(lambda: Tablero(Almacen(self.datos)))
+            asyncio.ensure_future(self._seguir_almacen())
+        return self._tablero
+
+    async def _seguir_almacen(self) -> None:
+        while True:
+            await asyncio.sleep(self.cada)
+            try:
+                cambio = await asyncio.to_thread(self._tablero.sincronizar)
+            except Exception:
+                log.exception("no se pudo sincronizar el tablero")
+                continue
+            if cambio:
+                await self._avisar()
+
+    async def _avisar(self) -> None:
+        async with self._novedades:
+            self._novedades.notify_all()
+
+    async def eventos(self, writer, desde: Optional[int], limite: int) -> None:
+        """Stream SSE: foto inicial (o solo lo que falta desde `desde`) y después cada alta/baja."""
+        tab = await self.tablero()
+        self._flujos.add(asyncio.current_task())
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        pendientes = tab.eventos_desde(desde) if desde is not None else None
+        if pendientes is None:
+            foto = tab.foto(limite)
+            writer.write(_evento("foto", foto, foto["version"]))
+            version = foto["version"]
+        else:
+            version = desde
+        try:
+            await self._emitir(tab, writer, pendientes, version, limite)
+        finally:
+            self._flujos.discard(asyncio.current_task())
+
+    async def _emitir(self, tab: Tablero, writer, pendientes, version: int, limite: int) -> None:
+        while True:
+            for v, tipo, dato in pendientes or ():
+                writer.write(_evento(tipo, dato, v))
+                version = v
+            await writer.drain()
+            async with self._novedades:
+                try:
+                    await asyncio.wait_for(self._novedades.wait_for(
+                        lambda: tab.version > version or self._cerrando), 15)
+                except asyncio.TimeoutError:
+                    pendientes = ()
+                    writer.write(b": sigue\n\n")  # keep-alive para proxies
+                    continue
+            if self._cerrando:
+                return
+            pendientes = tab.eventos_desde(version)
+            if pendientes is None:  # cliente demasiado atrasado: foto completa otra vez
+                foto = tab.foto(limite)
+                writer.write(_evento("foto", foto, foto["version"]))
+                version = foto["version"]
+
+    async def despachar(self, metodo: str, ruta: str, cuerpo: bytes):
+        ruta, _, consulta = ruta.partition("?")
+        if ruta == "/salud" and metodo == "GET":
+            return HTTPStatus.OK, {"ok": True}
+        if ruta == "/metricas" and metodo == "GET":
+            if not metricas.ACTIVO:
+                raise ErrorHTTP(HTTPStatus.NOT_FOUND, "métricas desactivadas (TRIAGE_METRICAS=1)")
+            return HTTPStatus.OK, metricas.REGISTRO.exportar()
+        if ruta == "/tablero" and metodo == "GET":
+            tab = await self.tablero()
+            return HTTPStatus.OK, tab.foto(_entero(consulta, "limite", 100))
+        if ruta == "/tablero/atender" and metodo == "POST":
+            try:
+                id = int(json.loads(cuerpo)["id"])
+            except (ValueError, TypeError, KeyError):
+                raise ErrorHTTP(HTTPStatus.BAD_REQUEST, 'se espera {"id": <entero>}') from None
+            tab = await self.tablero()
+            cambio = await asyncio.to_thread(tab.atender, id)
+            if cambio:
+                await self._avisar()
+            return HTTPStatus.OK, {"ok": cambio}
+        if ruta not in ("/evaluar", "/evaluar/lote"):
+            raise ErrorHTTP(HTTPStatus.NOT_FOUND)
+        if metodo != "POST":
+            raise ErrorHTTP(HTTPStatus.METHOD_NOT_ALLOWED)
+        try:
+            datos = json.loads(cuerpo)
+        except ValueError:
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "JSON inválido") from None
+
+        if ruta == "/evaluar":
+            r = await self.agrupador.evaluar(datos)
+            if metricas.ACTIVO and r["ok"]:
+                metricas.registrar_resultado(r["resultado"])
+            if not r["ok"]:
+                raise ErrorHTTP(HTTPStatus.UNPROCESSABLE_ENTITY, r["error"])
+            return HTTPStatus.OK, r["resultado"]
+        if not isinstance(datos, list):
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "se espera una lista de cuestionarios")
+        loop = asyncio.get_running_loop()
+        res = await loop.run_in_executor(self.pool, evaluar_lote, datos, self.agrupador.con_tabla)
+        if metricas.ACTIVO:
+            for r in res:
+                if r["ok"]:
+                    metricas.registrar_resultado(r["resultado"])
+        return HTTPStatus.OK, res
+
+    async def conexion(self, reader, writer) -> None:
+        try:
+            while True:
+                pet = None
+                try:
+                    pet = await _leer_peticion(reader)
+                    if pet is None:
+                        break
+                    metodo, ruta, cab, cuerpo = pet
+                    destino, _, consulta = ruta.partition("?")
+                    if metodo == "GET" and destino == "/tablero/eventos":  # stream: ocupa la conexión
+                        ultimo = cab.get("last-event-id", "")
+                        desde = int(ultimo) if ultimo.isdigit() else _entero(consulta, "desde")
+                        await self.eventos(writer, desde, _entero(consulta, "limite", 100))
+                        break
+                    cerrar = cab.get("connection", "").lower() == "close"
+                    estado, obj = await self.despachar(metodo, ruta, cuerpo)
+                except ErrorHTTP as e:
+                    cerrar = pet is None  # error al leer la petición: el stream quedó desalineado
+                    estado, obj = e.estado, {"error": str(e)}
+                writer.write(_respuesta(estado, obj, cerrar))
+                await writer.drain()
+                if cerrar:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception:
+            log.exception("error atendiendo conexión")
+            writer.write(_respuesta(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "error interno"}, True))
+        finally:
+            writer.close()
+
+    async def servir(self, host: str = "127.0.0.1", port: int = 8502, listo: asyncio.Event = None):
+        srv = await asyncio.start_server(self.conexion, host, port)
+        log.info("API de triage en http://%s:%d", host, port)
+        tarea = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, tarea.cancel)
+            except (NotImplementedError, RuntimeError):  # Windows / fuera del hilo principal
+                pass
+        if listo is not None:
+            listo.set()
+        try:
+            async with srv:
+                try:
+                    await srv.serve_forever()
+                finally:
+                    self._cerrando = True  # los streams SSE terminan solos en vez de quedar cancelados
+                    if self._flujos:
+                        await self._avisar()
+                        await asyncio.wait(self._flujos, timeout=1)
+        except asyncio.CancelledError:
+            log.info("API detenida")
+        finally:
+            self.pool.shutdown(cancel_futures=True)  # sin esto los procesos del pool quedan huérfanos
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m triage.api", description="API HTTP local de triage.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8502)
+    ap.add_argument("--workers", type=int, default=0, help="procesos del pool (0 = nº de CPUs)")
+    ap.add_argument("--ventana-ms", type=float, default=2.0, help="espera máx. para agrupar peticiones")
+    ap.add_argument("--max-lote", type=int, default=256)
+    ap.add_argument("--datos", help="directorio del almacén para el tablero (por defecto TRIAGE_DATOS)")
+    ap.add_argument("--tabla", action="store_true", help="evaluar con la tabla de decisión memoizada")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s", stream=sys.stderr)
+    servidor = Servidor(args.workers, args.ventana_ms, args.max_lote, args.datos, con_tabla=args.tabla)
+    asyncio.run(servidor.servir(args.host, args.port))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
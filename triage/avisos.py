@@ -0,0 +1,297 @@
+# Avisos a la guardia: cuando el Paso 9 da URGENTE o Guardia se notifica al destino configurado
+# en TRIAGE_AVISOS, sin que el rerun de Streamlit espere la entrega.
+#   http://127.0.0.1:8600/avisos    webhook: POST JSON con cabecera Idempotency-Key
+#   buzon:///datos/avisos           buzón: un JSON por aviso (<clave>.json, reemplazo atómico)
+# Sin TRIAGE_AVISOS no se envía nada.
+#
+# `Despachador.enviar` solo encola; un pool de hilos (TRIAGE_AVISOS_HILOS, 2 por defecto) entrega
+# con reintentos y backoff exponencial con jitter. La clave de idempotencia sale del contenido del
+# informe: los reintentos y un segundo envío del mismo triage llevan la misma clave, y el receptor
+# descarta los repetidos. Un 4xx (salvo 408/429) no se reintenta.
+# Métricas (TRIAGE_METRICAS=1): avisos pendientes, latencia de entrega y resultado de cada intento.
+#
+# Receptor local de prueba (--demora y --fallar simulan un receptor lento o inestable):
+#   python -m triage.avisos --receptor [--port 8600] [--demora 2] [--fallar 0.3]
+#   TRIAGE_AVISOS=http://127.0.0.1:8600/avisos python -m triage.avisos --probar
+
+import argparse, atexit, collections, hashlib, heapq, itertools, json, logging, os, random, sys, threading, time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib import error, request
+from urllib.parse import urlparse
+
+from triage import metricas
+from triage.motor import PRIORIDAD
+
+log = logging.getLogger("triage.avisos")
+
+NOTIFICAN = tuple(r for r in PRIORIDAD if PRIORIDAD[r] >= PRIORIDAD["Guardia"])  # URGENTE, Guardia
+ESTADOS_RECORDADOS = 10_000  # claves recientes por proceso (deduplicación local y `estado`)
+
+def clave(inf: Dict) -> str:
+    """Clave de idempotencia: el mismo informe da siempre la misma clave, en cualquier proceso."""
+    return hashlib.sha256(json.dumps(inf, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:32]
+
+def aviso(inf: Dict) -> Dict:
+    """Informe (ver `triage.informe`) → cuerpo del aviso."""
+    res = inf["resultado"]
+    return {"clave": clave(inf), "recomendacion": res["recomendacion"], **inf["datos"],
+            "timestamp": inf["timestamp"], "mensajes": res["mensajes"], "version_reglas": res.get("version_reglas")}
+
+# ──────────────────────────────────────────────────────────────
+# Destinos
+# ──────────────────────────────────────────────────────────────
+class ErrorEntrega(Exception):
+    def __init__(self, detalle: str, permanente: bool = False):
+        super().__init__(detalle)
+        self.permanente = permanente  # reintentar no cambiaría el resultado
+
+class Webhook:
+    """POST del aviso en JSON; cualquier 2xx es entrega (también para una clave ya recibida)."""
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self._abrir = request.build_opener(request.ProxyHandler({})).open  # destino local: sin proxies
+
+    def entregar(self, a: Dict) -> None:
+        req = request.Request(self.url, data=json.dumps(a, ensure_ascii=False).encode("utf-8"), method="POST",
+                              headers={"Content-Type": "application/json; charset=utf-8", "Idempotency-Key": a["clave"]})
+        try:
+            with self._abrir(req, timeout=self.timeout) as r:
+                r.read()
+        except error.HTTPError as e:
+            raise ErrorEntrega(f"HTTP {e.code}", permanente=400 <= e.code < 500 and e.code not in (408, 429)) from None
+        except OSError as e:  # caído, rechazado, timeout (URLError es OSError)
+            raise ErrorEntrega(str(getattr(e, "reason", e))) from None
+
+class Buzon:
+    """Un archivo por aviso en un directorio (lo recoge otro proceso); la clave es el nombre."""
+    def __init__(self, directorio: str):
+        self.dir = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def entregar(self, a: Dict) -> None:
+        ruta = os.path.join(self.dir, f"{a['clave']}.json")
+        tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(a, f, ensure_ascii=False)
+            os.replace(tmp, ruta)
+        except OSError as e:
+            raise ErrorEntrega(str(e)) from None
+
+# ──────────────────────────────────────────────────────────────
+# Despacho en segundo plano
+# ──────────────────────────────────────────────────────────────
+class Despachador:
+    """Cola con plazos (los reintentos esperan su turno sin ocupar un hilo) + pool de entrega."""
+    def __init__(self, destino, hilos: int = 2, intentos: int = 8, espera: float = 0.5,
+                 espera_max: float = 60.0, max_pendientes: int = 10_000):
+        self.destino = destino
+        self.intentos = intentos
+        self.espera, self.espera_max = espera, espera_max
+        self.max_pendientes = max_pendientes
+        self._cond = threading.Condition()
+        self._plazos = []  # heap de (cuándo, orden, aviso, intento, encolado)
+        self._orden = itertools.count()
+        self._estados = collections.OrderedDict()  # clave → estado, las más recientes al final
+        self._en_curso = 0
+        self._cerrando = False
+        self._hilos = [threading.Thread(target=self._trabajar, name=f"triage-avisos-{i}", daemon=True)
+                       for i in range(max(1, hilos))]
+        for h in self._hilos:
+            h.start()
+        if metricas.ACTIVO:
+            metricas.REGISTRO.medir("triage_avisos_pendientes", self.pendientes)
+        atexit.register(self.cerrar)
+
+    def enviar(self, inf: Dict) -> Optional[str]:
+        """Encola el aviso de un informe URGENTE/Guardia y devuelve su clave (None si no corresponde
+        avisar). Retorna de inmediato; una clave ya vista en este proceso no se vuelve a encolar."""
+        if inf["resultado"]["recomendacion"] not in NOTIFICAN:
+            return None
+        a = aviso(inf)
+        with self._cond:
+            if a["clave"] in self._estados:
+                return a["clave"]
+            if len(self._plazos) >= self.max_pendientes:
+                log.error("cola de avisos llena (%d); aviso %s %s descartado", len(self._plazos),
+                          a["recomendacion"], a["dni"])
+                self._marcar(a["clave"], "fallido")
+                return a["clave"]
+            self._marcar(a["clave"], "pendiente")
+            ahora = time.monotonic()
+            heapq.heappush(self._plazos, (ahora, next(self._orden), a, 1, ahora))
+            self._cond.notify()
+        return a["clave"]
+
+    def estado(self, clave: str) -> Optional[str]:
+        """"pendiente", "entregado" o "fallido"; None si la clave no pasó por este proceso."""
+        return self._estados.get(clave)
+
+    def pendientes(self) -> int:
+        return len(self._plazos) + self._en_curso
+
+    def esperar(self, timeout: float = None) -> bool:
+        """Bloquea hasta que no quede nada pendiente (o vence `timeout`); True si se vació."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self.pendientes(), timeout)
+
+    def cerrar(self, espera: float = 2.0) -> None:
+        """Da `espera` segundos a lo pendiente y detiene el pool; lo que quede se informa en el log."""
+        if not self.esperar(espera):
+            log.warning("%d aviso(s) sin entregar al cerrar", self.pendientes())
+        with self._cond:
+            self._cerrando = True
+            self._cond.notify_all()
+        atexit.unregister(self.cerrar)
+
+    def _marcar(self, clave: str, estado: str) -> None:  # con self._cond tomado
+        self._estados[clave] = estado
+        self._estados.move_to_end(clave)
+        while len(self._estados) > ESTADOS_RECORDADOS:
+            self._estados.popitem(last=False)
+
+    def _trabajar(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._cerrando:
+                        return
+                    espera = self._plazos[0][0] - time.monotonic() if self._plazos else None
+                    if espera is not None and espera <= 0:
+                        break
+                    self._cond.wait(espera)
+                _, _, a, intento, encolado = heapq.heappop(self._plazos)
+                self._en_curso += 1
+            try:
+                self.destino.entregar(a)
+            except ErrorEntrega as e:
+                self._fallo(a, intento, encolado, e)
+            except Exception as e:
+                log.exception("destino de avisos falló")
+                self._fallo(a, intento, encolado, ErrorEntrega(repr(e)))
+            else:
+                with self._cond:
+                    self._marcar(a["clave"], "entregado")
+                if metricas.ACTIVO:
+                    metricas.REGISTRO.contar("triage_avisos_total", resultado="entregado")
+                    metricas.REGISTRO.observar("triage_avisos_entrega_segundos", time.monotonic() - encolado)
+            finally:
+                with self._cond:
+                    self._en_curso -= 1
+                    self._cond.notify_all()
+
+    def _fallo(self, a: Dict, intento: int, encolado: float, e: ErrorEntrega) -> None:
+        if e.permanente or intento >= self.intentos:
+            log.error("aviso %s %s (%s) no entregado tras %d intento(s): %s",
+                      a["recomendacion"], a["dni"], a["clave"], intento, e)
+            resultado = "fallido"
+            with self._cond:
+                self._marcar(a["clave"], "fallido")
+        else:
+            demora = min(self.espera_max, self.espera * 2 ** (intento - 1)) * random.uniform(0.5, 1.0)
+            log.warning("aviso %s %s: intento %d falló (%s); reintento en %.1f s",
+                        a["recomendacion"], a["dni"], intento, e, demora)
+            resultado = "reintento"
+            with self._cond:
+                heapq.heappush(self._plazos, (time.monotonic() + demora, next(self._orden), a, intento + 1, encolado))
+        if metricas.ACTIVO:
+            metricas.REGISTRO.contar("triage_avisos_total", resultado=resultado)
+
+def abrir(url: str = None) -> Optional[Despachador]:
+    """Despachador hacia `url` (por defecto TRIAGE_AVISOS); None si no hay destino configurado."""
+    url = url or os.environ.get("TRIAGE_AVISOS")
+    if not url:
+        return None
+    u = urlparse(url)
+    if u.scheme in ("http", "https"):
+        destino = Webhook(url)
+    elif u.scheme == "buzon":
+        destino = Buzon(u.netloc + u.path)
+    else:
+        raise ValueError(f"destino de avisos desconocido: {u.scheme!r} (opciones: http, https, buzon)")
+    return Despachador(destino, hilos=int(os.environ.get("TRIAGE_AVISOS_HILOS", "2")))
+
+# ──────────────────────────────────────────────────────────────
+# Receptor local de prueba (sustituto del webhook de la guardia)
+# ──────────────────────────────────────────────────────────────
+class _Receptor(BaseHTTPRequestHandler):
+    def do_POST(self):
+        cuerpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        srv = self.server
+        if srv.demora:
+            time.sleep(srv.demora)
+        if random.random() < srv.fallar:
+            self._responder(503, {"ok": False})
+            return
+        clave = self.headers.get("Idempotency-Key") or json.loads(cuerpo).get("clave", "")
+        with srv.lock:
+            srv.intentos += 1
+            nuevo = clave not in srv.recibidos
+            if nuevo:
+                srv.recibidos[clave] = (time.monotonic(), json.loads(cuerpo))
+        if nuevo and srv.imprimir:
+            a = srv.recibidos[clave][1]
+            print(f"{a['timestamp']}  {a['recomendacion']:<8} DNI {a['dni'] or 'N/D'}  "
+                  + " · ".join(m for m in a["mensajes"] if "**" in m), flush=True)
+        self._responder(200, {"ok": True, "repetido": not nuevo})
+
+    def _responder(self, estado: int, obj: Dict) -> None:
+        cuerpo = json.dumps(obj).encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+def receptor(host: str = "127.0.0.1", port: int = 8600, demora: float = 0.0, fallar: float = 0.0,
+             imprimir: bool = False) -> ThreadingHTTPServer:
+    """Servidor HTTP que acepta avisos (deduplica por Idempotency-Key); atender con `serve_forever()`.
+    `recibidos` = {clave: (instante monotónico de llegada, aviso)}; `intentos` cuenta los POST aceptados."""
+    srv = ThreadingHTTPServer((host, port), _Receptor)
+    srv.daemon_threads = True
+    srv.demora, srv.fallar, srv.imprimir = demora, fallar, imprimir
+    srv.lock, srv.recibidos, srv.intentos = threading.Lock(), {}, 0
+    return srv
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m triage.avisos", description="Avisos URGENTE/Guardia a la guardia.")
+    ap.add_argument("--receptor", action="store_true", help="levanta un receptor local de prueba")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8600)
+    ap.add_argument("--demora", type=float, default=0.0, help="segundos antes de responder (receptor lento)")
+    ap.add_argument("--fallar", type=float, default=0.0, help="fracción de POST respondidos con 503")
+    ap.add_argument("--probar", action="store_true", help="envía un aviso URGENTE de prueba a TRIAGE_AVISOS")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s", stream=sys.stderr)
+
+    if args.receptor:
+        srv = receptor(args.host, args.port, args.demora, args.fallar, imprimir=True)
+        log.info("receptor de avisos en http://%s:%d/avisos", *srv.server_address[:2])
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.probar:
+        despachador = abrir()
+        if despachador is None:
+            ap.error("definir TRIAGE_AVISOS (http://... o buzon:///directorio)")
+        inf = {"datos": {"dni": "00000000", "fecha": datetime.now().date().isoformat(), "momento": "prueba"},
+               "resultado": {"recomendacion": "URGENTE", "mensajes": ["Aviso de prueba → **GUARDIA URGENTE**."],
+                             "detalles": {}},
+               "timestamp": datetime.now().isoformat(timespec="seconds")}
+        k = despachador.enviar(inf)
+        despachador.esperar(60)
+        print(k, despachador.estado(k))
+        return 0 if despachador.estado(k) == "entregado" else 1
+    ap.print_help()
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
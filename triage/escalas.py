@@ -0,0 +1,39 @@
+# Escalas estandarizadas de los selects del wizard (0–4 / 0–3 / A–E).
+# Las listas de opciones y las tablas etiqueta → valor se arman una vez por proceso
+# (tuplas inmutables, compartidas entre sesiones); los `to_*` son un lookup en dict.
+
+# ──────────────────────────────────────────────────────────────
+# Utilidades de selects estandarizados
+# ──────────────────────────────────────────────────────────────
+_OP_0_4 = ("0 — sin síntomas", "1 — leve", "2 — moderado", "3 — severo", "4 — potencialmente mortal")
+_OP_0_3 = {}  # lbl3 → opciones
+_OP_A_E = ("A — leve", "B — moderado", "C — severo", "D — muy severo", "E — compromiso vital")
+_OP_0_A_E = ("0 — sin síntomas",) + _OP_A_E
+
+def _codigo(v: str) -> str:
+    return v.split("—")[0].strip()
+
+_INT = {v: int(_codigo(v)) for v in _OP_0_4 + ("1 — leve (A)", "2 — moderado (B/C)")}
+_LETRA = {v: _codigo(v) for v in _OP_0_A_E}
+
+def op_0_4():
+    return _OP_0_4
+def to_0_4(v: str) -> int:
+    n = _INT.get(v)
+    return int(_codigo(v)) if n is None else n
+
+def op_0_3(lbl3="3 — severo"):
+    op = _OP_0_3.get(lbl3)
+    if op is None:
+        op = _OP_0_3[lbl3] = ("0 — sin síntomas", "1 — leve (A)", "2 — moderado (B/C)", lbl3)
+        _INT[lbl3] = int(_codigo(lbl3))
+    return op
+def to_0_3(v: str) -> int:
+    n = _INT.get(v)
+    return int(_codigo(v)) if n is None else n
+
+def op_A_E(include_zero=True):
+    return _OP_0_A_E if include_zero else _OP_A_E
+def to_A_E(v: str) -> str:
+    c = _LETRA.get(v)
+    return _codigo(v) if c is None else c
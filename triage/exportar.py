@@ -0,0 +1,149 @@
+# Exportación masiva de resultados guardados por rango de fechas, en streaming.
+#   python -m triage.exportar --desde 2024-01-01 --hasta 2024-12-31 -o informes.csv.gz
+#   python -m triage.exportar --formato parquet -o informes.parquet --zip
+# Formatos: NDJSON, CSV y Parquet (columnar; requiere pyarrow, que ya trae streamlit).
+# Se escribe por lotes de `tam_lote` informes; .gz comprime NDJSON/CSV al vuelo y --zip
+# empaqueta el archivo exportado.
+
+import argparse, csv, gzip, io, json, logging, os, sys, zipfile
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from triage.almacen import Almacen
+
+log = logging.getLogger("triage.exportar")
+
+FORMATOS = ("ndjson", "csv", "parquet")
+COLUMNAS = ("timestamp", "dni", "fecha", "momento", "recomendacion", "mensajes", "detalles")
+
+def en_lotes(informes: Iterable[Dict], tam: int) -> Iterator[List[Dict]]:
+    lote = []
+    for inf in informes:
+        lote.append(inf)
+        if len(lote) >= tam:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def _fila(inf: Dict) -> Dict:
+    d, res = inf["datos"], inf["resultado"]
+    return {"timestamp": inf["timestamp"], "dni": d["dni"], "fecha": d["fecha"], "momento": d["momento"],
+            "recomendacion": res["recomendacion"], "mensajes": res["mensajes"],
+            "detalles": json.dumps(res["detalles"], ensure_ascii=False)}
+
+# ──────────────────────────────────────────────────────────────
+# Escritores (uno por formato; reciben lotes de informes)
+# ──────────────────────────────────────────────────────────────
+class EscritorNDJSON:
+    def __init__(self, f):
+        self.f = io.TextIOWrapper(f, encoding="utf-8", newline="\n", write_through=True)
+    def escribir(self, lote: List[Dict]):
+        self.f.write("".join(json.dumps(inf, ensure_ascii=False) + "\n" for inf in lote))
+    def cerrar(self):
+        self.f.flush()
+        self.f.detach()
+
+class EscritorCSV:
+    def __init__(self, f):
+        self.f = io.TextIOWrapper(f, encoding="utf-8", newline="", write_through=True)
+        self.w = csv.DictWriter(self.f, fieldnames=COLUMNAS)
+        self.w.writeheader()
+    def escribir(self, lote: List[Dict]):
+        for inf in lote:
+            fila = _fila(inf)
+            fila["mensajes"] = " | ".join(fila["mensajes"])
+            self.w.writerow(fila)
+    def cerrar(self):
+        self.f.flush()
+        self.f.detach()
+
+class EscritorParquet:
+    """Un row group por lote; `mensajes` como list<string>, `detalles` como JSON."""
+    def __init__(self, f):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("el formato parquet requiere pyarrow (pip install pyarrow)") from None
+        self.pa = pa
+        self.esquema = pa.schema([(c, pa.list_(pa.string()) if c == "mensajes" else pa.string())
+                                  for c in COLUMNAS])
+        self.w = pq.ParquetWriter(f, self.esquema, compression="zstd")
+    def escribir(self, lote: List[Dict]):
+        filas = [_fila(inf) for inf in lote]
+        cols = {c: [fila[c] for fila in filas] for c in COLUMNAS}
+        self.w.write_table(self.pa.Table.from_pydict(cols, schema=self.esquema))
+    def cerrar(self):
+        self.w.close()
+
+ESCRITORES = {"ndjson": EscritorNDJSON, "csv": EscritorCSV, "parquet": EscritorParquet}
+
+def exportar(informes: Iterable[Dict], f, formato: str, tam_lote: int = 1000) -> int:
+    """Escribe `informes` en el archivo binario `f`; devuelve cuántos se exportaron."""
+    escritor = ESCRITORES[formato](f)
+    n = 0
+    try:
+        for lote in en_lotes(informes, tam_lote):
+            escritor.escribir(lote)
+            n += len(lote)
+    finally:
+        escritor.cerrar()
+    return n
+
+def formato_de(ruta: str) -> str:
+    base = ruta[:-3] if ruta.endswith(".gz") else ruta
+    ext = os.path.splitext(base)[1].lower().lstrip(".")
+    return {"jsonl": "ndjson", "ndjson": "ndjson", "csv": "csv", "parquet": "parquet"}.get(ext, "ndjson")
+
+def destino(ruta: str, formato: str = "", empaquetar: bool = False) -> Tuple[str, str, bool, bool]:
+    """(ruta sin .zip, formato, gzip, zip) de un destino; ValueError si la combinación no es válida."""
+    if ruta.endswith(".zip"):
+        ruta, empaquetar = ruta[:-4], True
+    gz = ruta.endswith(".gz")
+    formato = formato or formato_de(ruta)
+    if gz and (empaquetar or formato == "parquet"):
+        raise ValueError(".gz no se combina con zip ni parquet (ya van comprimidos)")
+    return ruta, formato, gz, empaquetar
+
+def exportar_archivo(almacen: Almacen, ruta: str, formato: str = "", desde: str = None,
+                     hasta: str = None, empaquetar: bool = False, tam_lote: int = 1000) -> int:
+    """Exporta a `ruta` (.gz = gzip al vuelo; .zip o `empaquetar` = archivo zip con el export)."""
+    ruta, formato, gz, empaquetar = destino(ruta, formato, empaquetar)
+    informes = almacen.buscar(desde=desde, hasta=hasta, por_fecha=True, tam_lote=tam_lote)
+    if empaquetar:
+        with zipfile.ZipFile(ruta + ".zip", "w", compression=zipfile.ZIP_DEFLATED) as z:
+            # force_zip64: el tamaño final no se conoce de antemano
+            with z.open(os.path.basename(ruta), "w", force_zip64=True) as f:
+                return exportar(informes, f, formato, tam_lote)
+    with open(ruta, "wb") as crudo:
+        if not gz:
+            return exportar(informes, crudo, formato, tam_lote)
+        with gzip.GzipFile(fileobj=crudo, mode="wb") as f:
+            return exportar(informes, f, formato, tam_lote)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m triage.exportar",
+                                 description="Exporta resultados guardados por rango de fechas.")
+    ap.add_argument("-o", "--salida", required=True, help="archivo destino (.jsonl/.csv/.parquet, .gz opcional)")
+    ap.add_argument("--formato", choices=FORMATOS, default="", help="por defecto, según la extensión")
+    ap.add_argument("--desde", help="fecha ISO inclusive")
+    ap.add_argument("--hasta", help="fecha ISO inclusive")
+    ap.add_argument("--zip", action="store_true", help="empaquetar en un .zip")
+    ap.add_argument("--datos", default=None, help="directorio del almacén (por defecto TRIAGE_DATOS o ./datos)")
+    ap.add_argument("--lote", type=int, default=1000, help="informes por lote")
+    args = ap.parse_args(argv)
+    try:
+        destino(args.salida, args.formato, args.zip)
+    except ValueError as e:
+        ap.error(f"{args.salida}: {e}")
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s", stream=sys.stderr)
+    alm = Almacen(args.datos)
+    try:
+        n = exportar_archivo(alm, args.salida, args.formato, args.desde, args.hasta, args.zip, args.lote)
+    finally:
+        alm.cerrar()
+    log.info("%d informes exportados", n)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# Puntaje incremental del wizard: cada bloque de `evaluar` (uno por paso) se evalúa cuando se
+# completa su paso, y la recomendación parcial es el máximo de los bloques ya evaluados.
+#   python -m triage.incremental                 # verifica contra `evaluar`
+#   python -m triage.incremental --muestras 1e6
+#
+# Como `evaluar` es exactamente la composición de los mismos bloques (`vigentes().bloques`), el
+# resultado incremental completo coincide con el de `evaluar`. Además, cada bloque lleva la
+# recomendación más alta que pueden dar sus reglas: cuando la parcial ya alcanza lo máximo que
+# pueden aportar los pasos que faltan, es definitiva y el wizard puede saltar al resultado.
+# Los bloques se leen de `motor.vigentes()` en cada llamada, así que siguen una recarga de reglas.
+
+import argparse, itertools, random, sys, time
+from datetime import date
+from typing import Dict, Iterator, List, Tuple, Union
+
+from triage.motor import DETALLES, PRIORIDAD, evaluar, version_reglas, vigentes
+from triage.registro import Cuestionario
+
+ULTIMO = max(DETALLES)
+
+def restante(paso: int) -> int:
+    """Prioridad más alta que pueden aportar los pasos desde `paso` hasta el final."""
+    return max([PRIORIDAD[tope] for q, (_, tope) in vigentes().bloques.items() if q >= paso], default=0)
+_NOMBRE = {p: rec for rec, p in PRIORIDAD.items()}
+
+Bloque = Tuple[str, List[str], Dict]
+
+def evaluar_paso(paso: int, data: Union[Cuestionario, Dict]) -> Bloque:
+    """(recomendación, mensajes, detalles) que aporta el bloque de un paso."""
+    msgs, det = [], {}
+    return vigentes().bloques[paso][0](data, msgs, det), msgs, det
+
+class Puntaje:
+    """Bloques ya evaluados del wizard en curso (paso → resultado del bloque)."""
+    __slots__ = ("pasos",)
+
+    def __init__(self):
+        self.pasos: Dict[int, Bloque] = {}
+
+    def completar(self, paso: int, data: Union[Cuestionario, Dict]) -> str:
+        self.pasos[paso] = evaluar_paso(paso, data)
+        return self.pasos[paso][0]
+
+    def nivel(self, vivo: int = None, data=None) -> int:
+        """Prioridad parcial; con `vivo`, incluye el paso en curso evaluado con `data` tal como está."""
+        nivel = max((PRIORIDAD[b[0]] for p, b in self.pasos.items() if p != vivo), default=0)
+        if vivo is not None:
+            nivel = max(nivel, PRIORIDAD[evaluar_paso(vivo, data)[0]])
+        return nivel
+
+    def recomendacion(self, vivo: int = None, data=None) -> str:
+        return _NOMBRE[self.nivel(vivo, data)]
+
+    def definitiva(self, paso: int, vivo: bool = False, data=None) -> bool:
+        """True si ningún paso posterior a `paso` puede cambiar la recomendación."""
+        return self.nivel(paso if vivo else None, data) >= restante(paso + 1)
+
+    def resultado(self) -> Dict:
+        """Mismo formato que `evaluar`, armado con los bloques en orden de paso."""
+        nivel, msgs, det = 0, [], {}
+        for p in sorted(self.pasos):
+            rec, m, d = self.pasos[p]
+            nivel = max(nivel, PRIORIDAD[rec])
+            msgs += m
+            det.update(d)
+        return {"recomendacion": _NOMBRE[nivel], "mensajes": msgs, "detalles": det,
+                "version_reglas": version_reglas()}
+
+    @classmethod
+    def hasta(cls, paso: int, data: Union[Cuestionario, Dict]) -> "Puntaje":
+        """Puntaje con los pasos 1..`paso` completados (p. ej. al restaurar una sesión)."""
+        pt = cls()
+        for p in range(1, min(paso, ULTIMO) + 1):
+            pt.completar(p, data)
+        return pt
+
+# ──────────────────────────────────────────────────────────────
+# Verificación contra `evaluar`
+# ──────────────────────────────────────────────────────────────
+_B = (False, True)
+_GRADOS = ("0", "A", "B", "C", "D", "E")
+DOMINIOS = {  # valores crudos que puede dar el wizard, por bloque
+    "base": dict(ecog=range(5), paliativos=("N/A", "Sí", "No")),
+    "gi": dict(gi_on=_B, diarrea=_B, diarrea_g=range(5), lop=_B, lop_mas7=_B, nauseas=_B,
+               nauseas_g=range(4), nauseas_ant=_B, vom_g=_GRADOS, dolor_abd=("No", "A", "B", "C", "D")),
+    "derm": dict(derm_on=_B, mucositis=_B, mucositis_g=range(4), eritema=_B, eritema_g=_GRADOS[1:],
+                 acne=_B, acne_g=range(4), smp=_B, smp_g=range(4)),
+    "neuro": dict(neuro_on=_B, neuropatia=_B, neuropatia_g=range(4), ototox=_B),
+    "cv": dict(cv_on=_B, sang_g=("No",) + _GRADOS, hta=_B, hta_g=range(5)),
+}
+
+def combinaciones_crudas() -> Iterator[Cuestionario]:
+    """Todas las combinaciones crudas de cada bloque (resto en valores por defecto)."""
+    for dominios in DOMINIOS.values():
+        campos = list(dominios)
+        for valores in itertools.product(*dominios.values()):
+            yield Cuestionario(dni="0", fecha=date(2000, 1, 1), momento="< 7 días", **dict(zip(campos, valores)))
+
+def muestra_cruda(rng: random.Random) -> Cuestionario:
+    vals = {c: rng.choice(list(dom)) for dominios in DOMINIOS.values() for c, dom in dominios.items()}
+    return Cuestionario(dni="0", fecha=date(2000, 1, 1), momento="< 7 días", **vals)
+
+def verificar(muestras: int = 0, seed: int = 0) -> List[Tuple[str, Cuestionario, str]]:
+    """Diferencias (chequeo, entrada, detalle) entre el puntaje incremental y `evaluar`."""
+    difs = []
+    # 1) Ningún bloque supera la recomendación máxima que declara (exhaustivo por bloque)
+    for r in combinaciones_crudas():
+        for paso, (_, tope) in vigentes().bloques.items():
+            rec = evaluar_paso(paso, r)[0]
+            if PRIORIDAD[rec] > PRIORIDAD[tope]:
+                difs.append(("tope", r, f"paso {paso}: {rec} > {tope}"))
+    # 2) Recorrido paso a paso: parcial monótona, definitiva = final, resultado = evaluar
+    rng = random.Random(seed)
+    for _ in range(muestras):
+        r = muestra_cruda(rng)
+        final = evaluar(r)
+        pt, anterior = Puntaje(), 0
+        for paso in range(1, ULTIMO + 1):
+            vivo = pt.recomendacion(paso, r)
+            pt.completar(paso, r)
+            nivel = pt.nivel()
+            if _NOMBRE[nivel] != vivo or nivel < anterior or nivel > PRIORIDAD[final["recomendacion"]]:
+                difs.append(("parcial", r, f"paso {paso}: {_NOMBRE[nivel]} (vivo {vivo})"))
+            if pt.definitiva(paso) and _NOMBRE[nivel] != final["recomendacion"]:
+                difs.append(("definitiva", r, f"paso {paso}: {_NOMBRE[nivel]} ≠ {final['recomendacion']}"))
+            anterior = nivel
+        if pt.resultado() != final:
+            difs.append(("resultado", r, f"{pt.resultado()} ≠ {final}"))
+    return difs
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m triage.incremental",
+                                 description="Verifica el puntaje incremental contra evaluar.")
+    ap.add_argument("--muestras", type=float, default=100_000, help="recorridos aleatorios del espacio crudo")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    difs = verificar(int(args.muestras), args.seed)
+    print(f"topes por bloque (exhaustivo) + {int(args.muestras):,} recorridos en {time.perf_counter() - t0:.1f} s")
+    for chequeo, r, detalle in difs[:20]:
+        print(f"DIFERENCIA [{chequeo}] {r!r}\n  {detalle}")
+    if difs:
+        print(f"{len(difs)} diferencias")
+        return 1
+    print("sin diferencias")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+# Informe de un triage (lo que descarga el Paso 9 y lo que se persiste en el almacén).
+
+from datetime import datetime
+from typing import Dict, Union
+
+from triage.registro import Cuestionario
+
+def informe(data: Union[Cuestionario, Dict], res: Dict, timestamp: str = None) -> Dict:
+    return {
+        "datos": {"dni": data["dni"], "fecha": data["fecha"].isoformat(), "momento": data["momento"]},
+        "resultado": res,
+        "timestamp": timestamp or datetime.now().isoformat(timespec="seconds"),
+    }
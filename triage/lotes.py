@@ -0,0 +1,78 @@
+# Motor de reglas vectorizado (NumPy); se importa aparte para que `triage` cargue rápido.
+# Las condiciones del archivo de reglas se traducen a expresiones NumPy (una máscara por regla)
+# y se compilan una vez por versión de las reglas.
+
+import ast
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+import numpy as np
+
+from triage import reglas as _reglas
+from triage.motor import PRIORIDAD, reglas_vigentes
+
+# ──────────────────────────────────────────────────────────────
+# Motor de reglas vectorizado (lotes columnares)
+# ──────────────────────────────────────────────────────────────
+_NOMBRES_PRIORIDAD = np.array(sorted(PRIORIDAD, key=PRIORIDAD.get), dtype=object)
+_OPS = {ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
+
+def campos_batch() -> Tuple[str, ...]:
+    """Campos que usan las condiciones de las reglas vigentes (el resto no afecta la decisión)."""
+    return _reglas.campos(reglas_vigentes())
+
+def a_columnas(registros) -> Dict[str, np.ndarray]:
+    """Convierte una lista de dicts (formato de `evaluar`) en columnas para `evaluar_batch`."""
+    registros = list(registros)
+    return {c: np.array([r[c] for r in registros]) for c in campos_batch()}
+
+def _a_numpy(n: ast.expr) -> str:
+    """Condición validada por `reglas.analizar` → expresión sobre columnas (`b`: bool, `c`: cruda)."""
+    if isinstance(n, ast.Name):
+        return f"b({n.id!r})"
+    if isinstance(n, ast.UnaryOp):
+        return f"~{_a_numpy(n.operand)}"
+    if isinstance(n, ast.BoolOp):
+        return "(" + (" & " if isinstance(n.op, ast.And) else " | ").join(_a_numpy(v) for v in n.values) + ")"
+    campo, op, valor = n.left.id, n.ops[0], ast.literal_eval(n.comparators[0])
+    if isinstance(op, (ast.In, ast.NotIn)):
+        return f"{'~' if isinstance(op, ast.NotIn) else ''}np.isin(c({campo!r}), {tuple(valor)!r})"
+    return f"(c({campo!r}) {_OPS[type(op)]} {valor!r})"
+
+def _columnas(cols: Dict):
+    crudas, booleanas = {}, {}
+    def c(k):
+        if k not in crudas:
+            crudas[k] = np.asarray(cols[k])
+        return crudas[k]
+    def b(k):
+        if k not in booleanas:
+            booleanas[k] = np.asarray(cols[k], dtype=bool)
+        return booleanas[k]
+    return b, c
+
+@lru_cache(maxsize=8)
+def _compilar(reglas: tuple) -> Callable[[Dict], Dict[str, np.ndarray]]:
+    src = ["def mascaras(cols):", "    b, c = _columnas(cols)", "    return {"]
+    src += [f"        {r.id!r}: {_a_numpy(_reglas.analizar(r.si))}," for r in reglas]
+    src.append("    }")
+    espacio = {}
+    exec(compile("\n".join(src), "<reglas (NumPy)>", "exec"), {"np": np, "_columnas": _columnas}, espacio)
+    return espacio["mascaras"]
+
+def evaluar_batch(cols: Dict) -> Dict:
+    """Versión columnar de `evaluar`: un array por campo, misma recomendación fila a fila.
+
+    Devuelve {"recomendacion": array de str, "reglas": {id: máscara bool}, "aviso_paliativos": máscara}.
+    """
+    reglas = tuple(reglas_vigentes())
+    mascaras = _compilar(reglas)(cols)
+    n = len(np.asarray(next(iter(cols.values()))))
+    # decide_higher equivale al máximo de prioridades entre las reglas disparadas
+    nivel = np.zeros(n, dtype=np.int8)
+    hits = {}
+    for r in reglas:
+        if PRIORIDAD[r.recomendacion]:
+            hits[r.id] = mascaras[r.id]
+            nivel = np.maximum(nivel, hits[r.id] * np.int8(PRIORIDAD[r.recomendacion]))
+    aviso = mascaras.get("aviso_paliativos", np.zeros(n, dtype=bool))
+    return {"recomendacion": _NOMBRES_PRIORIDAD[nivel], "reglas": hits, "aviso_paliativos": aviso}
@@ -0,0 +1,187 @@
+# Triage masivo por línea de comandos: CSV/JSONL → JSONL/CSV en streaming con pool de procesos.
+#   python -m triage.masivo entrada.csv -o resultados.jsonl [--workers 4] [--chunk 2000] [--tabla]
+# Lee por bloques, evalúa en paralelo y escribe en el orden de entrada; la memoria
+# queda acotada a `workers × en_vuelo × chunk` filas sin importar el tamaño del archivo.
+# Con `--tabla` cada worker evalúa con la tabla memoizada (`triage.tabla`): conviene con
+# cuestionarios que se repiten o con muchos bloques activos.
+
+import argparse, csv, io, json, logging, os, sys, time
+from contextlib import nullcontext
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from triage import tabla
+from triage.motor import evaluar
+from triage.validacion import normalizar
+
+log = logging.getLogger("triage.masivo")
+
+CAMPOS_CSV = ("fila", "dni", "fecha", "momento", "recomendacion", "mensajes")
+
+# ──────────────────────────────────────────────────────────────
+# Lectura en streaming
+# ──────────────────────────────────────────────────────────────
+def leer_filas(f: io.BufferedIOBase, formato: str) -> Iterator[Tuple[int, object]]:
+    """Produce (nº de fila, registro crudo). En JSONL la línea se parsea en el worker.
+    Una fila ilegible (no UTF-8, CSV mal formado) sale como ValueError y la lectura sigue."""
+    malas = set()  # nº de línea que no era UTF-8 válido (se decodifica con reemplazo)
+    def lineas() -> Iterator[str]:
+        for n, b in enumerate(f, start=1):
+            try:
+                yield b.decode("utf-8")
+            except UnicodeDecodeError:
+                malas.add(n)
+                yield b.decode("utf-8", "replace")
+
+    if formato != "csv":
+        for n, linea in enumerate(lineas(), start=1):
+            if n in malas:
+                yield n, ValueError("la línea no es UTF-8 válido")
+            elif linea.strip():
+                yield n, linea
+        return
+    filas, n = csv.DictReader(lineas()), 1  # fila 1 = encabezado
+    while True:
+        desde = filas.line_num + 1
+        try:
+            row = next(filas)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            n += 1
+            yield n, ValueError(f"CSV mal formado: {e}")
+            continue
+        n += 1
+        if malas.intersection(range(desde, filas.line_num + 1)):
+            yield n, ValueError("la fila no es UTF-8 válido")
+            continue
+        extra = row.pop(None, None)  # columnas sin encabezado (DictReader las junta en la clave None)
+        if extra:
+            log.warning("fila %d: %d columna(s) de más sin encabezado, ignoradas", n, len(extra))
+        yield n, row
+
+def en_bloques(it: Iterable, tam: int) -> Iterator[List]:
+    it = iter(it)
+    while bloque := list(islice(it, tam)):
+        yield bloque
+
+# ──────────────────────────────────────────────────────────────
+# Evaluación (se ejecuta en los procesos del pool)
+# ──────────────────────────────────────────────────────────────
+def evaluar_bloque(bloque: List[Tuple[int, object]], con_tabla: bool = False) -> List[Tuple[int, Dict, str]]:
+    """Devuelve (fila, resultado | None, error | None) por cada registro del bloque."""
+    salida, evaluar_ = [], tabla.evaluar if con_tabla else evaluar
+    for n, raw in bloque:
+        try:
+            if isinstance(raw, ValueError):  # ilegible al leer (ver `leer_filas`)
+                raise raw
+            if isinstance(raw, str):
+                raw = json.loads(raw)
+            if not isinstance(raw, dict):
+                raise ValueError("registro ilegible")
+            data = normalizar(raw)
+            res = evaluar_(data)
+        except (ValueError, TypeError) as e:
+            salida.append((n, None, str(e)))
+            continue
+        salida.append((n, {
+            "fila": n,
+            "datos": {"dni": data["dni"], "fecha": data["fecha"].isoformat(), "momento": data["momento"]},
+            "resultado": res,
+        }, None))
+    return salida
+
+def procesar(filas: Iterable, workers: int, chunk: int, en_vuelo: int = 2,
+             con_tabla: bool = False) -> Iterator[Tuple[int, Dict, str]]:
+    """Evalúa en paralelo manteniendo el orden; como mucho `workers × en_vuelo` bloques pendientes."""
+    bloques = en_bloques(filas, chunk)
+    if workers <= 1:
+        for b in bloques:
+            yield from evaluar_bloque(b, con_tabla)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pendientes = deque()
+        for b in bloques:
+            pendientes.append(pool.submit(evaluar_bloque, b, con_tabla))
+            if len(pendientes) >= workers * en_vuelo:
+                yield from pendientes.popleft().result()
+        while pendientes:
+            yield from pendientes.popleft().result()
+
+# ──────────────────────────────────────────────────────────────
+# Escritura incremental
+# ──────────────────────────────────────────────────────────────
+class EscritorJSONL:
+    def __init__(self, f):
+        self.f = f
+    def escribir(self, r: Dict):
+        self.f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+class EscritorCSV:
+    def __init__(self, f):
+        self.w = csv.writer(f)
+        self.w.writerow(CAMPOS_CSV)
+    def escribir(self, r: Dict):
+        d, res = r["datos"], r["resultado"]
+        self.w.writerow([r["fila"], d["dni"], d["fecha"], d["momento"],
+                         res["recomendacion"], " | ".join(res["mensajes"])])
+
+def _formato(ruta: str, explicito: str, defecto: str) -> str:
+    if explicito:
+        return explicito
+    ext = os.path.splitext(ruta)[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(ext, defecto)
+
+def _abrir(ruta: str, modo: str):
+    if ruta == "-":
+        return nullcontext(sys.stdin.buffer if "r" in modo else sys.stdout)
+    if "b" in modo:  # la entrada se lee en bytes y se decodifica fila por fila
+        return open(ruta, modo)
+    return open(ruta, modo, encoding="utf-8", newline="")
+
+def ejecutar(entrada: str, salida: str = "-", fmt_in: str = "", fmt_out: str = "",
+             workers: int = 0, chunk: int = 2000, cada: float = 5.0, con_tabla: bool = False) -> Dict:
+    """Procesa `entrada` completa y devuelve contadores {ok, errores, segundos}."""
+    fmt_in = _formato(entrada, fmt_in, "jsonl")
+    fmt_out = _formato(salida, fmt_out, "jsonl")
+    workers = workers or os.cpu_count() or 1
+    ok = errores = 0
+    t0 = t_aviso = time.perf_counter()
+    with _abrir(entrada, "rb") as fin, _abrir(salida, "w") as fout:
+        escritor = (EscritorCSV if fmt_out == "csv" else EscritorJSONL)(fout)
+        for n, r, err in procesar(leer_filas(fin, fmt_in), workers, chunk, con_tabla=con_tabla):
+            if err is not None:
+                errores += 1
+                log.warning("fila %d omitida: %s", n, err)
+                continue
+            escritor.escribir(r)
+            ok += 1
+            ahora = time.perf_counter()
+            if ahora - t_aviso >= cada:
+                t_aviso = ahora
+                log.info("%d filas (%.0f filas/s)", ok + errores, (ok + errores) / (ahora - t0))
+    dt = time.perf_counter() - t0
+    log.info("fin: %d evaluadas, %d omitidas en %.2f s (%.0f filas/s)",
+             ok, errores, dt, (ok + errores) / dt if dt else 0.0)
+    return {"ok": ok, "errores": errores, "segundos": dt}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m triage.masivo", 
+                                 description="Triage masivo CSV/JSONL en streaming.")
+    ap.add_argument("entrada", help="archivo CSV/JSONL ('-' = stdin)")
+    ap.add_argument("-o", "--salida", default="-", help="archivo de salida JSONL/CSV ('-' = stdout)")
+    ap.add_argument("--formato-entrada", choices=("csv", "jsonl"), default="")
+    ap.add_argument("--formato-salida", choices=("csv", "jsonl"), default="")
+    ap.add_argument("--workers", type=int, default=0, help="procesos (0 = nº de CPUs)")
+    ap.add_argument("--chunk", type=int, default=2000, help="filas por bloque")
+    ap.add_argument("--tabla", action="store_true", help="evaluar con la tabla de decisión memoizada")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s", stream=sys.stderr)
+    ejecutar(args.entrada, args.salida, args.formato_entrada, args.formato_salida,
+             args.workers, args.chunk, con_tabla=args.tabla)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
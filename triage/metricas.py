@@ -0,0 +1,180 @@
+# Instrumentación opcional: tiempos por paso del wizard, tiempo de `evaluar`, contadores por regla y
+# estado de los avisos a la guardia (`triage.avisos`).
+# Se activa con TRIAGE_METRICAS=1. Exposición en formato de texto de Prometheus:
+#   - archivo volcado periódicamente si TRIAGE_METRICAS_ARCHIVO está definido (cada
+#     TRIAGE_METRICAS_CADA segundos, 15 por defecto; escritura atómica, apta para textfile collector);
+#   - GET /metricas en la API HTTP (`triage.api`).
+# Desactivada, `paso()` e `instrumentar()` devuelven la función original: costo cero en ejecución.
+
+import bisect, functools, os, threading, time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from triage.motor import PRIORIDAD, Vigentes, reglas_disparadas, revisar, vigentes
+
+ACTIVO = os.environ.get("TRIAGE_METRICAS", "").lower() in ("1", "true", "si", "sí", "yes")
+
+# Cubetas de los histogramas de latencia (segundos)
+CUBETAS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Series con otra escala (entregas por red con reintentos: de milisegundos a minutos)
+CUBETAS_SERIE = {"triage_avisos_entrega_segundos": (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)}
+
+class Registro:
+    """Contadores, histogramas y medidores en memoria, seguros entre hilos (una sesión de Streamlit = un hilo)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores: Dict[Tuple[str, tuple], float] = {}
+        self._histogramas: Dict[Tuple[str, tuple], List] = {}  # [por cubeta..., +Inf, suma, cuenta]
+        self._medidores: Dict[Tuple[str, tuple], Callable[[], float]] = {}  # se leen al exportar
+
+    def contar(self, nombre: str, valor: float = 1.0, **etiquetas) -> None:
+        self.sumar(((nombre, tuple(sorted(etiquetas.items()))),), valor)
+
+    def sumar(self, claves, valor: float = 1.0) -> None:
+        """Incrementa varias series ya resueltas a (nombre, etiquetas) con un solo lock."""
+        with self._lock:
+            for clave in claves:
+                self._contadores[clave] = self._contadores.get(clave, 0.0) + valor
+
+    def observar(self, nombre: str, segundos: float, **etiquetas) -> None:
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            cubetas = CUBETAS_SERIE.get(nombre, CUBETAS)
+            h = self._histogramas.get(clave)
+            if h is None:
+                h = self._histogramas[clave] = [0] * (len(cubetas) + 1) + [0.0, 0]
+            h[bisect.bisect_left(cubetas, segundos)] += 1  # acumulado recién al exportar
+            h[-2] += segundos
+            h[-1] += 1
+
+    def medir(self, nombre: str, fn: Callable[[], float], **etiquetas) -> None:
+        """Medidor (gauge): `fn()` se llama al exportar (p. ej. el largo de una cola)."""
+        with self._lock:
+            self._medidores[nombre, tuple(sorted(etiquetas.items()))] = fn
+
+    def exportar(self) -> str:
+        """Texto de exposición de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            contadores = dict(self._contadores)
+            histogramas = {k: list(v) for k, v in self._histogramas.items()}
+            medidores = dict(self._medidores)
+        lineas, vistos = [], set()
+        for (nombre, etq), v in sorted(contadores.items()):
+            if nombre not in vistos:
+                vistos.add(nombre)
+                lineas += [f"# HELP {nombre} {AYUDA.get(nombre, nombre)}", f"# TYPE {nombre} counter"]
+            lineas.append(f"{nombre}{_etiquetas(etq)} {v:g}")
+        for (nombre, etq), h in sorted(histogramas.items()):
+            if nombre not in vistos:
+                vistos.add(nombre)
+                lineas += [f"# HELP {nombre} {AYUDA.get(nombre, nombre)}", f"# TYPE {nombre} histogram"]
+            acumulado = 0
+            for limite, n in zip(CUBETAS_SERIE.get(nombre, CUBETAS), h):
+                acumulado += n
+                lineas.append(f"{nombre}_bucket{_etiquetas(etq + (('le', f'{limite:g}'),))} {acumulado}")
+            lineas.append(f"{nombre}_bucket{_etiquetas(etq + (('le', '+Inf'),))} {h[-1]}")
+            lineas.append(f"{nombre}_sum{_etiquetas(etq)} {h[-2]:.6f}")
+            lineas.append(f"{nombre}_count{_etiquetas(etq)} {h[-1]}")
+        for (nombre, etq), fn in sorted(medidores.items(), key=lambda x: x[0]):
+            if nombre not in vistos:
+                vistos.add(nombre)
+                lineas += [f"# HELP {nombre} {AYUDA.get(nombre, nombre)}", f"# TYPE {nombre} gauge"]
+            lineas.append(f"{nombre}{_etiquetas(etq)} {fn():g}")
+        return "\n".join(lineas) + "\n"
+
+def _etiquetas(etq: tuple) -> str:
+    if not etq:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in etq) + "}"
+
+AYUDA = {
+    "triage_paso_segundos": "Tiempo de render de cada paso del wizard (1-9).",
+    "triage_evaluar_segundos": "Tiempo de una llamada a evaluar.",
+    "triage_reglas_total": "Veces que cada regla del flujograma elevó la recomendación.",
+    "triage_recomendaciones_total": "Resultados por recomendación final.",
+    "triage_avisos_total": "Intentos de entrega de avisos a la guardia, por resultado.",
+    "triage_avisos_entrega_segundos": "Tiempo desde que se encola un aviso hasta que el destino lo acepta.",
+    "triage_avisos_pendientes": "Avisos en cola o en entrega (incluye los que esperan un reintento).",
+}
+
+REGISTRO = Registro()
+
+# ──────────────────────────────────────────────────────────────
+# Puntos de instrumentación
+# ──────────────────────────────────────────────────────────────
+def paso(n: int) -> Callable:
+    """Decorador para el render de un paso; identidad si la instrumentación está desactivada."""
+    def decorar(fn):
+        if not ACTIVO:
+            return fn
+        @functools.wraps(fn)
+        def medido(*a, **k):
+            t0 = time.perf_counter()
+            try:
+                return fn(*a, **k)
+            finally:
+                REGISTRO.observar("triage_paso_segundos", time.perf_counter() - t0, paso=n)
+        return medido
+    return decorar
+
+_SERIE_REGLA: Tuple[Optional[Vigentes], Dict[str, tuple]] = (None, {})
+def _series_reglas(v: Vigentes) -> Dict[str, tuple]:
+    """Series de las reglas de `v`; se rehacen una vez por cada juego de reglas instalado."""
+    global _SERIE_REGLA
+    if _SERIE_REGLA[0] is not v:
+        series = {r: ("triage_reglas_total", (("descripcion", v.descripcion[r]), ("regla", r))) for r in v.escalan}
+        if ACTIVO:
+            REGISTRO.sumar(list(series.values()), 0)
+        _SERIE_REGLA = (v, series)
+    return _SERIE_REGLA[1]
+_SERIE_REC = {rec: ("triage_recomendaciones_total", (("recomendacion", rec),)) for rec in PRIORIDAD}
+
+def registrar_resultado(res: Dict) -> None:
+    v = vigentes()  # series y reglas disparadas del mismo juego, aunque se recargue en el medio
+    if res.get("version_reglas", v.version) != v.version and revisar():
+        v = vigentes()  # el resultado viene de otro proceso que ya cargó reglas nuevas
+    series = _series_reglas(v)
+    claves = [series[r] for r in reglas_disparadas(res, v)]
+    claves.append(_SERIE_REC[res["recomendacion"]])
+    REGISTRO.sumar(claves)
+
+def instrumentar(evaluar_fn: Callable) -> Callable:
+    """Envuelve `evaluar` (tiempo + reglas disparadas); identidad si está desactivada."""
+    if not ACTIVO:
+        return evaluar_fn
+    @functools.wraps(evaluar_fn)
+    def medido(data):
+        t0 = time.perf_counter()
+        res = evaluar_fn(data)
+        REGISTRO.observar("triage_evaluar_segundos", time.perf_counter() - t0)
+        registrar_resultado(res)
+        return res
+    return medido
+
+def inicializar() -> None:
+    """Series en cero para que todas las reglas aparezcan desde el primer volcado."""
+    REGISTRO.sumar(list(_series_reglas(vigentes()).values()) + list(_SERIE_REC.values()), 0)
+
+# ──────────────────────────────────────────────────────────────
+# Volcado periódico a archivo
+# ──────────────────────────────────────────────────────────────
+def volcar(ruta: str) -> None:
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(REGISTRO.exportar())
+    os.replace(tmp, ruta)
+
+def _volcador(ruta: str, cada: float) -> None:
+    while True:
+        time.sleep(cada)
+        try:
+            volcar(ruta)
+        except OSError:
+            pass
+
+if ACTIVO:
+    inicializar()
+    _ruta = os.environ.get("TRIAGE_METRICAS_ARCHIVO")
+    if _ruta:
+        threading.Thread(target=_volcador, name="triage-metricas", daemon=True,
+                         args=(_ruta, float(os.environ.get("TRIAGE_METRICAS_CADA", "15")))).start()
@@ -0,0 +1,222 @@
+# Motor de reglas del flujograma de triage, sin dependencias de UI.
+# Las reglas (condiciones, derivaciones y mensajes) se leen de un archivo versionado
+# (`triage/reglas.json` o TRIAGE_REGLAS) y se compilan con `triage.reglas` en el primer uso, no al
+# importar; si el archivo cambia, `revisar` (o el hilo de `vigilar`) las recompila e instala sin
+# reiniciar el proceso. Todo lo derivado de unas reglas (función compilada, bloques, ids,
+# descripciones, marcas) forma un único `Vigentes` que se publica con una sola asignación: quien
+# lo lee ve el juego viejo completo o el nuevo completo, nunca una mezcla.
+
+import logging, os, threading
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from triage.registro import Cuestionario
+
+if TYPE_CHECKING:  # el compilador (ast, inspect, json…) se importa al cargar reglas, no con el paquete
+    from triage.reglas import Regla
+
+log = logging.getLogger("triage.motor")
+
+# ──────────────────────────────────────────────────────────────
+# Motor de reglas (DOCX)
+# ──────────────────────────────────────────────────────────────
+PRIORIDAD = {"URGENTE": 3, "Guardia": 2, "Interconsulta": 1, "Continuar": 0}
+def decide_higher(current: str, candidate: str) -> str:
+    return candidate if PRIORIDAD[candidate] > PRIORIDAD[current] else current
+
+# Resumen de respuestas de cada paso (los `detalles` del resultado). Las reglas que agregan
+# mensajes y elevan la recomendación están en el archivo de reglas; `triage.reglas` copia estos
+# cuerpos en línea dentro del `evaluar` compilado, seguidos de las reglas del mismo paso.
+def _identificacion(data, det: Dict) -> None:
+    det["DNI"] = data["dni"] or "N/D"
+    det["Fecha"] = data["fecha"].isoformat()
+
+def _momento_rt(data, det: Dict) -> None:
+    det["Momento tto."] = data["momento"]
+    det["RT recibida"] = "Sí" if data["rt"] else "No"
+    if data["rt"]:
+        det["RT en curso"] = "Sí" if data["rt_en_curso"] else "No"
+        if data["rt_en_curso"]:
+            det["Semana RT (en curso)"] = data["rt_semana"]
+        else:
+            det["Tiempo desde fin RT"] = data["rt_fin"]
+
+def _ecog(data, det: Dict) -> None:
+    det["ECOG"] = data["ecog"]
+    det["Paliativos"] = data["paliativos"]
+
+def _gi(data, det: Dict) -> None:
+    if data["gi_on"]:
+        if data["diarrea"]:
+            det["GI - Diarrea"] = f"Grado {data['diarrea_g']}"
+        if data["nauseas"]:
+            det["GI - Náuseas"] = f"Grado {data['nauseas_g']}"
+        if data["vom_g"] != "0":
+            det["GI - Vómitos"] = f"Grado {data['vom_g']}"
+        if data["dolor_abd"] != "No":
+            det["GI - Dolor abdominal"] = f"Grado {data['dolor_abd']}"
+
+def _derm(data, det: Dict) -> None:
+    if data["derm_on"]:
+        if data["mucositis"]:
+            det["Derm - Mucositis"] = f"Grado {data['mucositis_g']}"
+        if data["eritema"]:
+            det["Derm - Eritema/descamación"] = f"Grado {data['eritema_g']}"
+        if data["acne"]:
+            det["Derm - Acné"] = f"Grado {data['acne_g']}"
+        if data["smp"]:
+            det["Derm - Síndrome mano-pie"] = f"Grado {data['smp_g']}"
+
+def _neuro(data, det: Dict) -> None:
+    if data["neuro_on"]:
+        if data["neuropatia"]:
+            det["Neuro - Neuropatía"] = f"Grado {data['neuropatia_g']}"
+        if data["ototox"]:
+            det["Neuro - Ototoxicidad"] = "Sospecha/Presente"
+
+def _cv(data, det: Dict) -> None:
+    if data["cv_on"]:
+        if data["sang_g"] != "No":
+            det["CV - Sangrado"] = f"Grado {data['sang_g']}"
+        if data["hta"]:
+            det["CV - HTA"] = f"Grado {data['hta_g']}"
+
+def _otros(data, det: Dict) -> None:
+    if data["otros"]:
+        det["Otros"] = data["otros"]
+
+DETALLES = {1: _identificacion, 2: _momento_rt, 3: _ecog, 4: _gi, 5: _derm, 6: _neuro, 7: _cv, 8: _otros}
+
+# ──────────────────────────────────────────────────────────────
+# Reglas vigentes (archivo versionado, recarga en caliente)
+# ──────────────────────────────────────────────────────────────
+RUTA_REGLAS = os.environ.get("TRIAGE_REGLAS") or os.path.join(os.path.dirname(__file__), "reglas.json")
+
+class Vigentes(NamedTuple):
+    version: str
+    reglas: List["Regla"]
+    evaluar: Callable[[Union[Cuestionario, Dict]], Dict]  # compilada desde las reglas
+    bloques: Dict[int, Tuple[Callable, str]]  # paso → (bloque, recomendación más alta que puede aportar)
+    escalan: Dict[str, str]      # reglas que elevan la recomendación: id → prioridad (orden del archivo)
+    descripcion: Dict[str, str]  # id → descripción legible (métricas, analítica)
+    marcas: Dict[str, str]       # id → comienzo del mensaje que emite al dispararse
+
+_vigentes: Optional[Vigentes] = None
+_firma = None  # (mtime_ns, tamaño) del archivo instalado
+_recarga = threading.Lock()
+
+def evaluar(data: Union[Cuestionario, Dict]) -> Dict:
+    """Recomendación, mensajes, detalles y versión de las reglas que los produjeron."""
+    return (_vigentes or vigentes()).evaluar(data)
+
+def vigentes() -> Vigentes:
+    """Reglas instaladas; la primera llamada las lee y compila desde RUTA_REGLAS."""
+    if _vigentes is None:
+        with _recarga:
+            if _vigentes is None:
+                _cargar(RUTA_REGLAS)
+    return _vigentes
+
+def _instalar(version: str, reglas: List["Regla"]) -> None:
+    global _vigentes
+    from triage import reglas as _reglas
+    compilada, bloques = _reglas.compilar(version, reglas, DETALLES, PRIORIDAD, globals())
+    escalan = [r for r in reglas if PRIORIDAD[r.recomendacion]]
+    _vigentes = Vigentes(version, reglas, compilada, bloques, {r.id: r.recomendacion for r in escalan},
+                         {r.id: _reglas.descripcion(r) for r in escalan}, {r.id: _reglas.marca(r) for r in escalan})
+
+def _leer(ruta: str) -> Tuple[Tuple[int, int], str, List["Regla"]]:
+    from triage import reglas as _reglas
+    with open(ruta, encoding="utf-8") as f:
+        firma = os.fstat(f.fileno())
+        version, reglas = _reglas.leer(f.read(), PRIORIDAD, DETALLES)
+    return (firma.st_mtime_ns, firma.st_size), version, reglas
+
+def _cargar(ruta: str) -> str:
+    global RUTA_REGLAS, _firma
+    firma, version, reglas = _leer(ruta)
+    _instalar(version, reglas)
+    RUTA_REGLAS, _firma = ruta, firma
+    return version
+
+def cargar_reglas(ruta: str = None) -> str:
+    """Lee, compila e instala las reglas de `ruta` (por defecto RUTA_REGLAS); devuelve la versión.
+    Lanza `ReglasInvalidas` (sin tocar las vigentes) si el archivo no es válido."""
+    with _recarga:
+        return _cargar(ruta or RUTA_REGLAS)
+
+def revisar() -> bool:
+    """Recarga las reglas si el archivo cambió (mtime/tamaño). Un archivo inválido, o con otras
+    reglas bajo la misma versión, se informa en el log y se siguen usando las vigentes. Sin reglas
+    instaladas todavía no hace nada: la primera carga es la de `vigentes`."""
+    global _firma
+    if _vigentes is None:
+        return False
+    try:
+        st = os.stat(RUTA_REGLAS)
+    except OSError:
+        log.exception("no se puede leer %s; siguen las reglas %s", RUTA_REGLAS, _vigentes.version)
+        return False
+    if (st.st_mtime_ns, st.st_size) == _firma:
+        return False
+    from triage.reglas import ReglasInvalidas
+    with _recarga:
+        try:
+            firma, version, reglas = _leer(RUTA_REGLAS)
+        except (OSError, ReglasInvalidas) as e:
+            log.error("reglas inválidas en %s (%s); siguen las %s", RUTA_REGLAS, e, _vigentes.version)
+            _firma = (st.st_mtime_ns, st.st_size)
+            return False
+        _firma = firma
+        if (version, reglas) == _vigentes[:2]:
+            return False
+        if version == _vigentes.version:
+            log.error("%s cambió sin cambiar \"version\" (%s); siguen las reglas anteriores", RUTA_REGLAS, version)
+            return False
+        _instalar(version, reglas)
+    log.info("reglas %s instaladas desde %s", version, RUTA_REGLAS)
+    return True
+
+_vigilante = None
+_parar = threading.Event()
+
+def vigilar(cada: float = 1.0) -> None:
+    """Hilo de fondo que llama a `revisar` cada `cada` segundos (uno por proceso)."""
+    global _vigilante
+    if _vigilante is None or not _vigilante.is_alive():  # tras un fork el hilo del padre no existe
+        def bucle():
+            while not _parar.wait(cada):
+                revisar()
+        _vigilante = threading.Thread(target=bucle, name="triage-reglas", daemon=True)
+        _vigilante.start()
+
+def version_reglas() -> str:
+    return vigentes().version
+
+def reglas_vigentes() -> List["Regla"]:
+    return vigentes().reglas
+
+def leyenda() -> str:
+    """Markdown de derivaciones de las reglas vigentes (panel de referencias)."""
+    from triage import reglas as _reglas
+    v = vigentes()
+    return _reglas.leyenda(v.version, v.reglas, PRIORIDAD)
+
+def reglas_disparadas(res: Dict, v: Vigentes = None) -> List[str]:
+    """Ids de `v.escalan` (por defecto, las vigentes) que elevaron la recomendación en un resultado
+    de `evaluar`. Quien indexa por esos ids pasa el mismo `v` que usó para armar su índice."""
+    hits, marcas = [], (v or vigentes()).marcas
+    for m in res["mensajes"]:
+        if "**" in m:  # solo los mensajes que escalan llevan la derivación en negrita
+            for regla, marca in marcas.items():
+                if m.startswith(marca):
+                    hits.append(regla)
+                    break
+    return hits
+
+def __getattr__(nombre: str):
+    # Compatibilidad: REGLAS y DESCRIPCION de las reglas vigentes al momento de pedirlas
+    if nombre == "REGLAS":
+        return vigentes().escalan
+    if nombre == "DESCRIPCION":
+        return vigentes().descripcion
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
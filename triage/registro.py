@@ -0,0 +1,70 @@
+# Registro compacto de un cuestionario de triage (reemplaza ~40 claves sueltas de session_state).
+# Clase con __slots__: sin __dict__ por instancia, y los grados (int chicos, letras de un
+# carácter, bools) son objetos compartidos por el intérprete, así que cada campo cuesta un puntero.
+# Soporta `reg["campo"]` para que `evaluar`, `evaluar_batch` y el informe acepten
+# indistintamente un Cuestionario o un dict.
+
+from datetime import date
+from typing import Dict
+
+# campo → valor por defecto (lo que el wizard deja cuando un bloque no se registra)
+DEFECTOS = {
+    "dni": "", "fecha": None, "momento": None,
+    "rt": False, "rt_en_curso": False, "rt_semana": None, "rt_fin": None,
+    "ecog": 0, "paliativos": "N/A",
+    "gi_on": False, "diarrea": False, "diarrea_g": 0, "lop": False, "lop_mas7": False,
+    "nauseas": False, "nauseas_g": 0, "nauseas_ant": False, "vom_g": "0", "dolor_abd": "No",
+    "derm_on": False, "mucositis": False, "mucositis_g": 0, "eritema": False, "eritema_g": "A",
+    "acne": False, "acne_g": 0, "smp": False, "smp_g": 0,
+    "neuro_on": False, "neuropatia": False, "neuropatia_g": 0, "ototox": False,
+    "cv_on": False, "sang_g": "No", "hta": False, "hta_g": 0,
+    "otros": "",
+}
+CAMPOS = tuple(DEFECTOS)
+
+class Cuestionario:
+    __slots__ = CAMPOS
+
+    def __init__(self, **valores):
+        for campo, v in DEFECTOS.items():
+            object.__setattr__(self, campo, valores.pop(campo, v))
+        if valores:
+            raise TypeError(f"campos desconocidos: {', '.join(sorted(valores))}")
+
+    def __getitem__(self, campo: str):
+        return getattr(self, campo)
+
+    def get(self, campo: str, defecto=None):
+        return getattr(self, campo, defecto)
+
+    def keys(self):
+        return CAMPOS
+
+    def a_dict(self) -> Dict:
+        return {c: getattr(self, c) for c in CAMPOS}
+
+    @classmethod
+    def de_dict(cls, d: Dict) -> "Cuestionario":
+        return cls(**{c: d[c] for c in CAMPOS if c in d})
+
+    def a_json(self) -> Dict:
+        """Dict serializable (fecha ISO), p. ej. para exportar o guardar el borrador."""
+        d = self.a_dict()
+        if isinstance(d["fecha"], date):
+            d["fecha"] = d["fecha"].isoformat()
+        return d
+
+    @classmethod
+    def de_json(cls, d: Dict) -> "Cuestionario":
+        """Inversa de `a_json`."""
+        r = cls.de_dict(d)
+        if isinstance(r.fecha, str):
+            r.fecha = date.fromisoformat(r.fecha)
+        return r
+
+    def __eq__(self, otro) -> bool:
+        return isinstance(otro, Cuestionario) and all(getattr(self, c) == getattr(otro, c) for c in CAMPOS)
+
+    def __repr__(self) -> str:
+        cambios = ", ".join(f"{c}={getattr(self, c)!r}" for c, v in DEFECTOS.items() if getattr(self, c) != v)
+        return f"Cuestionario({cambios})"
@@ -0,0 +1,283 @@
+# Reglas del flujograma en un archivo declarativo versionado (`triage/reglas.json`, o la ruta de
+# TRIAGE_REGLAS): cada regla tiene paso, condición, recomendación, mensaje y texto de leyenda.
+#
+# Las condiciones usan un lenguaje mínimo (campos del cuestionario, constantes, ==, !=, <, <=, >,
+# >=, in, not in, and, or, not) que se valida sobre el AST y se compila una sola vez a Python:
+# `compilar` genera `evaluar` como una única función con el resumen de respuestas de cada paso
+# (código de `motor`) y las reglas en línea, anidando los `if` de las condiciones que comparten
+# prefijo (p. ej. `gi_on and nauseas and ...`) como estaba escrito a mano. El código generado se
+# registra en `linecache`, así las trazas muestran la línea de la regla. Sin código fuente de
+# `motor` (o con `en_linea=False`) el resumen se llama como función; `bench.reglas` verifica la
+# paridad de las dos variantes. `motor` importa este módulo recién al cargar reglas.
+
+import ast, inspect, json, linecache, string, textwrap
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from triage.registro import CAMPOS
+
+class ReglasInvalidas(ValueError):
+    pass
+
+class Regla(NamedTuple):
+    id: str
+    paso: int
+    si: str
+    recomendacion: str
+    mensaje: str
+    leyenda: str
+
+_CLAVES = {"id", "paso", "si", "recomendacion", "mensaje", "leyenda"}
+_OPERADORES = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn)
+_ROTULOS = {"URGENTE": "Guardia URGENTE", "Continuar": "Aviso"}  # títulos de la leyenda
+
+# ──────────────────────────────────────────────────────────────
+# Lectura y validación
+# ──────────────────────────────────────────────────────────────
+def analizar(si: str) -> ast.expr:
+    """Condición → AST validado contra el lenguaje de reglas."""
+    try:
+        arbol = ast.parse(si.strip(), mode="eval").body
+    except SyntaxError as e:
+        raise ReglasInvalidas(f"condición inválida {si!r}: {e.msg}") from None
+    for n in ast.walk(arbol):
+        if isinstance(n, ast.Name) and n.id not in CAMPOS:
+            raise ReglasInvalidas(f"{si!r}: campo desconocido {n.id!r}")
+    _validar(arbol, si)
+    return arbol
+
+def _validar(n: ast.expr, si: str) -> None:
+    if isinstance(n, ast.BoolOp):
+        for v in n.values:
+            _validar(v, si)
+    elif isinstance(n, ast.UnaryOp) and isinstance(n.op, ast.Not):
+        _validar(n.operand, si)
+    elif isinstance(n, ast.Compare):
+        if len(n.ops) != 1 or not isinstance(n.ops[0], _OPERADORES) or not isinstance(n.left, ast.Name):
+            raise ReglasInvalidas(f"{si!r}: se espera `campo <op> constante` en {ast.unparse(n)!r}")
+        derecha = n.comparators[0]
+        if isinstance(n.ops[0], (ast.In, ast.NotIn)):
+            valores = derecha.elts if isinstance(derecha, (ast.Tuple, ast.List)) else [None]
+        else:
+            valores = [derecha]
+        if not all(isinstance(v, ast.Constant) and isinstance(v.value, (str, int)) for v in valores):
+            raise ReglasInvalidas(f"{si!r}: {ast.unparse(derecha)!r} no es una constante (o tupla de constantes)")
+    elif not isinstance(n, ast.Name):
+        raise ReglasInvalidas(f"{si!r}: no se admite {ast.unparse(n)!r}")
+
+def _campos_mensaje(mensaje: str) -> List[Tuple[str, str]]:
+    """Plantilla "Vómitos {vom_g} → ..." → [(literal, campo o "")]."""
+    try:
+        partes = list(string.Formatter().parse(mensaje))
+    except ValueError as e:
+        raise ReglasInvalidas(f"mensaje inválido {mensaje!r}: {e}") from None
+    for _, campo, formato, conversion in partes:
+        if campo is not None and (campo not in CAMPOS or formato or conversion):
+            raise ReglasInvalidas(f"mensaje {mensaje!r}: solo se admiten campos simples, como {{vom_g}}")
+    return [(literal, campo or "") for literal, campo, _, _ in partes]
+
+def campos(reglas: Iterable[Regla], mensajes: bool = False) -> Tuple[str, ...]:
+    """Campos que leen las condiciones (con `mensajes`, también los que se interpolan en el texto)."""
+    usados = {n.id for r in reglas for n in ast.walk(analizar(r.si)) if isinstance(n, ast.Name)}
+    if mensajes:
+        usados |= {c for r in reglas for _, c in _campos_mensaje(r.mensaje) if c}
+    return tuple(sorted(usados))
+
+MAX_ESCALAN = 32
+
+def leer(texto: str, prioridad: Dict[str, int], pasos: Iterable[int]) -> Tuple[str, List[Regla]]:
+    """JSON de reglas → (versión, reglas en orden). Lanza `ReglasInvalidas` con el motivo."""
+    try:
+        doc = json.loads(texto)
+    except ValueError as e:
+        raise ReglasInvalidas(f"JSON inválido: {e}") from None
+    if not isinstance(doc, dict) or not isinstance(doc.get("version"), str) or not doc["version"].strip():
+        raise ReglasInvalidas('se espera {"version": "...", "reglas": [...]}')
+    if not isinstance(doc.get("reglas"), list):
+        raise ReglasInvalidas('"reglas" debe ser una lista')
+    pasos, reglas, ids = set(pasos), [], set()
+    for i, r in enumerate(doc["reglas"]):
+        if not isinstance(r, dict) or not {"id", "paso", "si", "mensaje"} <= r.keys() <= _CLAVES:
+            raise ReglasInvalidas(f"regla #{i}: claves esperadas {sorted(_CLAVES)} (id, paso, si y mensaje obligatorias)")
+        regla = Regla(r["id"], r["paso"], r["si"], r.get("recomendacion", "Continuar"), r["mensaje"], r.get("leyenda", ""))
+        if not isinstance(regla.id, str) or not regla.id.isidentifier() or regla.id in ids:
+            raise ReglasInvalidas(f"regla #{i}: id {regla.id!r} inválido o repetido")
+        if regla.paso not in pasos:
+            raise ReglasInvalidas(f"{regla.id}: paso {regla.paso!r} fuera de {sorted(pasos)}")
+        if regla.recomendacion not in prioridad:
+            raise ReglasInvalidas(f"{regla.id}: recomendación {regla.recomendacion!r} fuera de {list(prioridad)}")
+        if not all(isinstance(v, str) for v in (regla.si, regla.mensaje, regla.leyenda)):
+            raise ReglasInvalidas(f"{regla.id}: si, mensaje y leyenda son textos")
+        analizar(regla.si)
+        _campos_mensaje(regla.mensaje)
+        # Solo los mensajes que escalan llevan la derivación en negrita (ver `motor.reglas_disparadas`)
+        escala = prioridad[regla.recomendacion] > 0
+        if ("**" in regla.mensaje) != escala or (escala and not marca(regla)):
+            raise ReglasInvalidas(f"{regla.id}: el mensaje debe empezar con texto fijo y llevar la derivación "
+                                  "en **negrita** si (y solo si) la regla eleva la recomendación")
+        ids.add(regla.id)
+        reglas.append(regla)
+    marcas = [(marca(r), r.id) for r in reglas if prioridad[r.recomendacion] > 0]
+    if len(marcas) > MAX_ESCALAN:  # la analítica guarda las reglas disparadas en una máscara de 32 bits
+        raise ReglasInvalidas(f"a lo sumo {MAX_ESCALAN} reglas pueden elevar la recomendación")
+    for m, id in marcas:
+        for otra, otro in marcas:
+            if id != otro and otra.startswith(m):
+                raise ReglasInvalidas(f"{id} y {otro}: los mensajes deben distinguirse por su comienzo")
+    return doc["version"].strip(), reglas
+
+# ──────────────────────────────────────────────────────────────
+# Compilación a Python
+# ──────────────────────────────────────────────────────────────
+class _ACampos(ast.NodeTransformer):
+    # `campo` → `data['campo']`; listas de constantes → tuplas
+    def visit_Name(self, n):
+        return ast.Subscript(ast.Name("data", ast.Load()), ast.Constant(n.id), ast.Load())
+    def visit_List(self, n):
+        return ast.Tuple(n.elts, ast.Load())
+
+def conjunciones(si: str) -> List[str]:
+    """Términos del `and` de primer nivel de una condición, ya como código Python."""
+    arbol = _ACampos().visit(analizar(si))
+    partes = arbol.values if isinstance(arbol, ast.BoolOp) and isinstance(arbol.op, ast.And) else [arbol]
+    return [ast.unparse(p) for p in partes]
+
+def _mensaje_py(mensaje: str) -> str:
+    partes = []
+    for literal, campo in _campos_mensaje(mensaje):
+        if literal:
+            partes.append(ast.Constant(literal))
+        if campo:
+            partes.append(ast.FormattedValue(ast.Subscript(ast.Name("data", ast.Load()), ast.Constant(campo),
+                                                           ast.Load()), -1, None))
+    if all(isinstance(p, ast.Constant) for p in partes):
+        return repr("".join(p.value for p in partes))
+    return ast.unparse(ast.JoinedStr(partes))
+
+def _arbol(items: List[Tuple[List[str], List[str]]], sangria: str) -> List[str]:
+    """Reglas consecutivas que comparten el primer término quedan bajo un mismo `if`."""
+    lineas, i = [], 0
+    while i < len(items):
+        terminos, accion = items[i]
+        if not terminos:
+            lineas += [sangria + a for a in accion]
+            i += 1
+            continue
+        j = i + 1
+        while j < len(items) and items[j][0][:1] == terminos[:1]:
+            j += 1
+        if j - i == 1:
+            lineas.append(f"{sangria}if {' and '.join(terminos)}:")
+            lineas += [sangria + "    " + a for a in accion]
+        else:
+            lineas.append(f"{sangria}if {terminos[0]}:")
+            lineas += _arbol([(t[1:], a) for t, a in items[i:j]], sangria + "    ")
+        i = j
+    return lineas
+
+def _accion(regla: Regla, prioridad: Dict[str, int]) -> List[str]:
+    p = prioridad[regla.recomendacion]
+    subir = [f"if nivel < {p}:", f"    nivel = {p}"] if p else []
+    return subir + [f"msgs.append({_mensaje_py(regla.mensaje)})"]
+
+def _fusionar(cuerpo: List[ast.stmt], items: List[Tuple[List[str], List[str]]], sangria: str) -> List[str]:
+    """Sentencias del resumen + reglas. Las reglas cuyo primer término es la condición de un `if`
+    del resumen van dentro de ese `if` (sin repetir la prueba), mientras eso conserve su orden."""
+    anexos, k, i = {}, 0, 0
+    while i < len(items) and items[i][0]:
+        t = items[i][0][0]
+        j = next((j for j in range(k, len(cuerpo))
+                  if isinstance(cuerpo[j], ast.If) and ast.unparse(cuerpo[j].test) == t), None)
+        if j is None:
+            break
+        while i < len(items) and items[i][0][:1] == [t]:
+            anexos.setdefault(j, []).append((items[i][0][1:], items[i][1]))
+            i += 1
+        k = j
+    lineas = []
+    for j, s in enumerate(cuerpo):
+        if j not in anexos:
+            lineas += [sangria + l for l in ast.unparse(s).splitlines()]
+            continue
+        lineas.append(f"{sangria}if {ast.unparse(s.test)}:")
+        lineas += _fusionar(s.body, anexos[j], sangria + "    ")
+        if s.orelse:
+            lineas.append(f"{sangria}else:")
+            lineas += [sangria + "    " + l for o in s.orelse for l in ast.unparse(o).splitlines()]
+    return lineas + _arbol(items[i:], sangria)
+
+def _fuente(fn: Callable) -> Optional[ast.FunctionDef]:
+    try:
+        return ast.parse(textwrap.dedent(inspect.getsource(fn))).body[0]
+    except (OSError, TypeError):  # sin código fuente (p. ej. solo .pyc)
+        return None
+
+def campos_resumen(fn: Callable) -> Optional[Set[str]]:
+    """Campos que lee un resumen de paso (`data["campo"]`); None sin código fuente o si usa `data`
+    de otra forma (no se puede saber qué lee)."""
+    arbol = _fuente(fn)
+    if arbol is None:
+        return None
+    data = arbol.args.args[0].arg
+    usos = [n for n in ast.walk(arbol) if isinstance(n, ast.Name) and n.id == data]
+    leidos = [n.slice.value for n in ast.walk(arbol) if isinstance(n, ast.Subscript) and n.value in usos
+              and isinstance(n.slice, ast.Constant)]
+    return set(leidos) if len(leidos) == len(usos) else None
+
+def _codigo_paso(reglas: List[Regla], detalle: Callable, prioridad: Dict[str, int], en_linea: bool) -> List[str]:
+    """Cuerpo (sin sangría) de un paso: resumen de respuestas + reglas del paso, en ese orden."""
+    items = [(conjunciones(r.si), _accion(r, prioridad)) for r in reglas]
+    fn = _fuente(detalle) if en_linea else None
+    if fn is None:  # se llama a la función del resumen
+        return [f"{detalle.__name__}(data, det)"] + _arbol(items, "")
+    cuerpo = [s for s in fn.body if not (isinstance(s, ast.Expr) and isinstance(s.value, ast.Constant))]
+    return _fusionar(cuerpo, items, "")
+
+def compilar(version: str, reglas: List[Regla], detalles: Dict[int, Callable], prioridad: Dict[str, int],
+             globales: Dict, en_linea: bool = True) -> Tuple[Callable, Dict[int, Tuple[Callable, str]]]:
+    """(evaluar, {paso: (bloque, recomendación más alta del paso)}) generados para estas reglas.
+
+    `detalles` son las funciones `(data, det)` que resumen las respuestas de cada paso; se copian
+    en línea (con `en_linea=False`, o sin código fuente, se llaman). `globales` es el espacio de
+    nombres del código generado (el de `motor`).
+    """
+    nombres = tuple(sorted(prioridad, key=prioridad.get))
+    por_paso = {p: [r for r in reglas if r.paso == p] for p in detalles}
+    cuerpos = {p: _codigo_paso(por_paso[p], detalles[p], prioridad, en_linea) for p in sorted(detalles)}
+    sangrar = lambda lineas: ["    " + l for l in lineas]
+
+    src = ["def evaluar(data):", "    nivel = 0; msgs = []; det = {}"]
+    for p, cuerpo in cuerpos.items():
+        src += [f"    # paso {p}"] + sangrar(cuerpo)
+    src.append(f"    return {{'recomendacion': {nombres!r}[nivel], 'mensajes': msgs, 'detalles': det, "
+               f"'version_reglas': {version!r}}}")
+    for p, cuerpo in cuerpos.items():
+        src += ["", f"def paso_{p}(data, msgs, det):", "    nivel = 0"] + sangrar(cuerpo)
+        src.append(f"    return {nombres!r}[nivel]")
+    fuente = "\n".join(src) + "\n"
+
+    archivo = f"<reglas {version}>"
+    linecache.cache[archivo] = (len(fuente), None, fuente.splitlines(True), archivo)
+    espacio = {}
+    exec(compile(fuente, archivo, "exec"), globales, espacio)
+    topes = {p: max((r.recomendacion for r in por_paso[p]), key=prioridad.get, default=nombres[0]) for p in detalles}
+    return espacio["evaluar"], {p: (espacio[f"paso_{p}"], topes[p]) for p in sorted(detalles)}
+
+# ──────────────────────────────────────────────────────────────
+# Textos derivados (leyenda, descripciones, marcas de mensaje)
+# ──────────────────────────────────────────────────────────────
+def descripcion(regla: Regla) -> str:
+    """"Náuseas **2–3**" + Guardia → "Náuseas 2–3 → Guardia"."""
+    return f"{(regla.leyenda or regla.id).replace('**', '')} → {regla.recomendacion}"
+
+def marca(regla: Regla) -> str:
+    """Comienzo fijo del mensaje (hasta el primer campo): identifica la regla en un resultado."""
+    return _campos_mensaje(regla.mensaje)[0][0]
+
+def leyenda(version: str, reglas: List[Regla], prioridad: Dict[str, int]) -> str:
+    """Markdown de derivaciones para el panel de referencias, agrupado por recomendación."""
+    lineas = [f"**Derivación (del flujograma · reglas {version})**"]
+    for rec in sorted(prioridad, key=prioridad.get, reverse=True):
+        textos = [r.leyenda for r in reglas if r.recomendacion == rec and r.leyenda]
+        if textos:
+            lineas.append(f"- **{_ROTULOS.get(rec, rec)}**: " + " · ".join(textos))
+    return "\n".join(lineas)
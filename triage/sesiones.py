@@ -0,0 +1,147 @@
+# Estado del wizard fuera del proceso de Streamlit: paso actual, respuestas e informe final.
+# Con el estado externo, cualquier worker detrás del balanceador retoma un formulario a medio
+# llenar (la sesión viaja en la URL, `?sesion=<id>`), y un reinicio no borra nada.
+#
+# Backends intercambiables, misma interfaz (cargar / guardar / borrar / purgar):
+#   sqlite:///datos/sesiones.sqlite   (por defecto) una fila por sesión, WAL, varios procesos
+#   archivos:///datos/sesiones         un JSON por sesión, reemplazo atómico (NFS / volumen compartido)
+# Un caché compartido real (Redis, memcached) entra implementando esos cuatro métodos.
+#
+# Solo viajan diffs: `guardar` recibe los campos que cambiaron desde el último guardado, con
+# semántica de JSON merge patch (RFC 7396): `null` borra la clave, y un campo ausente vale su
+# valor por defecto. Un borrador recién empezado ocupa `{}`.
+
+import json, os, re, sqlite3, threading, time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from triage.almacen import directorio_datos
+
+ID_VALIDO = re.compile(r"[0-9a-f]{32}")  # uuid4().hex; también es el nombre de archivo
+VIGENCIA = 7 * 24 * 3600  # borradores sin actividad por más de una semana se descartan
+
+def _aplicar(datos: Dict, cambios: Dict) -> Dict:
+    for k, v in cambios.items():
+        if v is None:
+            datos.pop(k, None)
+        else:
+            datos[k] = v
+    return datos
+
+class SesionesSQLite:
+    """Una fila por sesión; el diff se aplica dentro de SQLite con `json_patch` (un solo UPSERT)."""
+    _ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS sesiones (
+        id TEXT PRIMARY KEY,
+        paso INTEGER NOT NULL,
+        datos TEXT NOT NULL,
+        informe TEXT,
+        actualizado REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS ix_sesiones_actualizado ON sesiones (actualizado);
+    """
+    _GUARDAR = """
+    INSERT INTO sesiones (id, paso, datos, informe, actualizado) VALUES (?, ?, json_patch('{}', ?), ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        paso = excluded.paso,
+        datos = json_patch(datos, excluded.datos),
+        informe = COALESCE(excluded.informe, informe),
+        actualizado = excluded.actualizado
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        # Una conexión por proceso, compartida por todos los hilos (Streamlit corre cada rerun en un
+        # hilo nuevo) y protegida por un lock: cada operación es una sola sentencia corta
+        self._con = sqlite3.connect(ruta, timeout=10, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._con.execute("PRAGMA journal_mode=WAL")
+        # Sin fsync por paso: ante un corte de luz se pierde a lo sumo el último paso del
+        # borrador; un reinicio del proceso no pierde nada (el WAL ya está en el SO)
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._con as con:
+            con.executescript(self._ESQUEMA)
+
+    def cargar(self, id: str) -> Optional[Dict]:
+        with self._lock:
+            fila = self._con.execute("SELECT paso, datos, informe FROM sesiones WHERE id = ?", (id,)).fetchone()
+        if fila is None:
+            return None
+        return {"paso": fila[0], "datos": json.loads(fila[1]), "informe": fila[2] and json.loads(fila[2])}
+
+    def guardar(self, id: str, paso: int, cambios: Dict, informe: Dict = None) -> None:
+        with self._lock, self._con as con:
+            con.execute(self._GUARDAR, (id, paso, json.dumps(cambios, ensure_ascii=False),
+                                        informe and json.dumps(informe, ensure_ascii=False), time.time()))
+
+    def borrar(self, id: str) -> None:
+        with self._lock, self._con as con:
+            con.execute("DELETE FROM sesiones WHERE id = ?", (id,))
+
+    def purgar(self, antiguedad: float) -> int:
+        """Borra las sesiones sin actividad en los últimos `antiguedad` segundos."""
+        with self._lock, self._con as con:
+            return con.execute("DELETE FROM sesiones WHERE actualizado < ?", (time.time() - antiguedad,)).rowcount
+
+class SesionesArchivos:
+    """Un JSON por sesión; se reescribe con `os.replace` (atómico). Cada sesión la escribe una sola
+    pestaña a la vez, así que no hace falta bloqueo entre procesos."""
+
+    def __init__(self, directorio: str):
+        self.dir = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, id: str) -> str:
+        if not ID_VALIDO.fullmatch(id):
+            raise ValueError(f"id de sesión inválido: {id!r}")
+        return os.path.join(self.dir, id + ".json")
+
+    def cargar(self, id: str) -> Optional[Dict]:
+        try:
+            with open(self._ruta(id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def guardar(self, id: str, paso: int, cambios: Dict, informe: Dict = None) -> None:
+        ruta = self._ruta(id)
+        s = self.cargar(id) or {"paso": paso, "datos": {}, "informe": None}
+        s["paso"] = paso
+        _aplicar(s["datos"], cambios)
+        if informe is not None:
+            s["informe"] = informe
+        tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(s, f, ensure_ascii=False)
+        os.replace(tmp, ruta)
+
+    def borrar(self, id: str) -> None:
+        try:
+            os.remove(self._ruta(id))
+        except FileNotFoundError:
+            pass
+
+    def purgar(self, antiguedad: float) -> int:
+        limite, n = time.time() - antiguedad, 0
+        for e in os.scandir(self.dir):
+            if e.name.endswith(".json") and e.stat().st_mtime < limite:
+                os.remove(e.path)
+                n += 1
+        return n
+
+BACKENDS = {"sqlite": SesionesSQLite, "archivos": SesionesArchivos}
+
+def abrir(url: str = None):
+    """`sqlite:///ruta.sqlite` o `archivos:///directorio`; por defecto TRIAGE_SESIONES o
+    `<TRIAGE_DATOS>/sesiones.sqlite`. Rutas relativas: `sqlite:datos/sesiones.sqlite`."""
+    url = url or os.environ.get("TRIAGE_SESIONES") or "sqlite:" + os.path.join(directorio_datos(), "sesiones.sqlite")
+    u = urlparse(url)
+    if u.scheme not in BACKENDS:
+        raise ValueError(f"backend de sesiones desconocido: {u.scheme!r} (opciones: {', '.join(BACKENDS)})")
+    return BACKENDS[u.scheme](u.netloc + u.path)
+
+def diff(anterior: Dict, actual: Dict, defectos: Dict) -> Dict:
+    """Campos de `actual` que cambiaron respecto de `anterior`; los que volvieron a su valor por
+    defecto van como None (se borran del borrador guardado)."""
+    return {k: None if v == defectos.get(k) else v for k, v in actual.items() if anterior.get(k) != v}
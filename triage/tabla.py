@@ -0,0 +1,160 @@
+# Tabla de decisión memoizada sobre las reglas vigentes: `evaluar` da el mismo resultado que
+# `motor.evaluar`, pero lo que depende solo de respuestas con dominio finito se calcula una vez
+# por clave y después es un lookup.
+#   python -m triage.tabla                 # verifica la tabla contra `motor.evaluar` (exhaustivo por paso)
+#   python -m triage.tabla --muestras 1e6  # + muestras aleatorias del cuestionario completo
+#
+# La clave son los valores de los campos que leen las condiciones (`lotes.campos_batch`), los que
+# se interpolan en los mensajes y los que resumen los pasos con reglas (3–7: ECOG y bloques por
+# sistema; todos de dominio finito). Por clave se guardan la recomendación, los mensajes y esos
+# detalles; los pasos sin reglas (DNI y fecha, momento y RT, texto libre) se resumen en cada
+# llamada. La tabla pertenece a un `motor.Vigentes`: cuando las reglas se recargan, la próxima
+# llamada arma otra y la anterior se descarta.
+#
+# Armar la clave cuesta lo mismo con cualquier cuestionario, mientras que el `evaluar` compilado
+# corta en cada bloque apagado: con cuestionarios livianos la tabla es más lenta, con muchos
+# bloques activos y entradas que se repiten evalúa 1,3–1,7× más rápido. Por eso la API y el CLI
+# masivo la usan solo con `--tabla`.
+
+import argparse, itertools, operator, random, sys, time
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from triage.motor import DETALLES, Vigentes, evaluar as evaluar_motor, vigentes
+from triage.registro import DEFECTOS, Cuestionario
+from triage.validacion import CAMPOS as DOMINIOS
+
+MAX_CLAVES = 1 << 14  # entradas por tabla; al llenarse se vacía y vuelve a llenarse
+
+_FINITOS = {c for c, (tipo, dominio) in DOMINIOS.items() if tipo == "bool" or dominio is not None}
+
+class Tabla:
+    """Tabla de un juego de reglas: clave → (recomendación, mensajes, detalles de cada tramo)."""
+    def __init__(self, v: Vigentes):
+        from triage import reglas as _reglas  # ya importado al cargar `v` (ver `motor`)
+        self.vigentes = v
+        resumenes = {p: _reglas.campos_resumen(fn) for p, fn in DETALLES.items()}
+        fijos = {p for p, leidos in resumenes.items()
+                 if leidos is not None and leidos <= _FINITOS and any(r.paso == p for r in v.reglas)}
+        self.campos = tuple(sorted(set(_reglas.campos(v.reglas, mensajes=True)).union(*(resumenes[p] for p in fijos))))
+        # Pasos en orden: función de resumen (se llama siempre) o nº de tramo de pasos fijos seguidos
+        self.plan: List[Union[Callable, int]] = []
+        self.tramos: List[List[Callable]] = []
+        for p in sorted(DETALLES):
+            if p not in fijos:
+                self.plan.append(DETALLES[p])
+            elif self.plan and self.plan[-1].__class__ is int:
+                self.tramos[-1].append(DETALLES[p])
+            else:
+                self.plan.append(len(self.tramos))
+                self.tramos.append([DETALLES[p]])
+        self.memo: Dict[Tuple, Tuple] = {}
+        self.evaluar = self._compilar()
+
+    def _nueva(self, data, k: Tuple) -> Tuple:
+        res = self.vigentes.evaluar(data)
+        dets = []
+        for tramo in self.tramos:
+            det = {}
+            for fn in tramo:
+                fn(data, det)
+            dets.append(det)
+        if len(self.memo) >= MAX_CLAVES:
+            self.memo.clear()
+        e = self.memo[k] = (res["recomendacion"], tuple(res["mensajes"]), *dets)
+        return e
+
+    def _compilar(self) -> Callable:
+        """`evaluar` generado con el plan desenrollado (como el de `triage.reglas`)."""
+        espacio = {"clave": operator.itemgetter(*self.campos), "buscar": self.memo.get, "nueva": self._nueva}
+        src = ["def evaluar(data):", "    k = clave(data)", "    e = buscar(k) or nueva(data, k)", "    det = {}"]
+        for paso in self.plan:
+            if paso.__class__ is int:
+                src.append(f"    det.update(e[{2 + paso}])")
+            else:
+                espacio[paso.__name__] = paso
+                src.append(f"    {paso.__name__}(data, det)")
+        src.append(f"    return {{'recomendacion': e[0], 'mensajes': list(e[1]), 'detalles': det, "
+                   f"'version_reglas': {self.vigentes.version!r}}}")
+        exec(compile("\n".join(src) + "\n", f"<tabla {self.vigentes.version}>", "exec"), espacio)
+        return espacio["evaluar"]
+
+_TABLA: Optional[Tabla] = None
+
+def tabla() -> Tabla:
+    """Tabla de las reglas vigentes (se arma de nuevo si se recargaron)."""
+    global _TABLA
+    t, v = _TABLA, vigentes()
+    if t is None or t.vigentes is not v:
+        t = _TABLA = Tabla(v)
+    return t
+
+def evaluar(data: Union[Cuestionario, Dict]) -> Dict:
+    """Mismo resultado que `motor.evaluar(data)`, leyendo la tabla de las reglas vigentes."""
+    return tabla().evaluar(data)
+
+# ──────────────────────────────────────────────────────────────
+# Verificación contra `motor.evaluar`
+# ──────────────────────────────────────────────────────────────
+_LIBRES = {"dni": ("", "30111222"), "fecha": (date(2024, 1, 1), date(2024, 12, 31)),
+           "otros": ("", "Control en 48 h.")}  # campos sin dominio finito: valores de prueba
+
+def valores(campo: str) -> tuple:
+    tipo, dominio = DOMINIOS[campo]
+    return _LIBRES[campo] if campo in _LIBRES else (False, True) if tipo == "bool" else tuple(dominio)
+
+_BASE = dict(DEFECTOS, dni="0", fecha=date(2000, 1, 1), momento="< 7 días")
+_OTRO = dict(dni="27999888", fecha=date(2023, 3, 15), otros="Refiere cansancio.")  # mismo valor de clave
+
+def combinaciones(v: Vigentes) -> Iterator[Tuple[int, Dict]]:
+    """(paso, cuestionario): por paso, todas las combinaciones de los campos que leen sus reglas y su
+    resumen (el resto en los valores por defecto). Los pasos deciden por separado."""
+    from triage import reglas as _reglas
+    for p, fn in sorted(DETALLES.items()):
+        leidos = _reglas.campos_resumen(fn) or set()
+        campos = sorted(leidos.union(_reglas.campos([r for r in v.reglas if r.paso == p], mensajes=True)))
+        for vals in itertools.product(*map(valores, campos)):
+            yield p, dict(_BASE, **dict(zip(campos, vals)))
+
+def muestra(rng: random.Random) -> Dict:
+    return {c: rng.choice(valores(c)) for c in DOMINIOS}
+
+def verificar(muestras: int = 0, seed: int = 0) -> Tuple[int, List[Tuple[str, Dict, Dict, Dict]]]:
+    """Compara la tabla con `motor.evaluar`; devuelve (nº de combinaciones, diferencias
+    (origen, entrada, tabla, evaluar)). Cada combinación se evalúa dos veces: la primera llena la
+    tabla y la segunda, con otro DNI, fecha y texto libre, la lee."""
+    t, difs, n = tabla(), [], 0
+    def chequear(origen, data):
+        real, tab = evaluar_motor(data), t.evaluar(data)
+        if tab != real or list(tab["detalles"]) != list(real["detalles"]):
+            difs.append((origen, data, tab, real))
+    for p, data in combinaciones(t.vigentes):
+        n += 1
+        chequear(f"paso {p}", data)
+        chequear(f"paso {p}, leída", dict(data, **_OTRO))
+    rng = random.Random(seed)
+    for _ in range(muestras):
+        chequear("muestra", muestra(rng))
+    return n, difs
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m triage.tabla",
+                                 description="Verifica la tabla de decisión contra evaluar.")
+    ap.add_argument("--muestras", type=float, default=0, help="muestras aleatorias del cuestionario completo")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    n, difs = verificar(int(args.muestras), args.seed)
+    t = tabla()
+    print(f"reglas {t.vigentes.version}: clave de {len(t.campos)} campos")
+    print(f"{n:,} combinaciones por paso (×2) + {int(args.muestras):,} muestras en {time.perf_counter() - t0:.1f} s")
+    for origen, data, tab, real in difs[:20]:
+        print(f"DIFERENCIA [{origen}] {data!r}\n  tabla:   {tab}\n  evaluar: {real}")
+    if difs:
+        print(f"{len(difs)} diferencias")
+        return 1
+    print("sin diferencias")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
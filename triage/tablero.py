@@ -0,0 +1,206 @@
+# Tablero de guardia: casos pendientes de todas las sesiones, por prioridad y después por hora.
+# Cola de prioridad indexada (heap binario + posición de cada caso): un resultado nuevo o un caso
+# atendido cuesta O(log n), y listar los primeros k cuesta O(k log k), sin reordenar todo en cada
+# refresco. La cola se alimenta incrementalmente del índice del almacén (ids nuevos, también los
+# que guardan otros workers) y de la tabla de atenciones; cada cambio sube `version` y queda en un
+# registro corto de eventos para empujar diffs a los clientes (SSE en `triage.api`).
+# Los "Continuar" no entran (no piden nada a la guardia) y los casos vencen a las `horas` de
+# guardados, igual que la ventana con la que arranca el tablero.
+
+import collections, heapq, os, sqlite3, threading
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from triage.almacen import Almacen
+from triage.motor import PRIORIDAD
+
+ATENCIONES = "tablero.sqlite"
+MAX_EVENTOS = 10_000  # un cliente más atrasado que esto recibe una foto completa
+PENDIENTES = tuple(rec for rec in sorted(PRIORIDAD, key=PRIORIDAD.get, reverse=True) if PRIORIDAD[rec] > 0)
+
+class ColaIndexada:
+    """Heap binario de ids con clave mutable: alta, baja y cambio de clave en O(log n)."""
+
+    def __init__(self):
+        self._heap: List[Hashable] = []
+        self._pos: Dict[Hashable, int] = {}
+        self._clave: Dict[Hashable, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, id) -> bool:
+        return id in self._pos
+
+    def poner(self, id, clave: tuple) -> None:
+        if id in self._pos:
+            anterior, self._clave[id] = self._clave[id], clave
+            (self._subir if clave < anterior else self._bajar)(self._pos[id])
+            return
+        self._clave[id] = clave
+        self._heap.append(id)
+        self._pos[id] = len(self._heap) - 1
+        self._subir(len(self._heap) - 1)
+
+    def quitar(self, id) -> bool:
+        i = self._pos.pop(id, None)
+        if i is None:
+            return False
+        del self._clave[id]
+        ultimo = self._heap.pop()
+        if i < len(self._heap):
+            self._heap[i] = ultimo
+            self._pos[ultimo] = i
+            self._subir(i)
+            self._bajar(self._pos[ultimo])
+        return True
+
+    def primeros(self, k: int) -> List:
+        """Los k ids de menor clave, en orden. Recorre el heap con un heap auxiliar de la frontera."""
+        h, clave, salida = self._heap, self._clave, []
+        frontera = [(clave[h[0]], 0)] if h else []
+        while frontera and len(salida) < k:
+            _, i = heapq.heappop(frontera)
+            salida.append(h[i])
+            for j in (2 * i + 1, 2 * i + 2):
+                if j < len(h):
+                    heapq.heappush(frontera, (clave[h[j]], j))
+        return salida
+
+    def _subir(self, i: int) -> None:
+        h, pos, clave = self._heap, self._pos, self._clave
+        id = h[i]
+        while i:
+            padre = (i - 1) >> 1
+            if clave[h[padre]] <= clave[id]:
+                break
+            h[i] = h[padre]
+            pos[h[i]] = i
+            i = padre
+        h[i] = id
+        pos[id] = i
+
+    def _bajar(self, i: int) -> None:
+        h, pos, clave = self._heap, self._pos, self._clave
+        n, id = len(h), h[i]
+        while (hijo := 2 * i + 1) < n:
+            if hijo + 1 < n and clave[h[hijo + 1]] < clave[h[hijo]]:
+                hijo += 1
+            if clave[id] <= clave[h[hijo]]:
+                break
+            h[i] = h[hijo]
+            pos[h[i]] = i
+            i = hijo
+        h[i] = id
+        pos[id] = i
+
+def clave_caso(caso: Dict) -> tuple:
+    # Más urgente primero; dentro de la misma prioridad, el que espera hace más tiempo
+    return (-PRIORIDAD[caso["recomendacion"]], caso["timestamp"], caso["id"])
+
+class Tablero:
+    """Casos pendientes (no "Continuar") guardados en las últimas `horas`; los que vayan llegando
+    entran y los que superan la ventana salen en cada sincronización."""
+
+    def __init__(self, almacen: Almacen, horas: float = 24):
+        self.almacen = almacen
+        self.horas = horas
+        self.cola = ColaIndexada()
+        self.casos: Dict[int, Dict] = {}
+        self._llegadas = collections.deque()  # (timestamp, id) en orden de id, que es el de guardado
+        self._conteos = collections.Counter()
+        self.version = 0
+        self._eventos = collections.deque(maxlen=MAX_EVENTOS)  # (version, tipo, dato)
+        self._cambio = threading.Condition()
+        self._atenciones = sqlite3.connect(os.path.join(almacen.dir, ATENCIONES), check_same_thread=False)
+        with self._atenciones as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS atenciones "
+                        "(seq INTEGER PRIMARY KEY, id INTEGER NOT NULL UNIQUE, cuando TEXT NOT NULL)")
+        self._ultimo_id = almacen.ultimo_id_antes(self._limite())
+        self._ultima_atencion = 0
+        self._adelantados = set()  # atendidos en otro proceso antes de que este viera el caso
+        self.sincronizar()
+
+    def _limite(self) -> str:
+        return (datetime.now() - timedelta(hours=self.horas)).isoformat(timespec="seconds")
+
+    # ── Actualización incremental ──────────────────────────────
+    def sincronizar(self) -> bool:
+        """Incorpora resultados y atenciones nuevos (de cualquier proceso) y vence los casos fuera
+        de la ventana. Dos lecturas por rango de PK; sin novedades no toca la cola. Devuelve True si
+        algo cambió."""
+        limite = self._limite()
+        with self._cambio:
+            atendidos = self._atenciones.execute(
+                "SELECT seq, id FROM atenciones WHERE seq > ? ORDER BY seq", (self._ultima_atencion,)).fetchall()
+            if atendidos:
+                self._ultima_atencion = atendidos[-1][0]
+            cambios = []
+            for _, id in atendidos:
+                if self.cola.quitar(id):
+                    self._conteos[self.casos.pop(id)["recomendacion"]] -= 1
+                    cambios.append(("baja", {"id": id}))
+                elif id > self._ultimo_id:
+                    self._adelantados.add(id)
+            for caso in self.almacen.posteriores(self._ultimo_id):
+                self._ultimo_id = caso["id"]
+                if caso["id"] in self._adelantados:
+                    self._adelantados.discard(caso["id"])
+                    continue
+                if caso["recomendacion"] not in PENDIENTES or caso["timestamp"] < limite:
+                    continue
+                self.casos[caso["id"]] = caso
+                self.cola.poner(caso["id"], clave_caso(caso))
+                self._llegadas.append((caso["timestamp"], caso["id"]))
+                self._conteos[caso["recomendacion"]] += 1
+                cambios.append(("alta", caso))
+            while self._llegadas and self._llegadas[0][0] < limite:  # vencidos: O(1) por caso
+                id = self._llegadas.popleft()[1]
+                if self.cola.quitar(id):  # los ya atendidos ya salieron
+                    self._conteos[self.casos.pop(id)["recomendacion"]] -= 1
+                    cambios.append(("baja", {"id": id}))
+            if cambios:
+                for tipo, dato in cambios:
+                    self.version += 1
+                    self._eventos.append((self.version, tipo, dato))
+                self._cambio.notify_all()
+            return bool(cambios)
+
+    def atender(self, id: int) -> bool:
+        """Marca un caso como atendido (lo ven todos los procesos en su próxima sincronización)."""
+        with self._cambio, self._atenciones as con:
+            con.execute("INSERT OR IGNORE INTO atenciones (id, cuando) VALUES (?, ?)",
+                        (id, datetime.now().isoformat(timespec="seconds")))
+        return self.sincronizar()
+
+    # ── Lectura ────────────────────────────────────────────────
+    def primeros(self, k: int = 100) -> List[Dict]:
+        with self._cambio:
+            return [self.casos[id] for id in self.cola.primeros(k)]
+
+    def conteos(self) -> Dict[str, int]:
+        with self._cambio:
+            return {rec: self._conteos[rec] for rec in PENDIENTES}
+
+    def foto(self, k: int = 100) -> Dict:
+        with self._cambio:
+            return {"version": self.version, "total": len(self.cola), "conteos": self.conteos(),
+                    "casos": self.primeros(k)}
+
+    def eventos_desde(self, version: int) -> Optional[List[Tuple[int, str, Dict]]]:
+        """Eventos posteriores a `version`, o None si ya salieron del registro o la versión es de
+        otro proceso (pedir `foto`)."""
+        with self._cambio:
+            if version > self.version:
+                return None
+            if version == self.version:
+                return []
+            if not self._eventos or self._eventos[0][0] > version + 1:
+                return None
+            return [e for e in self._eventos if e[0] > version]
+
+    def esperar(self, version: int, timeout: float = None) -> bool:
+        """Bloquea hasta que `self.version` supere `version` (o venza `timeout`)."""
+        with self._cambio:
+            return self._cambio.wait_for(lambda: self.version > version, timeout)
@@ -0,0 +1,120 @@
+# Validación/normalización de cuestionarios externos (CSV, JSONL, HTTP) al formato de `evaluar`.
+# Los dominios y valores por defecto son los mismos que arma el wizard en los pasos 1–8.
+
+from datetime import date
+from typing import Dict
+
+from triage.registro import DEFECTOS, Cuestionario
+
+MOMENTOS = ("< 7 días", "> 7 días", "Semana de descanso")
+RT_SEMANAS = ("< 7 días", "> 7 días", "> 14 días")
+RT_FINES = ("< 7 días", "> 7 días")
+PALIATIVOS = ("N/A", "Sí", "No")
+GRADOS_AE = ("A", "B", "C", "D", "E")
+
+_VERDADERO = {"1", "true", "t", "si", "sí", "s", "yes", "y"}
+_FALSO = {"0", "false", "f", "no", "n", ""}
+
+# campo: (tipo, dominio); los valores por defecto son los del wizard (`registro.DEFECTOS`)
+CAMPOS = {
+    "dni": ("str", None),
+    "fecha": ("fecha", None),
+    "momento": ("opcion", MOMENTOS),
+    "rt": ("bool", None),
+    "rt_en_curso": ("bool", None),
+    "rt_semana": ("opcion", RT_SEMANAS + (None,)),
+    "rt_fin": ("opcion", RT_FINES + (None,)),
+    "ecog": ("int", range(0, 5)),
+    "paliativos": ("opcion", PALIATIVOS),
+    "gi_on": ("bool", None),
+    "diarrea": ("bool", None),
+    "diarrea_g": ("int", range(0, 5)),
+    "lop": ("bool", None),
+    "lop_mas7": ("bool", None),
+    "nauseas": ("bool", None),
+    "nauseas_g": ("int", range(0, 4)),
+    "nauseas_ant": ("bool", None),
+    "vom_g": ("opcion", ("0",) + GRADOS_AE),
+    "dolor_abd": ("opcion", ("No",) + GRADOS_AE[:4]),
+    "derm_on": ("bool", None),
+    "mucositis": ("bool", None),
+    "mucositis_g": ("int", range(0, 4)),
+    "eritema": ("bool", None),
+    "eritema_g": ("opcion", GRADOS_AE),
+    "acne": ("bool", None),
+    "acne_g": ("int", range(0, 4)),
+    "smp": ("bool", None),
+    "smp_g": ("int", range(0, 4)),
+    "neuro_on": ("bool", None),
+    "neuropatia": ("bool", None),
+    "neuropatia_g": ("int", range(0, 4)),
+    "ototox": ("bool", None),
+    "cv_on": ("bool", None),
+    "sang_g": ("opcion", ("No", "0") + GRADOS_AE),
+    "hta": ("bool", None),
+    "hta_g": ("int", range(0, 5)),
+    "otros": ("str", None),
+}
+OBLIGATORIOS = {"dni", "fecha", "momento"}
+
+def _vacio(v) -> bool:
+    return v is None or (isinstance(v, str) and not v.strip())
+
+def _convertir(campo: str, tipo: str, dominio, v):
+    if tipo == "str":
+        return str(v).strip()
+    if tipo == "bool":
+        if isinstance(v, bool):
+            return v
+        s = str(v).strip().lower()
+        if s in _VERDADERO:
+            return True
+        if s in _FALSO:
+            return False
+        raise ValueError(f"{campo}: booleano inválido {v!r}")
+    if tipo == "int":
+        if isinstance(v, bool):
+            raise ValueError(f"{campo}: entero inválido {v!r}")
+        try:
+            n = int(str(v).strip())
+        except ValueError:
+            raise ValueError(f"{campo}: entero inválido {v!r}") from None
+        if n not in dominio:
+            raise ValueError(f"{campo}: {n} fuera de rango {dominio.start}–{dominio.stop - 1}")
+        return n
+    if tipo == "fecha":
+        if isinstance(v, date):
+            return v
+        try:
+            return date.fromisoformat(str(v).strip())
+        except ValueError:
+            raise ValueError(f"{campo}: fecha inválida {v!r} (se espera AAAA-MM-DD)") from None
+    s = str(v).strip()
+    if s not in dominio:
+        raise ValueError(f"{campo}: valor {v!r} no está en {[o for o in dominio if o is not None]}")
+    return s
+
+def normalizar(raw: Dict) -> Dict:
+    """Dict con todos los campos, listo para `evaluar`; lanza ValueError si algún campo es inválido.
+    La API y el CLI masivo evalúan este dict: leer de un dict es más rápido que de un Cuestionario."""
+    data = {}
+    for campo, (tipo, dominio) in CAMPOS.items():
+        v = raw.get(campo)
+        if v is None or (tipo != "str" and _vacio(v)):
+            if campo in OBLIGATORIOS:
+                raise ValueError(f"{campo}: campo obligatorio")
+            data[campo] = DEFECTOS[campo]
+            continue
+        data[campo] = _convertir(campo, tipo, dominio, v)
+    if not data["dni"]:
+        raise ValueError("dni: campo obligatorio")
+    if data["rt"]:
+        if data["rt_en_curso"] and data["rt_semana"] is None:
+            raise ValueError("rt_semana: obligatorio con radioterapia en curso")
+        if not data["rt_en_curso"] and data["rt_fin"] is None:
+            raise ValueError("rt_fin: obligatorio con radioterapia finalizada")
+    return data
+
+def validar(raw: Dict) -> Cuestionario:
+    """Como `normalizar`, pero devuelve un Cuestionario (el registro del wizard)."""
+    return Cuestionario(**normalizar(raw))
@@ -0,0 +1,53 @@
+# Tablero de guardia — casos pendientes de todas las sesiones, por prioridad y hora
+# Se abre en la misma app con ?vista=tablero: app.py importa este módulo solo en esa vista, así el
+# wizard no paga el costo de una app multipage (ni de cargar el tablero).
+# El listado sale de la cola de prioridad indexada (`triage.tablero`), que se actualiza con los
+# resultados nuevos de cualquier worker; solo el fragmento del listado se re-ejecuta (cada
+# `REFRESCO` s) y Streamlit empuja por el websocket únicamente lo que cambió, sin recargar la página.
+
+import streamlit as st
+
+from triage.almacen import Almacen
+from triage.tablero import Tablero
+
+REFRESCO = 2  # segundos
+ICONOS = {"URGENTE": "🔴", "Guardia": "🟠", "Interconsulta": "🟡"}
+
+@st.cache_resource
+def get_tablero() -> Tablero:
+    return Tablero(Almacen())  # uno por proceso, compartido por todas las sesiones
+
+@st.fragment(run_every=REFRESCO)
+def listado(limite: int):
+    tablero = get_tablero()
+    tablero.sincronizar()  # lecturas por rango de PK: sin novedades no toca la cola
+    foto = tablero.foto(limite)
+
+    for col, (rec, n) in zip(st.columns(len(foto["conteos"])), foto["conteos"].items()):
+        col.metric(f"{ICONOS[rec]} {rec}", n)
+    if not foto["casos"]:
+        st.info("No hay casos pendientes.")
+        return
+
+    st.dataframe(
+        [{"Prioridad": f"{ICONOS[c['recomendacion']]} {c['recomendacion']}", "Guardado": c["timestamp"],
+          "DNI": c["dni"], "Fecha": c["fecha"], "ECOG": c["ecog"], "Toxicidad": c["toxicidad"], "Caso": c["id"]}
+         for c in foto["casos"]],
+        hide_index=True, use_container_width=True,
+    )
+    st.caption(f"Mostrando {len(foto['casos'])} de {foto['total']} pendientes · versión {foto['version']}")
+
+    c1, c2 = st.columns([3, 1])
+    caso = c1.selectbox(
+        "Marcar como atendido", [c["id"] for c in foto["casos"]], index=None, placeholder="Elegí un caso",
+        format_func=lambda id: f"#{id} · {tablero.casos[id]['dni']} · {tablero.casos[id]['recomendacion']}"
+        if id in tablero.casos else f"#{id}",
+    )
+    c2.button("✅ Atendido", disabled=caso is None, use_container_width=True,
+              on_click=tablero.atender, args=(caso,))  # corre antes del rerun: el listado ya sale sin el caso
+
+def pagina():
+    st.set_page_config(page_title="Tablero de guardia", page_icon="🚨", layout="wide")
+    st.header("🚨 Tablero de guardia — casos pendientes")
+    st.sidebar.markdown("[🩺 Volver al triage](./)")
+    listado(st.sidebar.select_slider("Casos a mostrar", [25, 50, 100, 200, 500], value=100))